@@ -0,0 +1 @@
+"""Micro-benchmarks for hot paths of the bot."""
@@ -0,0 +1,111 @@
+"""Benchmark per-render cost of localized CustomCalendar keyboards.
+
+Compares rendering with Babel lookups on every cell (the previous
+implementation) against the precomputed per-locale name tables, and
+against keyboards served from the shared rendered-keyboard cache.
+
+Run with ``PYTHONPATH=src python -m benchmarks.calendar_names``.
+"""
+
+import asyncio
+import time
+from datetime import date
+from types import SimpleNamespace
+
+from aiogram_dialog.widgets.kbd import CalendarScope
+from aiogram_dialog.widgets.kbd.calendar_kbd import CalendarConfig
+from aiogram_dialog.widgets.text import Text
+from babel.dates import get_day_names, get_month_names
+
+from functions.custom.calendars import (
+    CachedScopeView,
+    CustomCalendar,
+    Month,
+    WeekDay,
+    calendar_keyboards,
+)
+
+
+RENDERS = 2000
+LOCALES = ("en", "ru", "de", "uk")
+
+
+class BabelWeekDay(Text):
+    """Weekday text doing a Babel lookup per render."""
+
+    async def _render_text(self, data, manager) -> str:
+        locale = manager.event.from_user.language_code
+        return get_day_names(width="short", context="stand-alone", locale=locale)[
+            data["date"].weekday()
+        ].title()
+
+
+class BabelMonth(Text):
+    """Month text doing a Babel lookup per render."""
+
+    async def _render_text(self, data, manager) -> str:
+        locale = manager.event.from_user.language_code
+        return get_month_names("wide", context="stand-alone", locale=locale)[
+            data["date"].month
+        ].title()
+
+
+def _uncached(calendar: CustomCalendar) -> CustomCalendar:
+    """Unwrap calendar views from the rendered-keyboard cache."""
+    calendar.views = {
+        scope: view.view if isinstance(view, CachedScopeView) else view
+        for scope, view in calendar.views.items()
+    }
+    return calendar
+
+
+def _patch_texts(calendar: CustomCalendar, weekday_cls, month_cls) -> None:
+    """Swap name texts of all calendar views for the given classes."""
+    for view in calendar.views.values():
+        for attr, value in vars(view).items():
+            for cls, replacement in ((WeekDay, weekday_cls), (Month, month_cls)):
+                if type(value) is cls:
+                    setattr(view, attr, replacement())
+                elif hasattr(value, "texts"):
+                    value.texts = [
+                        replacement() if type(text) is cls else text
+                        for text in value.texts
+                    ]
+
+
+async def _bench(calendar: CustomCalendar, scope: CalendarScope) -> float:
+    view = calendar.views[scope]
+    config = CalendarConfig()
+    offset = date(2025, 6, 1)
+    managers = [
+        SimpleNamespace(
+            event=SimpleNamespace(from_user=SimpleNamespace(language_code=code)),
+            is_preview=lambda: False,
+        )
+        for code in LOCALES
+    ]
+
+    started = time.perf_counter()
+    for i in range(RENDERS):
+        await view.render(config, offset, {}, managers[i % len(managers)])
+    return (time.perf_counter() - started) / RENDERS * 1e6
+
+
+async def main() -> None:
+    """Print per-render cost for each calendar scope."""
+    babel_calendar = _uncached(CustomCalendar(id="babel"))
+    _patch_texts(babel_calendar, BabelWeekDay, BabelMonth)
+    table_calendar = _uncached(CustomCalendar(id="tables"))
+    cached_calendar = CustomCalendar(id="cached")
+
+    print(f"{'scope':<8} {'babel, us':>10} {'tables, us':>11} {'cached, us':>11}")
+    for scope in (CalendarScope.DAYS, CalendarScope.MONTHS, CalendarScope.YEARS):
+        babel = await _bench(babel_calendar, scope)
+        tables = await _bench(table_calendar, scope)
+        cached = await _bench(cached_calendar, scope)
+        print(f"{scope.value:<8} {babel:>10.1f} {tables:>11.1f} {cached:>11.1f}")
+    print("cache:", calendar_keyboards.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""Benchmark event isolation backends.
+
+Simulates many users sending bursts of updates and measures throughput
+and lock acquisition latency for in-process sharded locks and for Redis
+locks. The Redis backend needs a reachable server configured through the
+usual ``REDIS_*`` variables and is skipped otherwise.
+
+Run with ``PYTHONPATH=src python -m benchmarks.event_isolation``.
+"""
+
+import asyncio
+import statistics
+import time
+
+from aiogram.fsm.storage.base import BaseEventIsolation, DefaultKeyBuilder, StorageKey
+from aiogram.fsm.storage.redis import RedisEventIsolation
+
+from storage import RedisMetrics, RedisSettings, ShardedEventIsolation, create_redis
+
+
+USERS = 200
+UPDATES_PER_USER = 10
+HANDLER_SECONDS = 0.001
+
+
+async def _bench(isolation: BaseEventIsolation) -> tuple[float, float, float]:
+    waits: list[float] = []
+
+    async def handle(user_id: int) -> None:
+        key = StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+        started = time.perf_counter()
+        async with isolation.lock(key):
+            waits.append(time.perf_counter() - started)
+            await asyncio.sleep(HANDLER_SECONDS)
+
+    updates = [
+        handle(user_id) for _ in range(UPDATES_PER_USER) for user_id in range(USERS)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*updates)
+    elapsed = time.perf_counter() - started
+
+    p50 = statistics.median(waits) * 1e3
+    p99 = statistics.quantiles(waits, n=100)[98] * 1e3
+    return len(waits) / elapsed, p50, p99
+
+
+async def main() -> None:
+    """Print throughput and lock wait percentiles for each backend."""
+    key_builder = DefaultKeyBuilder(prefix="bench:fsm", with_destiny=True)
+    backends: dict[str, BaseEventIsolation] = {
+        "memory": ShardedEventIsolation(key_builder=key_builder),
+    }
+
+    redis = create_redis(RedisSettings.from_env(), RedisMetrics())
+    try:
+        await redis.ping()
+    except Exception as e:
+        print(f"redis: skipped ({e})")
+    else:
+        backends["redis"] = RedisEventIsolation(redis=redis, key_builder=key_builder)
+
+    print(f"{'backend':<8} {'updates/s':>10} {'p50 wait, ms':>13} {'p99 wait, ms':>13}")
+    for name, isolation in backends.items():
+        throughput, p50, p99 = await _bench(isolation)
+        print(f"{name:<8} {throughput:>10.0f} {p50:>13.2f} {p99:>13.2f}")
+        await isolation.close()
+    await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
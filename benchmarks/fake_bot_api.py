@@ -0,0 +1,425 @@
+"""Local fake Telegram Bot API for end-to-end benchmarks.
+
+Serves the Bot API over HTTP, so the bot exercises its real aiohttp
+session, serialization and error handling. Updates of synthetic users are
+served through ``getUpdates`` or pushed to the webhook the bot sets.
+Responses can be delayed, and ``429 Too Many Requests`` and server errors
+injected at configurable rates.
+
+Start the fake API and run synthetic users through the journeys of
+``benchmarks.load_test``, then start the bot against it::
+
+    PYTHONPATH=src python -m benchmarks.fake_bot_api --port 8081 --users 100
+    MEGA_BOT_API_URL=http://127.0.0.1:8081 python -m src.main
+
+Every update is timed from the moment it is handed to the bot until the
+bot answers it: the callback query is answered, or a message is sent or
+edited in the chat.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from aiohttp import ClientSession, web
+
+from benchmarks.load_test import JOURNEYS, Step
+
+
+# Methods answering with the sent or edited message.
+MESSAGE_METHODS = {
+    "sendMessage",
+    "sendPhoto",
+    "editMessageText",
+    "editMessageCaption",
+    "editMessageMedia",
+    "editMessageReplyMarkup",
+}
+# Methods never affected by injected faults, so the bot can connect.
+CONTROL_METHODS = {"getMe", "getUpdates", "setWebhook", "deleteWebhook", "close"}
+
+
+@dataclass(frozen=True)
+class FakeApiSettings:
+    """Behaviour of the fake Bot API.
+
+    Attributes
+    ----------
+    latency : float
+        Seconds every method call takes.
+    jitter : float
+        Maximum random seconds added to the latency.
+    flood_rate : float
+        Share of calls answered with ``429 Too Many Requests``.
+    retry_after : int
+        Seconds reported in flood errors.
+    error_rate : float
+        Share of calls answered with ``500 Internal Server Error``.
+
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    flood_rate: float = 0.0
+    retry_after: int = 1
+    error_rate: float = 0.0
+
+
+def _error(status: int, description: str, **parameters: Any) -> web.Response:
+    payload: Dict[str, Any] = {
+        "ok": False,
+        "error_code": status,
+        "description": description,
+    }
+    if parameters:
+        payload["parameters"] = parameters
+    return web.json_response(payload, status=status)
+
+
+class FakeBotApi:
+    """In-memory Bot API serving a single bot.
+
+    Parameters
+    ----------
+    settings : FakeApiSettings
+        Latency and fault injection settings.
+
+    """
+
+    def __init__(self, settings: FakeApiSettings = FakeApiSettings()):
+        self.settings = settings
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.faults: Dict[str, int] = defaultdict(int)
+        self.last_message: Dict[int, Dict[str, Any]] = {}
+        self.connected = asyncio.Event()
+        self._updates: List[Dict[str, Any]] = []
+        self._new_updates = asyncio.Condition()
+        self._waiters: Dict[Any, asyncio.Future] = {}
+        self._webhook: Optional[Dict[str, Optional[str]]] = None
+        self._client: Optional[ClientSession] = None
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._bot: Dict[str, Any] = {}
+
+        self.app = web.Application()
+        self.app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        self.app.on_cleanup.append(self._close_client)
+
+    async def _close_client(self, _app: web.Application) -> None:
+        if self._client is not None:
+            await self._client.close()
+
+    async def _params(self, request: web.Request) -> Dict[str, Any]:
+        if request.content_type == "application/json":
+            return await request.json()
+        params: Dict[str, Any] = dict(request.query)
+        if request.can_read_body:
+            for name, value in (await request.post()).items():
+                params[name] = value if isinstance(value, str) else "<file>"
+        for name in ("reply_markup", "media", "allowed_updates"):
+            if isinstance(params.get(name), str):
+                params[name] = json.loads(params[name])
+        return params
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        self.requests[method] += 1
+        self._bot = self._bot or {
+            "id": int(request.match_info["token"].split(":")[0] or 1),
+            "is_bot": True,
+            "first_name": "Fake",
+            "username": "fake_bot",
+        }
+
+        settings = self.settings
+        if method not in CONTROL_METHODS:
+            if settings.latency or settings.jitter:
+                await asyncio.sleep(settings.latency + random.random() * settings.jitter)
+            if random.random() < settings.flood_rate:
+                self.faults["flood"] += 1
+                return _error(
+                    429,
+                    f"Too Many Requests: retry after {settings.retry_after}",
+                    retry_after=settings.retry_after,
+                )
+            if random.random() < settings.error_rate:
+                self.faults["error"] += 1
+                return _error(500, "Internal Server Error")
+
+        handler = getattr(self, f"_method_{method}", None)
+        if handler is not None:
+            result = await handler(params)
+        elif method in MESSAGE_METHODS:
+            result = self._message(method, params)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def _method_getMe(self, _params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._bot
+
+    async def _method_getUpdates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.connected.set()
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        async with self._new_updates:
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+            if not self._updates and timeout:
+                try:
+                    await asyncio.wait_for(self._new_updates.wait(), timeout)
+                except TimeoutError:
+                    pass
+            return self._updates[:limit]
+
+    async def _method_setWebhook(self, params: Dict[str, Any]) -> bool:
+        self._webhook = {"url": params["url"], "secret": params.get("secret_token")}
+        self.connected.set()
+        return True
+
+    async def _method_deleteWebhook(self, _params: Dict[str, Any]) -> bool:
+        self._webhook = None
+        return True
+
+    async def _method_answerCallbackQuery(self, params: Dict[str, Any]) -> bool:
+        self._resolve(params["callback_query_id"])
+        return True
+
+    def _message(self, method: str, params: Dict[str, Any]) -> Dict[str, Any] | bool:
+        if "inline_message_id" in params:
+            return True
+        chat_id = int(params["chat_id"])
+        old = self.last_message.get(chat_id, {})
+        message: Dict[str, Any] = {
+            "message_id": int(params.get("message_id") or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": self._bot,
+        }
+        if method == "editMessageReplyMarkup":
+            message.update({k: v for k, v in old.items() if k in ("text", "photo")})
+        elif method in ("sendPhoto", "editMessageMedia"):
+            file_id = f"photo-{message['message_id']}"
+            message["photo"] = [
+                {"file_id": file_id, "file_unique_id": file_id, "width": 1, "height": 1}
+            ]
+            message["caption"] = params.get("caption") or None
+        else:
+            message["text"] = params.get("text") or old.get("text") or ""
+        if params.get("reply_markup"):
+            message["reply_markup"] = params["reply_markup"]
+        # Keyboards of older messages are removed around sending a new one,
+        # which is the actual answer to the user.
+        if message["message_id"] >= old.get("message_id", 0):
+            self.last_message[chat_id] = message
+            if method != "editMessageReplyMarkup":
+                self._resolve(chat_id)
+        return message
+
+    def _resolve(self, key: Any) -> None:
+        waiter = self._waiters.pop(key, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(time.perf_counter())
+
+    async def push(self, update: Dict[str, Any], wait_for: Any) -> asyncio.Future:
+        """Hand an update to the bot.
+
+        Parameters
+        ----------
+        update : dict
+            The update without ``update_id``.
+        wait_for : Any
+            Chat id or callback query id whose answer completes the update.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolved with the ``perf_counter`` time the bot answered.
+
+        """
+        update = {"update_id": next(self._update_ids), **update}
+        waiter = self._waiters[wait_for] = asyncio.get_running_loop().create_future()
+        if self._webhook is not None:
+            if self._client is None:
+                self._client = ClientSession()
+            headers = {}
+            if self._webhook["secret"]:
+                headers["X-Telegram-Bot-Api-Secret-Token"] = self._webhook["secret"]
+            async with self._client.post(
+                self._webhook["url"], json=update, headers=headers
+            ) as response:
+                response.raise_for_status()
+        else:
+            async with self._new_updates:
+                self._updates.append(update)
+                self._new_updates.notify_all()
+        return waiter
+
+
+class SyntheticUsers:
+    """Users walking through journeys against the fake API.
+
+    Parameters
+    ----------
+    api : FakeBotApi
+        The fake Bot API the bot is connected to.
+    timeout : float
+        Seconds to wait for the bot to answer an update.
+
+    """
+
+    def __init__(self, api: FakeBotApi, timeout: float = 10.0):
+        self.api = api
+        self.timeout = timeout
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self._callback_ids = itertools.count(1)
+
+    def _update(self, user: Dict[str, Any], step: Step) -> Optional[tuple]:
+        chat_id = user["id"]
+        if step.kind == "text":
+            message = {
+                "message_id": next(self.api._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": user,
+                "text": step.value,
+            }
+            return {"message": message}, chat_id
+        message = self.api.last_message.get(chat_id)
+        rows = (message or {}).get("reply_markup", {}).get("inline_keyboard", [])
+        buttons = [
+            button
+            for row in rows
+            for button in row
+            if button.get("callback_data") and step.value in button["text"]
+        ]
+        if not buttons:
+            return None
+        button = next((b for b in buttons if b["text"] == step.value), buttons[0])
+        query_id = str(next(self._callback_ids))
+        query = {
+            "id": query_id,
+            "from": user,
+            "chat_instance": str(chat_id),
+            "message": message,
+            "data": button["callback_data"],
+        }
+        return {"callback_query": query}, query_id
+
+    async def run_user(self, user_id: int, name: str) -> None:
+        """Walk a user through a journey, stopping at the first failure."""
+        user = {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": "Load",
+            "language_code": "en",
+        }
+        for step in JOURNEYS[name]:
+            prepared = self._update(user, step)
+            if prepared is None:
+                self.failures[f"{name}: no button {step.value!r}"] += 1
+                return
+            update, wait_for = prepared
+            started = time.perf_counter()
+            try:
+                answered = await asyncio.wait_for(
+                    await self.api.push(update, wait_for), self.timeout
+                )
+            except TimeoutError:
+                self.failures[f"{name}: no answer to {step.value!r}"] += 1
+                return
+            self.latencies[name].append(answered - started)
+
+    async def run(self, users: int, concurrency: int, journeys: List[str]) -> float:
+        """Run users in parallel and return the elapsed seconds."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(user_id: int, name: str) -> None:
+            async with semaphore:
+                await self.run_user(user_id, name)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(limited(1000 + i, journeys[i % len(journeys)]) for i in range(users))
+        )
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> None:
+        """Print throughput and latency percentiles by journey."""
+        total = sum(len(values) for values in self.latencies.values())
+        print(
+            f"updates: {total}, elapsed: {elapsed:.2f}s, {total / elapsed:.0f} updates/s"
+        )
+        print(f"{'journey':<12} {'count':>7} {'p50, ms':>8} {'p95, ms':>8} {'p99, ms':>8}")
+        for name, values in sorted(self.latencies.items()):
+            if len(values) > 1:
+                cuts = statistics.quantiles(values, n=100)
+                p95, p99 = cuts[94], cuts[98]
+            else:
+                p95 = p99 = values[0]
+            print(
+                f"{name:<12} {len(values):>7} {statistics.median(values) * 1e3:>8.2f} "
+                f"{p95 * 1e3:>8.2f} {p99 * 1e3:>8.2f}"
+            )
+        api = ", ".join(f"{k}={v}" for k, v in sorted(self.api.requests.items()))
+        print(f"api requests: {api}")
+        faults = ", ".join(f"{k}={v}" for k, v in sorted(self.api.faults.items()))
+        print(f"injected faults: {faults or 'none'}")
+        for failure, count in sorted(self.failures.items()):
+            print(f"failed {count}x {failure}")
+
+
+async def main() -> None:
+    """Serve the fake API, wait for the bot and run synthetic users."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--users", type=int, default=100, help="synthetic users")
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="users active at the same time"
+    )
+    parser.add_argument(
+        "--journeys",
+        default=",".join(JOURNEYS),
+        help=f"comma separated journeys out of: {', '.join(JOURNEYS)}",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="API latency, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="API jitter, ms")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="share of 429s")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 retry after, s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500s")
+    args = parser.parse_args()
+
+    api = FakeBotApi(
+        FakeApiSettings(
+            latency=args.latency / 1e3,
+            jitter=args.jitter / 1e3,
+            flood_rate=args.flood_rate,
+            retry_after=args.retry_after,
+            error_rate=args.error_rate,
+        )
+    )
+    runner = web.AppRunner(api.app)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"fake Bot API on http://{args.host}:{args.port}, waiting for the bot...")
+    try:
+        await api.connected.wait()
+        users = SyntheticUsers(api)
+        elapsed = await users.run(args.users, args.concurrency, args.journeys.split(","))
+        users.report(elapsed)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,395 @@
+"""Offline load test of the dialogs through ``Dispatcher.feed_update``.
+
+Synthetic users walk through whole journeys of the dialogs in
+``src/data``: they send messages and press buttons found in the keyboards
+the bot sent them. Updates are fed into a real Dispatcher with the dialog
+router, while the Bot API is replaced by an in-memory session. FSM
+storage, getter cache and media ids live in fakeredis, or in a real Redis
+when ``--redis`` is given.
+
+Reports updates per second and latency percentiles by the dialog state
+an update was handled in.
+
+Run with ``PYTHONPATH=src python -m benchmarks.load_test --users 500``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.base import DefaultKeyBuilder
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import (
+    CallbackQuery,
+    Chat,
+    InlineKeyboardMarkup,
+    Message,
+    PhotoSize,
+    TelegramObject,
+    Update,
+    User,
+)
+from aiogram_dialog.api.internal import CONTEXT_KEY
+from fakeredis.aioredis import FakeRedis
+from redis.asyncio import Redis
+
+from bot import get_dialog_router
+from functions.cache import GETTER_STORE_KEY, RedisGetterStore
+from media import RedisMediaIdStorage, install_media_id_storage
+from storage import ShardedEventIsolation
+
+
+BOT_TOKEN = "42:LOAD-TEST"
+NO_STATE = "none"
+
+
+@dataclass(frozen=True)
+class Step:
+    """Action of a synthetic user.
+
+    Attributes
+    ----------
+    kind : str
+        ``"text"`` to send a message or ``"click"`` to press a button.
+    value : str
+        Message text or the label of the button.
+
+    """
+
+    kind: str
+    value: str
+
+
+def send(text: str) -> Step:
+    """Send a text message."""
+    return Step("text", text)
+
+
+def click(label: str) -> Step:
+    """Press a button of the last keyboard by its label.
+
+    A button with exactly this text is preferred, otherwise the first one
+    containing it is pressed, so ``">>"`` matches ``"November 2026 >>"``.
+    """
+    return Step("click", label)
+
+
+JOURNEYS: Dict[str, List[Step]] = {
+    "menu": [
+        send("/start"),
+        click("📐 Layout widgets"),
+        click("☰ Main menu"),
+        click("☑️ Selection widgets"),
+        click("☰ Main menu"),
+    ],
+    "scrolls": [
+        send("/start"),
+        click("📜 Scrolling widgets"),
+        click("📜 Default Pager"),
+        click(">"),
+        click(">"),
+        click("<"),
+        click("Back"),
+        click("📄 Text scroll"),
+        click("2"),
+        click("3"),
+        click("Back"),
+    ],
+    "calendar": [
+        send("/start"),
+        click("📅 Calendar widgets"),
+        click("Default"),
+        click("15"),
+        click(">>"),
+        click(">>"),
+        click("<<"),
+        click("Back"),
+        click("Customized"),
+        click("👉🏽"),
+        click("Back"),
+    ],
+    "switch": [
+        send("/start"),
+        click("🔢 Multiple steps"),
+        click("Next"),
+        send("Load Tester"),
+        click("Click to enable the option"),
+        click("⚪️ 🤖"),
+        click("Next"),
+        click("✓ Finish"),
+    ],
+}
+
+
+class FakeSession(BaseSession):
+    """Bot session answering API calls in memory.
+
+    Methods returning a message get a message with the text and keyboard
+    of the request, everything else gets ``True``. The last keyboard sent
+    to every chat is kept, so users can press its buttons.
+
+    Parameters
+    ----------
+    latency : float
+        Seconds every request takes.
+
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.last_message: Dict[int, Message] = {}
+        self._message_ids = itertools.count(1)
+
+    async def close(self) -> None:
+        """Close the session."""
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: Optional[int] = None,
+    ) -> TelegramType:
+        """Answer the API method."""
+        self.requests[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method.__returning__ is not Message and "Message" not in str(
+            method.__returning__
+        ):
+            return True
+        chat_id = getattr(method, "chat_id", None)
+        old = self.last_message.get(chat_id)
+        message_id = getattr(method, "message_id", None) or next(self._message_ids)
+        photo = None
+        if (media := getattr(method, "media", None)) or getattr(method, "photo", None):
+            photo = [
+                PhotoSize(
+                    file_id=f"photo-{message_id}",
+                    file_unique_id=f"photo-{message_id}",
+                    width=1,
+                    height=1,
+                )
+            ]
+        reply_markup = getattr(method, "reply_markup", None)
+        if reply_markup is None and old is not None and old.message_id == message_id:
+            reply_markup = old.reply_markup
+        message = Message(
+            message_id=message_id,
+            date=datetime.now(),
+            chat=Chat(id=chat_id, type="private"),
+            from_user=User(id=bot.id, is_bot=True, first_name="Bot"),
+            text=getattr(method, "text", None) if photo is None and not media else None,
+            caption=getattr(method, "caption", None),
+            photo=photo,
+            reply_markup=reply_markup
+            if isinstance(reply_markup, InlineKeyboardMarkup)
+            else None,
+        )
+        self.last_message[chat_id] = message
+        return message
+
+    async def stream_content(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncGenerator[bytes, None]:
+        """Stream nothing, files are never downloaded."""
+        yield b""
+
+
+class StateProbe(BaseMiddleware):
+    """Inner middleware remembering the dialog state an update was handled in."""
+
+    def __init__(self):
+        self.states: Dict[int, str] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        context = data.get(CONTEXT_KEY)
+        self.states[data["event_update"].update_id] = (
+            context.state.state if context else NO_STATE
+        )
+        return await handler(event, data)
+
+
+class LoadTest:
+    """Synthetic users driving a Dispatcher.
+
+    Parameters
+    ----------
+    dispatcher : Dispatcher
+        Dispatcher with the dialog router included.
+    bot : Bot
+        Bot using a ``FakeSession``.
+    probe : StateProbe
+        Probe registered on the dialog router.
+
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, probe: StateProbe):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.session: FakeSession = bot.session
+        self.probe = probe
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self._update_ids = itertools.count(1)
+
+    def _message(self, user: User, text: str) -> Update:
+        return Update(
+            update_id=next(self._update_ids),
+            message=Message(
+                message_id=next(self.session._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=user.id, type="private"),
+                from_user=user,
+                text=text,
+            ),
+        )
+
+    def _callback(self, user: User, label: str) -> Optional[Update]:
+        message = self.session.last_message.get(user.id)
+        if message is None or message.reply_markup is None:
+            return None
+        buttons = [
+            button
+            for row in message.reply_markup.inline_keyboard
+            for button in row
+            if button.callback_data and label in button.text
+        ]
+        if not buttons:
+            return None
+        button = next((b for b in buttons if b.text == label), buttons[0])
+        update_id = next(self._update_ids)
+        return Update(
+            update_id=update_id,
+            callback_query=CallbackQuery(
+                id=str(update_id),
+                from_user=user,
+                chat_instance=str(user.id),
+                message=message,
+                data=button.callback_data,
+            ),
+        )
+
+    async def _feed(self, update: Update) -> None:
+        started = time.perf_counter()
+        await self.dispatcher.feed_update(self.bot, update)
+        elapsed = time.perf_counter() - started
+        state = self.probe.states.pop(update.update_id, NO_STATE)
+        self.latencies[state].append(elapsed)
+
+    async def run_user(self, user_id: int, name: str, journey: List[Step]) -> None:
+        """Walk a user through a journey, stopping at the first failure."""
+        user = User(id=user_id, is_bot=False, first_name="Load", language_code="en")
+        for step in journey:
+            if step.kind == "text":
+                update = self._message(user, step.value)
+            else:
+                update = self._callback(user, step.value)
+            if update is None:
+                self.failures[f"{name}: no button {step.value!r}"] += 1
+                return
+            try:
+                await self._feed(update)
+            except Exception as e:
+                self.failures[f"{name}: {type(e).__name__} at {step.value!r}"] += 1
+                return
+
+    async def run(self, users: int, concurrency: int, journeys: List[str]) -> float:
+        """Run users in parallel and return the elapsed seconds."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(user_id: int, name: str) -> None:
+            async with semaphore:
+                await self.run_user(user_id, name, JOURNEYS[name])
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(limited(1000 + i, journeys[i % len(journeys)]) for i in range(users))
+        )
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> None:
+        """Print throughput and latency percentiles by state."""
+        total = sum(len(values) for values in self.latencies.values())
+        print(
+            f"updates: {total}, elapsed: {elapsed:.2f}s, {total / elapsed:.0f} updates/s"
+        )
+        print(f"{'state':<24} {'count':>7} {'p50, ms':>8} {'p95, ms':>8} {'p99, ms':>8}")
+        for state, values in sorted(self.latencies.items()):
+            if len(values) > 1:
+                cuts = statistics.quantiles(values, n=100)
+                p95, p99 = cuts[94], cuts[98]
+            else:
+                p95 = p99 = values[0]
+            print(
+                f"{state:<24} {len(values):>7} {statistics.median(values) * 1e3:>8.2f} "
+                f"{p95 * 1e3:>8.2f} {p99 * 1e3:>8.2f}"
+            )
+        api = ", ".join(f"{k}={v}" for k, v in sorted(self.session.requests.items()))
+        print(f"api requests: {api}")
+        for failure, count in sorted(self.failures.items()):
+            print(f"failed {count}x {failure}")
+
+
+def create_load_test(redis: Redis, latency: float = 0.0) -> LoadTest:
+    """Assemble a Dispatcher like ``main`` does, with an in-memory Bot API."""
+    key_builder = DefaultKeyBuilder(prefix="load_test:fsm", with_destiny=True)
+    dispatcher = Dispatcher(
+        storage=RedisStorage(redis=redis, key_builder=key_builder),
+        events_isolation=ShardedEventIsolation(key_builder=key_builder),
+    )
+    dispatcher[GETTER_STORE_KEY] = RedisGetterStore(redis, prefix="load_test:getter")
+    probe = StateProbe()
+    router = get_dialog_router()
+    router.message.middleware(probe)
+    router.callback_query.middleware(probe)
+    install_media_id_storage(router, RedisMediaIdStorage(redis))
+    dispatcher.include_router(router)
+    bot = Bot(token=BOT_TOKEN, session=FakeSession(latency))
+    return LoadTest(dispatcher, bot, probe)
+
+
+async def main() -> None:
+    """Parse arguments, run the load test and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200, help="synthetic users")
+    parser.add_argument(
+        "--concurrency", type=int, default=50, help="users active at the same time"
+    )
+    parser.add_argument(
+        "--journeys",
+        default=",".join(JOURNEYS),
+        help=f"comma separated journeys out of: {', '.join(JOURNEYS)}",
+    )
+    parser.add_argument(
+        "--api-latency", type=float, default=0.0, help="Bot API latency, ms"
+    )
+    parser.add_argument("--redis", help="Redis URL, fakeredis is used if not set")
+    args = parser.parse_args()
+
+    redis = Redis.from_url(args.redis) if args.redis else FakeRedis()
+    load_test = create_load_test(redis, latency=args.api_latency / 1e3)
+    elapsed = await load_test.run(args.users, args.concurrency, args.journeys.split(","))
+    load_test.report(elapsed)
+    await load_test.dispatcher.storage.close()
+    await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""Benchmark encoding of dialog state for ``RedisStorage``.
+
+Serializes and deserializes a dialog stack and the contexts of its
+intents, shaped like aiogram_dialog stores them for a user deep in the
+example dialogs, with the standard json module, orjson, msgpack and
+msgpack compressed with zstd, and reports the bytes kept in Redis.
+
+Run with ``PYTHONPATH=src python -m benchmarks.state_codec``.
+"""
+
+from datetime import date
+import time
+from typing import Any, Dict, List
+
+from storage.codec import get_state_codec
+
+
+ROUNDS = 20000
+
+
+def dialog_state() -> List[Dict[str, Any]]:
+    """Return a stack and the contexts of its intents as stored in Redis."""
+    intents = ["Aq3Zq1x", "Bm7Tk2y", "Cz9Lp3w"]
+    stack = {
+        "_id": "",
+        "intents": intents,
+        "last_message_id": 1543,
+        "last_reply_keyboard": False,
+        "last_media_id": None,
+        "last_media_unique_id": None,
+        "last_income_media_group_id": None,
+    }
+    contexts = [
+        {
+            "_intent_id": intents[0],
+            "_stack_id": "",
+            "state": "Menu:MAIN",
+            "start_data": None,
+            "dialog_data": {},
+            "widget_data": {},
+            "access_settings": {"user_ids": [1000]},
+        },
+        {
+            "_intent_id": intents[1],
+            "_stack_id": "",
+            "state": "Selects:MULTI",
+            "start_data": {"source": "menu"},
+            "dialog_data": {"name": "Load Tester", "seen": {3, 5, 8}},
+            "widget_data": {
+                "multi_select": ["1", "4", "7", "12"],
+                "radio": "2",
+                "counter": 7,
+                "scroll_pager": 3,
+                "text_scroll": 1,
+            },
+            "access_settings": {"user_ids": [1000]},
+        },
+        {
+            "_intent_id": intents[2],
+            "_stack_id": "",
+            "state": "Calendars:DEFAULT",
+            "start_data": None,
+            "dialog_data": {"selected": date(2026, 10, 15)},
+            "widget_data": {
+                "calendar": {"current_scope": "DAYS", "current_offset": "2026-11-01"}
+            },
+            "access_settings": {"user_ids": [1000]},
+        },
+    ]
+    return [stack, *contexts]
+
+
+def bench(label: str, documents: List[Dict[str, Any]], **codec: Any) -> None:
+    """Print the cost of a write and a read of the whole state."""
+    dumps, loads = get_state_codec(**codec)
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        raw = [dumps(document) for document in documents]
+    dumped = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for value in raw:
+            loads(value)
+    loaded = time.perf_counter() - started
+    size = sum(len(value) for value in raw)
+    print(
+        f"{label:<12} dumps {dumped / ROUNDS * 1e6:>6.2f} us  "
+        f"loads {loaded / ROUNDS * 1e6:>6.2f} us  size {size} bytes"
+    )
+
+
+def main() -> None:
+    """Run the benchmark for every codec."""
+    documents = dialog_state()
+    print(f"{len(documents)} documents per user, {ROUNDS} rounds")
+    bench("json", documents)
+    bench("orjson", documents, fast_json=True)
+    bench("msgpack", documents, name="msgpack", compress_min=0)
+    # Compress every document to show what zstd gains on small ones.
+    bench("msgpack+zstd", documents, name="msgpack", compress_min=1)
+
+
+if __name__ == "__main__":
+    main()
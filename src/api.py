@@ -0,0 +1,65 @@
+"""Telegram Bot API server selection."""
+
+import os
+from dataclasses import dataclass
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+
+
+@dataclass(frozen=True)
+class BotApiSettings:
+    """Bot API server settings.
+
+    Attributes
+    ----------
+    url : str | None
+        Base URL of the Bot API server, ``api.telegram.org`` if not set.
+        Points the bot to a self-hosted server or to a local fake one.
+    is_local : bool
+        Whether the server is a local Bot API server, which serves files
+        from its file system.
+
+    """
+
+    url: str | None = None
+    is_local: bool = False
+
+    @classmethod
+    def from_env(cls) -> "BotApiSettings":
+        """Read Bot API settings from environment variables.
+
+        Returns
+        -------
+        BotApiSettings
+            Settings populated from ``MEGA_BOT_API_*`` variables.
+
+        """
+        return cls(
+            url=os.getenv("MEGA_BOT_API_URL") or None,
+            is_local=os.getenv("MEGA_BOT_API_LOCAL", "false").lower() == "true",
+        )
+
+    @property
+    def server(self) -> TelegramAPIServer:
+        """Return the API server the bot talks to."""
+        if self.url is None:
+            return PRODUCTION
+        return TelegramAPIServer.from_base(self.url.rstrip("/"), is_local=self.is_local)
+
+
+def create_bot_session(settings: BotApiSettings) -> AiohttpSession:
+    """Create a bot session talking to the configured Bot API server.
+
+    Parameters
+    ----------
+    settings : BotApiSettings
+        The Bot API settings.
+
+    Returns
+    -------
+    AiohttpSession
+        The session to pass to ``Bot``.
+
+    """
+    return AiohttpSession(api=settings.server)
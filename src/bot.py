@@ -1,6 +1,7 @@
 """Bot dialogs and handlers."""
 
 from contextlib import suppress
+from typing import Callable
 
 import structlog
 from aiogram import F, Router
@@ -12,8 +13,14 @@ from aiogram_dialog import DialogManager, StartMode, ShowMode
 from aiogram_dialog.api.exceptions import UnknownIntent
 from dialog_yml import DialogYAMLBuilder, FuncsRegistry
 
+from dialog_cache import CachedDialogYAMLBuilder
 from functions import register_dialog_yml_funcs
-from functions.custom import CustomCalendarModel
+from functions.custom import (
+    CustomCalendarModel,
+    IndexedScrollingTextModel,
+    PagedScrollingGroupModel,
+)
+from lazy_dialogs import LazyDialogYAMLBuilder
 
 logger = structlog.get_logger(__name__)
 
@@ -52,9 +59,9 @@ async def on_unknown_intent(event: ErrorEvent, dialog_manager: DialogManager) ->
         The dialog manager instance.
 
     """
-    user_id = (
-        dialog_manager.event.from_user.id if dialog_manager.event.from_user else "unknown"
-    )
+    # The manager event is the ErrorEvent here, the user is in the update.
+    user = getattr(event.update.event, "from_user", None)
+    user_id = user.id if user else "unknown"
     logger.error(
         "Restarting dialog due to unknown intent.",
         user_id=user_id,
@@ -62,7 +69,7 @@ async def on_unknown_intent(event: ErrorEvent, dialog_manager: DialogManager) ->
     )
     if event.update.callback_query:
         await event.update.callback_query.answer(
-            "Bot process was restarted due to maintenance.\nRedirecting to main menu.",
+            "This menu is no longer active.\nRedirecting to main menu.",
         )
         message = event.update.callback_query.message
         if isinstance(message, Message):
@@ -101,16 +108,42 @@ class CustomSG(StatesGroup):
     state3 = State()
 
 
-def get_dialog_router() -> Router:
-    """Create and configure the dialog router."""
+def get_dialog_router(
+    cache_dir: str | None = None,
+    on_funcs_registered: Callable[[FuncsRegistry], None] | None = None,
+    lazy: bool = False,
+) -> Router:
+    """Create and configure the dialog router.
+
+    Parameters
+    ----------
+    cache_dir : str | None
+        Directory for compiled dialog models. Caching is disabled if not set.
+    on_funcs_registered : Callable[[FuncsRegistry], None] | None
+        Hook called with the registry once dialog functions are registered
+        and before dialogs are built.
+    lazy : bool
+        Build the windows of each dialog on its first use instead of at once.
+        The dialogs cache is then written once every dialog was built.
+
+    """
     logger.info("Building dialogs...")
-    register_dialog_yml_funcs(FuncsRegistry())
-    dy_builder = DialogYAMLBuilder.build(
+    funcs_registry = FuncsRegistry()
+    register_dialog_yml_funcs(funcs_registry)
+    if on_funcs_registered is not None:
+        on_funcs_registered(funcs_registry)
+    builder_class = LazyDialogYAMLBuilder if lazy else CachedDialogYAMLBuilder
+    dy_builder = builder_class.build(
         yaml_file_name="main.yaml",
         yaml_dir_path="src/data",
-        models={"my_calendar": CustomCalendarModel},
+        models={
+            "my_calendar": CustomCalendarModel,
+            "paged_scrolling_group": PagedScrollingGroupModel,
+            "indexed_scrolling_text": IndexedScrollingTextModel,
+        },
         states=[CustomSG],
         router=Router(name=__name__),
+        cache_dir=cache_dir,
     )
 
     dy_builder.router.message.register(start, F.text == "/start")
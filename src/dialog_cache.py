@@ -0,0 +1,254 @@
+"""On-disk cache of compiled dialog models."""
+
+import hashlib
+import io
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Type
+
+import structlog
+from aiogram import Router
+from aiogram.fsm.state import State, StatesGroup
+from aiogram_dialog import Dialog, setup_dialogs
+from dialog_yml import (
+    DialogYAMLBuilder,
+    DialogYAMLMiddleware,
+    FuncsRegistry,
+    YAMLStatesManager,
+)
+from dialog_yml import __version__ as dialog_yml_version
+from dialog_yml.models.base import YAMLModel
+from dialog_yml.models.dialog import DialogModel
+from dialog_yml.models.window import WindowModel
+
+
+logger = structlog.get_logger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+YAML_SUFFIXES = (".yaml", ".yml")
+
+
+def _load_state(name: str) -> State:
+    state = YAMLStatesManager().get_by_name(name)
+    if not isinstance(state, State):
+        raise pickle.UnpicklingError(f"Unknown state {name!r}.")
+    return state
+
+
+def _load_states_group(name: str) -> Type[StatesGroup]:
+    group = YAMLStatesManager().get_by_name(name)
+    if not isinstance(group, StatesGroup):
+        raise pickle.UnpicklingError(f"Unknown states group {name!r}.")
+    return type(group)
+
+
+class _ModelsPickler(pickle.Pickler):
+    """Pickler storing FSM states by name.
+
+    Dialog states groups are generated at runtime and cannot be pickled by
+    reference, so they are resolved through ``YAMLStatesManager`` on load.
+
+    """
+
+    def reducer_override(self, obj: Any) -> Any:
+        if isinstance(obj, State):
+            return _load_state, (obj.state,)
+        if (
+            isinstance(obj, type)
+            and issubclass(obj, StatesGroup)
+            and obj is not StatesGroup
+        ):
+            return _load_states_group, (obj.__full_group_name__,)
+        return NotImplemented
+
+
+def compute_cache_key(
+    yaml_dir_path: str,
+    registry: FuncsRegistry,
+    models: Dict[str, Type[YAMLModel]] | None = None,
+    states: List[Type[StatesGroup]] | None = None,
+) -> str:
+    """Compute a key identifying a compiled dialogs build.
+
+    Every YAML file under ``yaml_dir_path`` is hashed, which covers the
+    whole ``!include`` graph without parsing it.
+
+    Parameters
+    ----------
+    yaml_dir_path : str
+        Directory with dialog YAML files.
+    registry : FuncsRegistry
+        The registry with functions referenced from YAML.
+    models : Dict[str, Type[YAMLModel]] | None
+        Custom models mapped to their YAML tags.
+    states : List[Type[StatesGroup]] | None
+        Custom states groups.
+
+    Returns
+    -------
+    str
+        Hex digest of the build inputs.
+
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        f"{CACHE_FORMAT_VERSION}:{dialog_yml_version}:{sys.version_info[:2]}".encode()
+    )
+
+    root = Path(yaml_dir_path)
+    for path in sorted(p for p in root.rglob("*") if p.suffix in YAML_SUFFIXES):
+        digest.update(str(path.relative_to(root)).encode())
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+
+    for name, category in sorted(registry._categories_map_.items()):
+        digest.update(f"{name}:{','.join(sorted(category._functions))}".encode())
+    for tag, model in sorted((models or {}).items()):
+        digest.update(f"{tag}:{model.__module__}.{model.__qualname__}".encode())
+    for group in states or []:
+        digest.update(group.__full_group_name__.encode())
+
+    return digest.hexdigest()
+
+
+class CachedDialogYAMLBuilder(DialogYAMLBuilder):
+    """Dialog builder that reuses compiled dialog models from disk.
+
+    On a warm start YAML parsing and model validation are skipped:
+    validated models are unpickled and only turned into dialog objects.
+
+    """
+
+    cache_dir: Path | None = None
+    cache_key: str | None = None
+
+    @classmethod
+    def build(
+        cls,
+        yaml_file_name: str,
+        yaml_dir_path: str | None = None,
+        states: List[Type[StatesGroup]] | None = None,
+        models: Dict[str, Type[YAMLModel]] | None = None,
+        router: Router | None = None,
+        cache_dir: str | None = None,
+    ) -> "CachedDialogYAMLBuilder":
+        """Build dialogs and set up the router.
+
+        Parameters
+        ----------
+        yaml_file_name : str
+            Name of the root YAML file.
+        yaml_dir_path : str | None
+            Directory with dialog YAML files.
+        states : List[Type[StatesGroup]] | None
+            Custom states groups.
+        models : Dict[str, Type[YAMLModel]] | None
+            Custom models mapped to their YAML tags.
+        router : Router | None
+            The router dialogs are included into.
+        cache_dir : str | None
+            Directory for compiled models. Caching is disabled if not set.
+
+        Returns
+        -------
+        CachedDialogYAMLBuilder
+            The builder with a configured router.
+
+        """
+        router = router or Router()
+        dialog_builder = cls(yaml_file_name, yaml_dir_path)
+        dialog_builder.register_custom_models(models)
+        dialog_builder.register_custom_states(states)
+        if cache_dir:
+            dialog_builder.cache_dir = Path(cache_dir)
+            dialog_builder.cache_key = compute_cache_key(
+                dialog_builder.yaml_dir_path,
+                dialog_builder.funcs_registry,
+                models,
+                states,
+            )
+
+        dialogs = dialog_builder._build()
+        dialog_builder._dialogs = dialogs
+        router.include_routers(*dialogs)
+
+        middleware = DialogYAMLMiddleware(dialog_yml=dialog_builder)
+        router.message.middleware.register(middleware)
+        router.callback_query.middleware.register(middleware)
+        router.errors.middleware.register(middleware)
+        dialog_builder._router = router
+
+        setup_dialogs(router)
+        return dialog_builder
+
+    @property
+    def cache_path(self) -> Path | None:
+        """Return the cache file for the current build inputs."""
+        if self.cache_dir is None or self.cache_key is None:
+            return None
+        return self.cache_dir / f"{self.cache_key}.pickle"
+
+    def _build(self) -> List[Dialog]:
+        """Build dialogs, loading compiled models from cache if possible.
+
+        Returns
+        -------
+        List[Dialog]
+            The dialogs.
+
+        """
+        cached = self._load_cache()
+        if cached is None:
+            return super()._build()
+
+        self.states_manager.build_states_from_yaml_data(cached["states"])
+        dialog_models = pickle.loads(cached["models"])
+        logger.info("Dialogs loaded from cache.", path=str(self.cache_path))
+        return super()._build_dialogs(dialog_models)
+
+    def _build_dialogs(self, dialog_models: Dict[str, DialogModel]) -> List[Dialog]:
+        self._save_cache(dialog_models)
+        return super()._build_dialogs(dialog_models)
+
+    def _load_cache(self) -> Dict[str, Any] | None:
+        path = self.cache_path
+        if path is None or not path.exists():
+            return None
+        try:
+            with path.open("rb") as file:
+                return pickle.load(file)
+        except Exception as e:
+            logger.warning("Ignoring unreadable dialogs cache.", path=str(path), error=e)
+            return None
+
+    def _save_cache(self, dialog_models: Dict[str, DialogModel]) -> None:
+        path = self.cache_path
+        if path is None:
+            return
+
+        states: Dict[str, Dict] = {"dialogs": {}}
+        for group_name, dialog_model in dialog_models.items():
+            windows = {
+                window.state.split(":", 1)[1]: {}
+                for window in dialog_model.windows
+                if isinstance(window, WindowModel)
+            }
+            states["dialogs"][group_name] = {"windows": windows}
+
+        buffer = io.BytesIO()
+        _ModelsPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(dialog_models)
+        payload = {"states": states, "models": buffer.getvalue()}
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            for stale in path.parent.glob("*.pickle"):
+                stale.unlink(missing_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("wb") as file:
+                pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write dialogs cache.", path=str(path), error=e)
+            return
+        logger.info("Dialogs cache written.", path=str(path))
@@ -0,0 +1,268 @@
+"""Hot reload of YAML dialogs into a running router."""
+
+import asyncio
+import hashlib
+import json
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
+
+import structlog
+from aiogram import Router
+from aiogram.fsm.state import State, StatesGroup
+from aiogram_dialog import Dialog
+from aiogram_dialog.manager.manager_middleware import ManagerMiddleware
+from dialog_yml import DialogYAMLMiddleware
+from dialog_yml.models.dialog import DialogModel
+from dialog_yml.reader import YAMLReader
+
+from dialog_cache import YAML_SUFFIXES
+
+
+logger = structlog.get_logger(__name__)
+
+States = Dict[str, Union[State, StatesGroup]]
+
+# States built for a reload, visible only to the worker thread building it.
+_staged_states: ContextVar[States | None] = ContextVar("staged_states", default=None)
+
+
+class DialogReloadError(Exception):
+    """A changed dialog set cannot replace the running one."""
+
+
+def _digest(data: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class _StagedStatesMap(dict):
+    """States map of ``YAMLStatesManager`` preferring the states of a reload.
+
+    Dialog models look states up through the ``YAMLStatesManager``
+    singleton, so while a reload builds dialogs for new states its worker
+    thread sees them here, and everything else keeps seeing the published
+    ones.
+    """
+
+    def get(self, key, default=None):
+        staged = _staged_states.get()
+        if staged is not None and key in staged:
+            return staged[key]
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        staged = _staged_states.get()
+        if staged is not None and key in staged:
+            return staged[key]
+        return super().__getitem__(key)
+
+
+class DialogReloader:
+    """Watches dialog YAML files and swaps rebuilt dialogs into the router.
+
+    On a change the root YAML file is read again and only dialogs whose
+    data changed are rebuilt. New dialogs replace the old ones in a single
+    assignment of the router's sub-routers, so an update is handled by
+    either the old or the new set, and the dialog registry is refreshed
+    right after.
+
+    State names must stay stable for the stacks of current users to stay
+    valid. A change that removes a dialog or a window is rejected, and so
+    is anything YAML parsing, model validation or dialog construction
+    fails on. The running dialogs are kept then and the error is logged.
+    Changed windows of unchanged states keep their ``State`` objects.
+    Added windows or dialogs create states groups, and as other dialogs
+    reference states by object, every dialog is rebuilt then.
+
+    Checking, reading, validating and building run in a worker thread,
+    only the swap runs on the event loop. New states are built privately
+    and published in the same step as the swap.
+
+    Parameters
+    ----------
+    router : Router
+        The router ``DialogYAMLBuilder`` built the dialogs into.
+    interval : float
+        Seconds between checks of the YAML files.
+    on_dialog_built : Callable[[Dialog], None] | None
+        Hook called with every rebuilt dialog before it is swapped in.
+
+    """
+
+    def __init__(
+        self,
+        router: Router,
+        interval: float = 1.0,
+        on_dialog_built: Callable[[Dialog], None] | None = None,
+    ):
+        self.router = router
+        self.interval = interval
+        self.on_dialog_built = on_dialog_built
+        self.builder = _find_middleware(router, DialogYAMLMiddleware).dialog_yml
+        self.registry = _find_middleware(router, ManagerMiddleware).registry
+        self.states_manager = self.builder.states_manager
+        self.states_manager._states_groups_map_ = _StagedStatesMap(
+            self.states_manager._states_groups_map_
+        )
+        self.yaml_dir = Path(self.builder.yaml_dir_path)
+        self.reloads = 0
+        self.failures = 0
+        self._digests, self._windows = self._fingerprint(self._read())
+        self._stamp = self._files_stamp()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start watching the YAML files."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+            logger.info("Watching dialogs for changes.", path=str(self.yaml_dir))
+
+    async def stop(self) -> None:
+        """Stop watching."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            stamp = await asyncio.to_thread(self._files_stamp)
+            if stamp != self._stamp:
+                self._stamp = stamp
+                await self.reload()
+
+    def _files_stamp(self) -> Tuple[Tuple[str, int, int], ...]:
+        stamp = []
+        for path in sorted(self.yaml_dir.rglob("*")):
+            if path.suffix in YAML_SUFFIXES:
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                stamp.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    def _read(self) -> Dict[str, Any]:
+        data = YAMLReader.read_data_to_dict(
+            data_file_path=self.builder.yaml_file_name,
+            data_dir_path=self.builder.yaml_dir_path,
+        )
+        self.builder.check_yaml_data_base_structure(data)
+        return data
+
+    @staticmethod
+    def _fingerprint(
+        data: Dict[str, Any],
+    ) -> Tuple[Dict[str, str], Dict[str, Set[str]]]:
+        digests, windows = {}, {}
+        for group_name, dialog_data in data["dialogs"].items():
+            digests[group_name] = _digest(dialog_data)
+            windows[group_name] = set(dialog_data["windows"])
+        return digests, windows
+
+    async def reload(self) -> List[str]:
+        """Rebuild changed dialogs and swap them into the router.
+
+        Returns
+        -------
+        List[str]
+            Names of the dialogs swapped in, empty if nothing changed or
+            the change was rejected.
+
+        """
+        started = time.perf_counter()
+        try:
+            prepared = await asyncio.to_thread(self._prepare)
+            if prepared is None:
+                return []
+            dialogs, states, digests, windows = prepared
+            changed = list(dialogs)
+            self.states_manager._states_groups_map_.update(states)
+            self._swap(dialogs)
+        except Exception as e:
+            self.failures += 1
+            logger.error("Dialog reload failed, keeping running dialogs.", error=str(e))
+            return []
+
+        self._digests, self._windows = digests, windows
+        self.reloads += 1
+        logger.info(
+            "Dialogs reloaded.",
+            dialogs=changed,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+        return changed
+
+    def _prepare(
+        self,
+    ) -> Tuple[Dict[str, Dialog], States, Dict[str, str], Dict[str, Set[str]]] | None:
+        """Build the changed dialogs and their new states, ``None`` if nothing changed."""
+        data = self._read()
+        digests, windows = self._fingerprint(data)
+        changed = self._check(digests, windows)
+        if not changed:
+            return None
+        states: States = {}
+        if any(windows[name] != self._windows.get(name) for name in changed):
+            # Instantiating the class directly bypasses the singleton wrapper.
+            staged = type(self.states_manager)()
+            staged.build_states_from_yaml_data(data)
+            states = staged._states_groups_map_
+            changed = list(digests)
+        token = _staged_states.set(states)
+        try:
+            return self._build(data, changed), states, digests, windows
+        finally:
+            _staged_states.reset(token)
+
+    def _check(self, digests: Dict[str, str], windows: Dict[str, Set[str]]) -> List[str]:
+        """Return the changed dialogs, rejecting changes breaking user stacks."""
+        if removed := sorted(set(self._digests) - set(digests)):
+            raise DialogReloadError(f"Dialogs {removed} were removed.")
+        for name, old_windows in self._windows.items():
+            if missing := sorted(old_windows - windows[name]):
+                raise DialogReloadError(f"Windows {missing} of {name} were removed.")
+        return [
+            name for name, digest in digests.items() if self._digests.get(name) != digest
+        ]
+
+    def _build(self, data: Dict[str, Any], names: List[str]) -> Dict[str, Dialog]:
+        dialogs = {}
+        for group_name in names:
+            dialog_data = data["dialogs"][group_name]
+            dialog_data["windows"] = self.builder._build_windows(
+                group_name, dialog_data["windows"]
+            )
+            dialog = DialogModel.to_model(dialog_data).to_object()
+            if self.on_dialog_built is not None:
+                self.on_dialog_built(dialog)
+            dialogs[group_name] = dialog
+        return dialogs
+
+    def _swap(self, dialogs: Dict[str, Dialog]) -> None:
+        sub_routers = []
+        for sub_router in self.router.sub_routers:
+            if isinstance(sub_router, Dialog):
+                sub_router = dialogs.pop(sub_router.states_group_name(), sub_router)
+            sub_routers.append(sub_router)
+        sub_routers.extend(dialogs.values())
+        for sub_router in sub_routers:
+            # Set directly, the parent_router setter appends to sub_routers.
+            sub_router._parent_router = self.router
+        self.router.sub_routers = sub_routers
+        self.registry.refresh()
+        self.builder._dialogs = [r for r in sub_routers if isinstance(r, Dialog)]
+
+
+def _find_middleware(router: Router, middleware_type: type) -> Any:
+    for middleware in router.message.middleware:
+        if isinstance(middleware, middleware_type):
+            return middleware
+    raise RuntimeError("Dialogs are not set up on the router.")
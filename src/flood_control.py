@@ -0,0 +1,302 @@
+"""Flood-control-aware scheduling of outbound Bot API requests."""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+
+logger = structlog.get_logger(__name__)
+
+ANSWER, EDIT, SEND = 0, 1, 2
+SEND_PREFIXES = ("Send", "Copy", "Forward")
+
+
+def _priority(method: TelegramMethod) -> Optional[int]:
+    """Return the queue priority of a method, ``None`` if it is not limited."""
+    if isinstance(method, AnswerCallbackQuery):
+        return ANSWER
+    name = type(method).__name__
+    if name.startswith("EditMessage"):
+        return EDIT
+    if name.startswith(SEND_PREFIXES):
+        return SEND
+    return None
+
+
+@dataclass(frozen=True)
+class FloodControlSettings:
+    """Outbound request limits.
+
+    Defaults follow the limits published in the Bot API FAQ: about 30
+    messages per second overall, one message per second in a private chat
+    with short bursts allowed, and 20 messages per minute in a group.
+
+    Attributes
+    ----------
+    enabled : bool
+        Whether requests are scheduled at all.
+    global_rate : float
+        Requests per second over all chats.
+    chat_rate : float
+        Messages per second in a private chat.
+    chat_burst : int
+        Messages a private chat may receive at once after being idle.
+    group_rate : float
+        Messages per minute in a group or a channel.
+    max_retries : int
+        Times a request answered with ``retry_after`` is sent again.
+
+    """
+
+    enabled: bool = True
+    global_rate: float = 30.0
+    chat_rate: float = 1.0
+    chat_burst: int = 3
+    group_rate: float = 20.0
+    max_retries: int = 3
+
+    @classmethod
+    def from_env(cls) -> "FloodControlSettings":
+        """Read flood control settings from environment variables.
+
+        Returns
+        -------
+        FloodControlSettings
+            Settings populated from ``MEGA_BOT_FLOOD_*`` variables.
+
+        """
+        return cls(
+            enabled=os.getenv("MEGA_BOT_FLOOD_CONTROL", "true").lower() == "true",
+            global_rate=float(os.getenv("MEGA_BOT_FLOOD_GLOBAL_RATE", 30)),
+            chat_rate=float(os.getenv("MEGA_BOT_FLOOD_CHAT_RATE", 1)),
+            chat_burst=int(os.getenv("MEGA_BOT_FLOOD_CHAT_BURST", 3)),
+            group_rate=float(os.getenv("MEGA_BOT_FLOOD_GROUP_RATE", 20)),
+            max_retries=int(os.getenv("MEGA_BOT_FLOOD_MAX_RETRIES", 3)),
+        )
+
+
+class TokenBucket:
+    """Token bucket that can also be blocked for a while.
+
+    Parameters
+    ----------
+    rate : float
+        Tokens added per second.
+    capacity : float
+        Maximum number of tokens.
+
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Return seconds until a token is available."""
+        now = time.monotonic()
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self) -> None:
+        """Take a token, the balance may go negative."""
+        self.tokens -= 1
+
+    def reserve(self) -> float:
+        """Take a token and return seconds to wait before using it.
+
+        Reservations queue up behind each other, so concurrent callers are
+        spread out at the bucket rate in the order they arrived.
+        """
+        delay = self.delay()
+        self.take()
+        return delay
+
+    def block(self, seconds: float) -> None:
+        """Hand out no tokens for the given time."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    @property
+    def is_idle(self) -> bool:
+        """Return whether the bucket is full and not blocked."""
+        return self.delay() == 0 and self.tokens >= self.capacity
+
+
+class _Entry:
+    """Request waiting for its turn, shared by coalesced edits."""
+
+    def __init__(self, method: TelegramMethod, priority: int):
+        self.method = method
+        self.priority = priority
+        self.released: Optional[asyncio.Future] = None
+        self.shared: Optional[asyncio.Future] = None
+
+    def share(self) -> asyncio.Future:
+        if self.shared is None:
+            self.shared = asyncio.get_running_loop().create_future()
+        return self.shared
+
+    def finish(self, response: Any = None, error: Optional[BaseException] = None) -> None:
+        if self.shared is None or self.shared.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            self.shared.cancel()
+        elif error is not None:
+            self.shared.set_exception(error)
+        else:
+            self.shared.set_result(response)
+
+
+class FloodControlMiddleware(BaseRequestMiddleware):
+    """Bot session middleware pacing requests to stay within Telegram limits.
+
+    Messages wait for a token of their chat and then, like callback
+    answers, for a token of the global bucket. Requests waiting for a
+    global token are released by priority: callback answers first, then
+    edits, then new messages. An edit of a message that already has the
+    same edit waiting replaces it, and both callers get the response to
+    the latest one. ``retry_after`` blocks the chat, or all requests if
+    it came for a request without a chat, and the request is sent again
+    once the block is over. Other methods are not limited.
+
+    Parameters
+    ----------
+    settings : FloodControlSettings | None
+        Request limits, read from the environment if not given.
+
+    """
+
+    # Idle chat buckets are dropped once there are more of them.
+    max_chats = 10_000
+
+    def __init__(self, settings: Optional[FloodControlSettings] = None):
+        self.settings = settings or FloodControlSettings.from_env()
+        self.coalesced = 0
+        self.retried = 0
+        self._global = TokenBucket(self.settings.global_rate, self.settings.global_rate)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._prune_at = self.max_chats
+        self._edits: Dict[Tuple[Any, ...], _Entry] = {}
+        self._queue: List[Tuple[int, int, _Entry]] = []
+        self._counter = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self._prune_at:
+                self._chats = {k: b for k, b in self._chats.items() if not b.is_idle}
+                self._prune_at = max(self.max_chats, 2 * len(self._chats))
+            settings = self.settings
+            if isinstance(chat_id, int) and chat_id > 0:
+                bucket = TokenBucket(settings.chat_rate, settings.chat_burst)
+            else:
+                bucket = TokenBucket(settings.group_rate / 60, 1)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def _pump(self) -> None:
+        """Release queued requests one global token at a time."""
+        while self._queue:
+            if (delay := self._global.delay()) > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, entry = heapq.heappop(self._queue)
+            # The caller gave up waiting.
+            if entry.released.done():
+                continue
+            self._global.take()
+            entry.released.set_result(None)
+        self._pump_task = None
+
+    async def _wait_turn(self, entry: _Entry, chat_id: Any, edit_key: Any) -> None:
+        if edit_key is not None:
+            self._edits[edit_key] = entry
+        try:
+            if chat_id is not None and entry.priority != ANSWER:
+                if delay := self._chat_bucket(chat_id).reserve():
+                    await asyncio.sleep(delay)
+            entry.released = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (entry.priority, next(self._counter), entry))
+            if self._pump_task is None:
+                self._pump_task = asyncio.create_task(self._pump())
+            await entry.released
+        finally:
+            if edit_key is not None and self._edits.get(edit_key) is entry:
+                del self._edits[edit_key]
+
+    def _block(self, chat_id: Any, seconds: float) -> None:
+        if chat_id is None:
+            self._global.block(seconds)
+        else:
+            self._chat_bucket(chat_id).block(seconds)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        priority = _priority(method) if self.settings.enabled else None
+        if priority is None:
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        edit_key = None
+        if priority == EDIT:
+            edit_key = (
+                chat_id,
+                getattr(method, "message_id", None),
+                getattr(method, "inline_message_id", None),
+            )
+            pending = self._edits.get(edit_key)
+            if pending is not None and type(pending.method) is type(method):
+                pending.method = method
+                self.coalesced += 1
+                return await asyncio.shield(pending.share())
+
+        entry = _Entry(method, priority)
+        attempt = 0
+        try:
+            while True:
+                await self._wait_turn(entry, chat_id, edit_key)
+                try:
+                    response = await make_request(bot, entry.method)
+                except TelegramRetryAfter as e:
+                    self._block(chat_id, e.retry_after)
+                    if attempt >= self.settings.max_retries:
+                        raise
+                    attempt += 1
+                    self.retried += 1
+                    logger.warning(
+                        "Flood control, request delayed.",
+                        method=type(method).__name__,
+                        chat_id=chat_id,
+                        retry_after=e.retry_after,
+                    )
+                    continue
+                entry.finish(response)
+                return response
+        except BaseException as e:
+            entry.finish(error=e)
+            raise
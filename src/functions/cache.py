@@ -0,0 +1,234 @@
+"""Result caching for dialog getters."""
+
+import asyncio
+import functools
+import hashlib
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Sequence, Tuple
+from weakref import WeakKeyDictionary
+
+from redis.asyncio import Redis
+
+
+GETTER_STORE_KEY = "getter_cache_store"
+
+# Caches of getters wrapped by ``cached_getter``, keyed by the wrapper.
+_getter_caches: WeakKeyDictionary[Callable[..., Any], "GetterCache"] = WeakKeyDictionary()
+
+
+class GetterCache:
+    """Bounded LRU of getter results with a time to live.
+
+    Concurrent misses of the same key are deduplicated: the first caller
+    loads the value and the others await its result.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of cached results.
+    ttl : float
+        Seconds a result is served from the cache.
+
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached result for the key, loading it on a miss.
+
+        Parameters
+        ----------
+        key : Hashable
+            The cache key.
+        load : Callable[[], Awaitable[Any]]
+            Coroutine function producing the result.
+
+        Returns
+        -------
+        Any
+            The cached or freshly loaded result.
+
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        if (pending := self._loading.get(key)) is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters receive the error, nobody else has to retrieve it.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._put(key, value)
+            return value
+        finally:
+            del self._loading[key]
+
+    def _put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters."""
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+
+class RedisGetterStore:
+    """Getter results shared between replicas through Redis.
+
+    Results are pickled, so only trusted Redis instances should be used.
+    Put an instance into dispatcher workflow data under
+    ``GETTER_STORE_KEY`` to enable sharing for getters registered with
+    ``shared=True``.
+
+    Parameters
+    ----------
+    redis : Redis
+        The Redis client.
+    prefix : str
+        Prefix for Redis keys.
+
+    """
+
+    def __init__(self, redis: Redis, prefix: str = "spoetka_base:getter"):
+        self.redis = redis
+        self.prefix = prefix
+
+    def _key(self, name: str, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return f"{self.prefix}:{name}:{digest}"
+
+    async def get(self, name: str, key: Hashable) -> Any:
+        """Return a stored result or ``None``."""
+        raw = await self.redis.get(self._key(name, key))
+        return None if raw is None else pickle.loads(raw)
+
+    async def set(self, name: str, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a result for ``ttl`` seconds."""
+        await self.redis.set(
+            self._key(name, key),
+            pickle.dumps(value),
+            px=max(int(ttl * 1000), 1),
+        )
+
+
+def _resolve(data: Dict[str, Any], path: str) -> Any:
+    """Resolve a dotted path against getter keyword arguments."""
+    name, *attrs = path.split(".")
+    value = data.get(name)
+    for attr in attrs:
+        if value is None:
+            return None
+        value = value.get(attr) if isinstance(value, dict) else getattr(value, attr, None)
+    return value
+
+
+def cached_getter(
+    ttl: float = 60.0,
+    maxsize: int = 1024,
+    vary_on: Sequence[str] = (),
+    shared: bool = False,
+) -> Callable[[Callable], Callable]:
+    """Cache results of a getter according to a policy.
+
+    Used at registration, so YAML keeps referring to the getter by name::
+
+        registry.func.register(cached_getter(ttl=300)(product_getter))
+
+    Parameters
+    ----------
+    ttl : float
+        Seconds a result is served from the cache.
+    maxsize : int
+        Maximum number of cached results per getter.
+    vary_on : Sequence[str]
+        Dotted paths into the getter keyword arguments the result depends
+        on, e.g. ``"event_from_user.language_code"`` or
+        ``"dialog_manager.dialog_data.category"``.
+    shared : bool
+        Share results between replicas through the ``RedisGetterStore``
+        found in middleware data.
+
+    Returns
+    -------
+    Callable[[Callable], Callable]
+        Decorator wrapping the getter.
+
+    """
+
+    def decorator(getter: Callable) -> Callable:
+        cache = GetterCache(maxsize=maxsize, ttl=ttl)
+        name = getattr(getter, "__name__", repr(getter))
+
+        @functools.wraps(getter)
+        async def wrapper(*args, **kwargs):
+            key = tuple(_resolve(kwargs, path) for path in vary_on)
+
+            async def load():
+                store = kwargs.get(GETTER_STORE_KEY) if shared else None
+                if store is not None:
+                    value = await store.get(name, key)
+                    if value is not None:
+                        return value
+                value = await getter(*args, **kwargs)
+                if store is not None:
+                    await store.set(name, key, value, ttl)
+                return value
+
+            # Getter results are merged into window data, copy to keep
+            # the cached dictionary intact.
+            return dict(await cache.get_or_load(key, load))
+
+        _getter_caches[wrapper] = cache
+        return wrapper
+
+    return decorator
+
+
+def getter_cache(getter: Callable[..., Any]) -> GetterCache | None:
+    """Return the cache of a getter wrapped by ``cached_getter``.
+
+    Parameters
+    ----------
+    getter : Callable[..., Any]
+        The wrapped getter.
+
+    Returns
+    -------
+    GetterCache | None
+        The cache, ``None`` if the getter is not cached.
+
+    """
+    return _getter_caches.get(getter)
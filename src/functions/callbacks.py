@@ -1,12 +1,70 @@
 """Callback-related functions."""
 
+import asyncio
 import json
-from typing import Dict
+from typing import Dict, Set
 
+from aiogram import Bot
+from aiogram.methods import SendMessage
 from aiogram.types import CallbackQuery
 from aiogram_dialog import DialogManager
 from aiogram_dialog.widgets.kbd import Button
 
+from .timers import TIMERS_KEY
+
+
+# Delayed notifies sent without a timer scheduler, referenced until done.
+_pending: Set[asyncio.Task] = set()
+
+
+async def delayed_notify(
+    callback: CallbackQuery,
+    button: Button,
+    dialog_manager: DialogManager,
+    data: Dict,
+) -> None:
+    """Handle notify, sending its text as a message after ``delay`` seconds.
+
+    A callback answer can not be shown once the dialog answered the
+    callback, which it does right after the handler. Delayed notifies
+    therefore leave the answer to the dialog and send a message instead.
+    The message is handed to the timer scheduler, so the handler returns
+    at once. Without a scheduler it is sent from a background task.
+
+    Parameters
+    ----------
+    callback : CallbackQuery
+        The callback query from the user.
+    button : Button
+        The button that triggered the callback.
+    dialog_manager : DialogManager
+        The dialog manager instance.
+    data : Dict
+        Notify parameters from YAML.
+
+    """
+    delay = data.pop("delay", None)
+    data.pop("extra_data", None)
+    if not delay:
+        await callback.answer(**data)
+        return
+
+    chat_id = callback.message.chat.id if callback.message else callback.from_user.id
+    message = SendMessage(chat_id=chat_id, text=data["text"])
+    timers = dialog_manager.middleware_data.get(TIMERS_KEY)
+    if timers is not None:
+        await timers.schedule(message, delay)
+        return
+    bot = dialog_manager.middleware_data["bot"]
+    task = asyncio.create_task(_send_later(bot, message, delay))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+async def _send_later(bot: Bot, message: SendMessage, delay: float) -> None:
+    await asyncio.sleep(delay)
+    await bot(message)
+
 
 async def notify_extra(
     callback: CallbackQuery,
@@ -92,6 +150,7 @@ def register_notifies(registry):
         The registry to register functions with.
 
     """
+    registry.notify.register(delayed_notify)
     registry.notify.register(notify_extra)
     registry.func.register(on_click_simple)
     registry.func.register(on_click_with_data)
@@ -1,7 +1,14 @@
 """Custom functions and models for dialogs."""
 
 from .calendars import CustomCalendarModel
+from .paging import PagedScrollingGroupModel, PagedSource, SequenceSource
+from .scrolling_text import IndexedScrollingTextModel, PageIndex
 
 __all__ = [
     "CustomCalendarModel",
+    "IndexedScrollingTextModel",
+    "PageIndex",
+    "PagedScrollingGroupModel",
+    "PagedSource",
+    "SequenceSource",
 ]
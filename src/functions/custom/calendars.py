@@ -1,21 +1,45 @@
 """Custom calendar widgets and models."""
 
+from collections import OrderedDict
 from datetime import date
+from typing import Any, Hashable
 
+from aiogram.types import InlineKeyboardButton
 from aiogram_dialog import DialogManager
 from aiogram_dialog.widgets.kbd import Calendar, CalendarScope
 from aiogram_dialog.widgets.kbd.calendar_kbd import (
+    CalendarConfig,
     CalendarScopeView,
     CalendarDaysView,
     CalendarMonthView,
     CalendarYearsView,
+    get_today,
 )
 from aiogram_dialog.widgets.text import Text, Format
-from babel.dates import get_day_names, get_month_names
 
 from dialog_yml.models.widgets.calendars import CalendarModel
 from dialog_yml.utils import clean_empty
 
+from .locales import LocaleNames, get_locale_names
+
+
+def get_user_locale_names(manager: DialogManager) -> LocaleNames:
+    """Get calendar names for the locale of the current user.
+
+    Parameters
+    ----------
+    manager : DialogManager
+        The dialog manager instance.
+
+    Returns
+    -------
+    LocaleNames
+        The localized weekday and month names.
+
+    """
+    user = manager.event.from_user
+    return get_locale_names(user.language_code if user else None)
+
 
 class WeekDay(Text):
     """Renders weekday names."""
@@ -37,13 +61,7 @@ class WeekDay(Text):
 
         """
         selected_date: date = data["date"]
-        user = manager.event.from_user
-        locale = user.language_code if user and user.language_code else "en"
-        return get_day_names(
-            width="short",
-            context="stand-alone",
-            locale=locale,
-        )[selected_date.weekday()].title()
+        return get_user_locale_names(manager).weekday(selected_date.weekday())
 
 
 class Month(Text):
@@ -66,13 +84,7 @@ class Month(Text):
 
         """
         selected_date: date = data["date"]
-        user = manager.event.from_user
-        locale = user.language_code if user and user.language_code else "en"
-        return get_month_names(
-            "wide",
-            context="stand-alone",
-            locale=locale,
-        )[selected_date.month].title()
+        return get_user_locale_names(manager).month(selected_date.month)
 
 
 class Year(Text):
@@ -98,19 +110,146 @@ class Year(Text):
         return str(selected_date.year)
 
 
+class KeyboardCache:
+    """Bounded LRU cache of rendered calendar keyboards.
+
+    Attributes
+    ----------
+    maxsize : int
+        Maximum number of cached keyboards.
+    hits : int
+        Number of renders served from the cache.
+    misses : int
+        Number of renders that had to build the keyboard.
+
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._keyboards: OrderedDict[Hashable, list[list[InlineKeyboardButton]]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._keyboards)
+
+    def get(self, key: Hashable) -> list[list[InlineKeyboardButton]] | None:
+        """Return a copy of a cached keyboard or None on a miss.
+
+        Buttons are copied because aiogram-dialog patches callback data
+        of rendered buttons in place.
+
+        """
+        keyboard = self._keyboards.get(key)
+        if keyboard is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._keyboards.move_to_end(key)
+        return [[button.model_copy() for button in row] for row in keyboard]
+
+    def put(self, key: Hashable, keyboard: list[list[InlineKeyboardButton]]) -> None:
+        """Store a copy of a rendered keyboard."""
+        self._keyboards[key] = [
+            [button.model_copy() for button in row] for row in keyboard
+        ]
+        self._keyboards.move_to_end(key)
+        if len(self._keyboards) > self.maxsize:
+            self._keyboards.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """Return cache counters."""
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+
+calendar_keyboards = KeyboardCache()
+
+
+class CachedScopeView(CalendarScopeView):
+    """Calendar scope view reusing keyboards rendered for other users.
+
+    Custom calendar texts depend only on the displayed period, the locale
+    and today's date, so keyboards are shared by everyone looking at the
+    same month. The "today" mark is part of the key and changes daily.
+
+    Parameters
+    ----------
+    view : CalendarScopeView
+        The view rendering keyboards on a cache miss.
+    key : Hashable
+        Key prefix identifying the widget and scope.
+    cache : KeyboardCache
+        The cache of rendered keyboards.
+
+    """
+
+    def __init__(
+        self,
+        view: CalendarScopeView,
+        key: Hashable,
+        cache: KeyboardCache = calendar_keyboards,
+    ):
+        self.view = view
+        self.key = key
+        self.cache = cache
+
+    async def render(
+        self,
+        config: CalendarConfig,
+        offset: date,
+        data: dict[str, Any],
+        manager: DialogManager,
+    ) -> list[list[InlineKeyboardButton]]:
+        """Render the keyboard, reusing a cached one when possible.
+
+        Parameters
+        ----------
+        config : CalendarConfig
+            Calendar configuration for the current user.
+        offset : date
+            The displayed period.
+        data : dict[str, Any]
+            Data from the window getter.
+        manager : DialogManager
+            The dialog manager instance.
+
+        Returns
+        -------
+        list[list[InlineKeyboardButton]]
+            The rendered keyboard.
+
+        """
+        key = (
+            self.key,
+            offset,
+            config,
+            get_today(config.timezone),
+            get_user_locale_names(manager),
+        )
+        keyboard = self.cache.get(key)
+        if keyboard is None:
+            keyboard = await self.view.render(config, offset, data, manager)
+            self.cache.put(key, keyboard)
+        return keyboard
+
+
 class CustomCalendar(Calendar):
     """Custom calendar widget with localized text."""
 
     def _init_views(self) -> dict[CalendarScope, CalendarScopeView]:
         """Initialize calendar views with custom texts.
 
+        Views are wrapped to share rendered keyboards between users.
+
         Returns
         -------
         dict[CalendarScope, CalendarScopeView]
             A dictionary mapping calendar scopes to their respective views.
 
         """
-        return {
+        views = {
             CalendarScope.DAYS: CalendarDaysView(
                 self._item_callback_data,
                 header_text=Month(),
@@ -134,6 +273,10 @@ class CustomCalendar(Calendar):
                 this_year_text="[" + Year() + "]",
             ),
         }
+        return {
+            scope: CachedScopeView(view, key=(self.widget_id, scope))
+            for scope, view in views.items()
+        }
 
 
 class CustomCalendarModel(CalendarModel):
@@ -0,0 +1,74 @@
+"""Precomputed per-locale name tables for calendar widgets."""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from babel import UnknownLocaleError
+from babel.dates import get_day_names, get_month_names
+
+
+DEFAULT_LOCALE = "en"
+LOCALE_TABLES_SIZE = 64
+
+
+@dataclass(frozen=True)
+class LocaleNames:
+    """Localized calendar names for a single locale.
+
+    Attributes
+    ----------
+    weekdays : tuple[str, ...]
+        Short weekday names indexed by ``date.weekday()``.
+    months : tuple[str, ...]
+        Wide month names indexed by ``date.month - 1``.
+
+    """
+
+    weekdays: tuple[str, ...]
+    months: tuple[str, ...]
+
+    def weekday(self, weekday: int) -> str:
+        """Return the name of a weekday (Monday is 0)."""
+        return self.weekdays[weekday]
+
+    def month(self, month: int) -> str:
+        """Return the name of a month (January is 1)."""
+        return self.months[month - 1]
+
+
+def _load_locale_names(locale: str) -> LocaleNames:
+    day_names = get_day_names(width="short", context="stand-alone", locale=locale)
+    month_names = get_month_names("wide", context="stand-alone", locale=locale)
+    return LocaleNames(
+        weekdays=tuple(day_names[day].title() for day in range(7)),
+        months=tuple(month_names[month].title() for month in range(1, 13)),
+    )
+
+
+DEFAULT_LOCALE_NAMES = _load_locale_names(DEFAULT_LOCALE)
+
+
+@lru_cache(maxsize=LOCALE_TABLES_SIZE)
+def get_locale_names(language_code: str | None) -> LocaleNames:
+    """Return calendar names for a Telegram language code.
+
+    Tables are built once per language code and kept in a bounded LRU.
+    Unknown or missing codes share the default locale table.
+
+    Parameters
+    ----------
+    language_code : str | None
+        The user's language code, e.g. ``"ru"`` or ``"pt-br"``.
+
+    Returns
+    -------
+    LocaleNames
+        The localized weekday and month names.
+
+    """
+    if not language_code or language_code == DEFAULT_LOCALE:
+        return DEFAULT_LOCALE_NAMES
+    try:
+        return _load_locale_names(language_code.replace("-", "_"))
+    except (UnknownLocaleError, ValueError):
+        return DEFAULT_LOCALE_NAMES
@@ -0,0 +1,159 @@
+"""Lazily paged data sources for scrolling keyboards."""
+
+import asyncio
+import math
+from typing import Any, Protocol, Sequence, runtime_checkable
+
+from aiogram_dialog import DialogManager
+from aiogram_dialog.api.internal import RawKeyboard
+from aiogram_dialog.widgets.kbd import ScrollingGroup
+
+from dialog_yml.models.widgets.kbd.keyboard import ScrollingGroupKeyboardModel
+from dialog_yml.utils import clean_empty
+
+
+@runtime_checkable
+class PagedSource(Protocol):
+    """Items a getter returns in place of a list to be loaded page by page."""
+
+    async def count(self) -> int:
+        """Return the total number of items."""
+        ...
+
+    async def page(self, offset: int, limit: int) -> Sequence[Any]:
+        """Return at most ``limit`` items starting at ``offset``."""
+        ...
+
+
+class SequenceSource:
+    """Paged source over an in-memory sequence.
+
+    Parameters
+    ----------
+    items : Sequence[Any]
+        The items to page through.
+
+    """
+
+    def __init__(self, items: Sequence[Any]):
+        self.items = items
+
+    async def count(self) -> int:
+        """Return the total number of items."""
+        return len(self.items)
+
+    async def page(self, offset: int, limit: int) -> Sequence[Any]:
+        """Return at most ``limit`` items starting at ``offset``."""
+        return self.items[offset : offset + limit]
+
+
+class PagedScrollingGroup(ScrollingGroup):
+    """Scrolling group loading only the displayed page of paged sources.
+
+    Getter data values implementing ``PagedSource`` are replaced by the
+    items of the current page before inner widgets are rendered, so a
+    select over a large catalog builds ``height * width`` buttons instead
+    of one per item. Checked state of multi selects is stored by item id
+    and is kept across pages. Without paged sources in the data the group
+    behaves like ``ScrollingGroup``.
+
+    """
+
+    @property
+    def page_size(self) -> int:
+        """Return the number of items shown on a page."""
+        return self.height * (self.width or 1)
+
+    async def _count(self, data: dict) -> int | None:
+        sources = [value for value in data.values() if isinstance(value, PagedSource)]
+        if not sources:
+            return None
+        return max(await asyncio.gather(*(source.count() for source in sources)))
+
+    async def _page_data(self, data: dict, page: int) -> dict:
+        offset = page * self.page_size
+        keys = [key for key, value in data.items() if isinstance(value, PagedSource)]
+        pages = await asyncio.gather(
+            *(data[key].page(offset, self.page_size) for key in keys)
+        )
+        return {**data, **dict(zip(keys, pages))}
+
+    async def _render_keyboard(
+        self,
+        data: dict,
+        manager: DialogManager,
+    ) -> RawKeyboard:
+        """Render the current page and the pager.
+
+        Parameters
+        ----------
+        data : dict
+            Data from the window getter.
+        manager : DialogManager
+            The dialog manager instance.
+
+        Returns
+        -------
+        RawKeyboard
+            The rendered keyboard.
+
+        """
+        total = await self._count(data)
+        if total is None:
+            return await super()._render_keyboard(data, manager)
+
+        pages = math.ceil(total / self.page_size)
+        page = max(0, min(pages - 1, await self.get_page(manager)))
+        keyboard = await self._render_contents(await self._page_data(data, page), manager)
+        return keyboard + await self._render_pager(pages, manager)
+
+    async def get_page_count(self, data: dict, manager: DialogManager) -> int:
+        """Return the number of pages without loading any items.
+
+        Parameters
+        ----------
+        data : dict
+            Data from the window getter.
+        manager : DialogManager
+            The dialog manager instance.
+
+        Returns
+        -------
+        int
+            The number of pages.
+
+        """
+        total = await self._count(data)
+        if total is None:
+            return await super().get_page_count(data, manager)
+        return math.ceil(total / self.page_size)
+
+
+class PagedScrollingGroupModel(ScrollingGroupKeyboardModel):
+    """Model for the paged scrolling group widget."""
+
+    def to_object(self) -> PagedScrollingGroup:
+        """Create a PagedScrollingGroup object from the model.
+
+        Returns
+        -------
+        PagedScrollingGroup
+            An instance of the paged scrolling group.
+
+        """
+        kwargs = clean_empty(
+            {
+                "id": self.id,
+                "height": self.height,
+                "width": self.width,
+                "on_page_changed": self.on_page_changed.func
+                if self.on_page_changed
+                else None,
+                "hide_on_single_page": self.hide_on_single_page,
+                "hide_pager": self.hide_pager,
+                "when": self.when.func if self.when else None,
+            }
+        )
+        return PagedScrollingGroup(
+            *[button.to_object() for button in self.buttons], **kwargs
+        )
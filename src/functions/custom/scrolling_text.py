@@ -0,0 +1,340 @@
+"""Scrolling text with a precomputed page index."""
+
+import mmap
+import re
+from collections import OrderedDict
+from typing import List, Optional, Self, Sequence, Union
+
+from aiogram_dialog import DialogManager
+from aiogram_dialog.widgets.common import OnPageChangedVariants, WhenCondition
+from aiogram_dialog.widgets.text import Const, ScrollingText, Text
+
+from dialog_yml.models.base import WidgetModel
+from dialog_yml.models.funcs.func import FuncField
+from dialog_yml.models.widgets.texts.text import TextField
+from dialog_yml.utils import clean_empty
+
+Buffer = Union[str, bytes, mmap.mmap]
+
+TAG_RE = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>")
+# Longest HTML entity Telegram accepts, e.g. ``&#1114111;``.
+MAX_ENTITY_LENGTH = 10
+
+
+class PageIndex:
+    """Page boundaries of a text computed once.
+
+    Pages end at the last line break in their second half or else at the
+    last space, so words are never split unless a single word is longer
+    than a page. With ``html`` enabled pages never end inside a tag or an
+    HTML entity, and tags left open at a boundary are closed at the end of
+    the page and reopened at the start of the next one.
+
+    Parameters
+    ----------
+    text : str | bytes | mmap.mmap
+        The text to index. For bytes and memory maps the page size is
+        counted in bytes of UTF-8 and pages never split a character.
+    page_size : int
+        Maximum size of a page, ``0`` keeps the whole text on one page.
+    html : bool
+        Keep Telegram HTML markup balanced on every page.
+
+    """
+
+    def __init__(self, text: Buffer, page_size: int, html: bool = False):
+        self.text = text
+        self.page_size = page_size
+        self.html = html
+        self._binary = not isinstance(text, str)
+        self.offsets: List[int] = [0]
+        self._open_tags: List[Sequence[str]] = [()]
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _token(self, value: str) -> Union[str, bytes]:
+        return value.encode() if self._binary else value
+
+    @staticmethod
+    def _decode(chunk: Union[str, bytes]) -> str:
+        return chunk if isinstance(chunk, str) else chunk.decode()
+
+    def _find_break(self, start: int, limit: int) -> int:
+        text = self.text
+        newline = text.rfind(self._token("\n"), start + (limit - start) // 2, limit)
+        if newline != -1:
+            return newline + 1
+        space = text.rfind(self._token(" "), start + 1, limit)
+        if space != -1:
+            return space + 1
+        return limit
+
+    def _avoid_markup(self, start: int, end: int) -> int:
+        text = self.text
+        tag = text.rfind(self._token("<"), start, end)
+        if tag != -1 and text.find(self._token(">"), tag, end) == -1:
+            if tag > start:
+                return tag
+            # A tag longer than a page is kept whole.
+            closing = text.find(self._token(">"), tag)
+            return len(text) if closing == -1 else closing + 1
+        amp = text.rfind(self._token("&"), max(start, end - MAX_ENTITY_LENGTH), end)
+        if amp > start and text.find(self._token(";"), amp, end) == -1:
+            return amp
+        return end
+
+    def _avoid_split_char(self, start: int, end: int) -> int:
+        text = self.text
+        if isinstance(text, str):
+            return end
+        # Step back over UTF-8 continuation bytes.
+        while start + 1 < end < len(text) and text[end] & 0xC0 == 0x80:
+            end -= 1
+        return end
+
+    def _build(self) -> None:
+        total = len(self.text)
+        start = 0
+        stack: List[str] = []
+        while start < total:
+            if self.page_size <= 0 or total - start <= self.page_size:
+                end = total
+            else:
+                end = self._find_break(start, start + self.page_size)
+                if self.html:
+                    end = self._avoid_markup(start, end)
+                if self._binary:
+                    end = self._avoid_split_char(start, end)
+            if self.html:
+                for match in TAG_RE.finditer(self._decode(self.text[start:end])):
+                    if not match.group(1):
+                        stack.append(match.group(0))
+                    elif stack:
+                        stack.pop()
+            self.offsets.append(end)
+            self._open_tags.append(tuple(stack))
+            start = end
+
+    @staticmethod
+    def _closing(tags: Sequence[str]) -> str:
+        return "".join(f"</{TAG_RE.match(tag).group(2)}>" for tag in reversed(tags))
+
+    def page(self, number: int) -> str:
+        """Return the text of a page.
+
+        Parameters
+        ----------
+        number : int
+            Zero based page number.
+
+        Returns
+        -------
+        str
+            The page with markup balanced if ``html`` is enabled.
+
+        """
+        if not len(self):
+            return ""
+        text = self._decode(self.text[self.offsets[number] : self.offsets[number + 1]])
+        if not self.html:
+            return text
+        opened = self._open_tags[number]
+        closed = self._open_tags[number + 1]
+        return "".join(opened) + text + self._closing(closed)
+
+
+class MappedText:
+    """UTF-8 text file mapped into memory on first access.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmap: Optional[mmap.mmap] = None
+
+    def open(self) -> Buffer:
+        """Return the mapped file contents."""
+        if self._mmap is None:
+            with open(self.path, "rb") as file:
+                try:
+                    self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty files can not be mapped.
+                    return b""
+        return self._mmap
+
+    def close(self) -> None:
+        """Unmap the file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class IndexedScrollingText(ScrollingText):
+    """Scrolling text slicing pages by a precomputed index.
+
+    Static texts and files are indexed once on first access and the index
+    is shared by all users. Formatted texts depend on the window data, so
+    they are indexed on render and the indexes of the most recently
+    rendered texts are kept, so users seeing different texts do not
+    evict each other.
+
+    Parameters
+    ----------
+    text : Text | None
+        The text to scroll, ignored if ``path`` is given.
+    id : str
+        Widget id.
+    page_size : int
+        Maximum size of a page.
+    path : str | None
+        UTF-8 file to scroll, mapped into memory instead of being loaded.
+    html : bool
+        Keep Telegram HTML markup balanced on every page.
+    max_indexes : int
+        Number of indexes of formatted texts to keep.
+    when : WhenCondition
+        Condition to show the widget.
+    on_page_changed : OnPageChangedVariants
+        Page changed handler.
+
+    """
+
+    def __init__(
+        self,
+        text: Optional[Text],
+        id: str,
+        page_size: int = 0,
+        path: Optional[str] = None,
+        html: bool = False,
+        max_indexes: int = 64,
+        when: WhenCondition = None,
+        on_page_changed: OnPageChangedVariants = None,
+    ):
+        super().__init__(
+            text=text or Const(""),
+            id=id,
+            page_size=page_size,
+            when=when,
+            on_page_changed=on_page_changed,
+        )
+        self.html = html
+        self.source = MappedText(path) if path else None
+        self.max_indexes = max_indexes
+        self._index: Optional[PageIndex] = None
+        self._indexes: OrderedDict[str, PageIndex] = OrderedDict()
+
+    @property
+    def is_static(self) -> bool:
+        """Return whether the text does not depend on window data."""
+        return self.source is not None or isinstance(self.text, Const)
+
+    async def get_index(self, data: dict, manager: DialogManager) -> PageIndex:
+        """Return the page index of the text.
+
+        Parameters
+        ----------
+        data : dict
+            Data from the window getter.
+        manager : DialogManager
+            The dialog manager instance.
+
+        Returns
+        -------
+        PageIndex
+            The index of the text.
+
+        """
+        if self.is_static:
+            if self._index is None:
+                if self.source is not None:
+                    text = self.source.open()
+                else:
+                    text = await self._render_contents(data, manager)
+                self._index = PageIndex(text, self.page_size, self.html)
+            return self._index
+
+        text = await self._render_contents(data, manager)
+        index = self._indexes.get(text)
+        if index is None:
+            index = self._indexes[text] = PageIndex(text, self.page_size, self.html)
+            if len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(text)
+        return index
+
+    async def _render_text(self, data, manager: DialogManager) -> str:
+        index = await self.get_index(data, manager)
+        page = min(len(index) - 1, await self.get_page(manager))
+        return index.page(max(page, 0))
+
+    async def get_page_count(self, data: dict, manager: DialogManager) -> int:
+        """Return the number of pages of the text.
+
+        Parameters
+        ----------
+        data : dict
+            Data from the window getter.
+        manager : DialogManager
+            The dialog manager instance.
+
+        Returns
+        -------
+        int
+            The number of pages.
+
+        """
+        return len(await self.get_index(data, manager))
+
+
+class IndexedScrollingTextModel(WidgetModel):
+    """Model for the indexed scrolling text widget."""
+
+    id: str
+    text: Optional[TextField] = None
+    path: Optional[str] = None
+    page_size: int = 0
+    html: bool = False
+    on_page_changed: FuncField = None
+
+    def to_object(self) -> IndexedScrollingText:
+        """Create an IndexedScrollingText object from the model.
+
+        Returns
+        -------
+        IndexedScrollingText
+            An instance of the indexed scrolling text.
+
+        """
+        if self.text is None and self.path is None:
+            raise ValueError(f"Scrolling text {self.id!r} needs a text or a path.")
+        kwargs = clean_empty(
+            {
+                "id": self.id,
+                "page_size": self.page_size,
+                "path": self.path,
+                "html": self.html,
+                "on_page_changed": self.on_page_changed.func
+                if self.on_page_changed
+                else None,
+                "when": self.when.func if self.when else None,
+            }
+        )
+        return IndexedScrollingText(
+            text=self.text.to_object() if self.text else None, **kwargs
+        )
+
+    @classmethod
+    def to_model(cls, data: Union[dict, Self]) -> Self:
+        """Create the model from YAML data."""
+        if isinstance(data, cls):
+            return data
+        return cls(**data)
@@ -6,18 +6,43 @@ from aiogram_dialog import DialogManager
 
 from dialog_yml import FuncsRegistry
 
+from .cache import cached_getter
+
+
+class ProductSource:
+    """Product catalog loaded page by page.
+
+    Parameters
+    ----------
+    total : int
+        The number of products in the catalog.
+
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+
+    async def count(self) -> int:
+        """Return the number of products."""
+        return self.total
+
+    async def page(self, offset: int, limit: int) -> list:
+        """Return products of a single page."""
+        stop = min(offset + limit, self.total)
+        return [(f"Product {i}", i) for i in range(offset + 1, stop + 1)]
+
 
 async def product_getter(**_kwargs):
-    """Get a list of products.
+    """Get the product catalog.
 
     Returns
     -------
     dict
-        A dictionary containing a list of products.
+        A dictionary containing a paged source of products.
 
     """
     return {
-        "products": [(f"Product {i}", i) for i in range(1, 30)],
+        "products": ProductSource(total=29),
     }
 
 
@@ -58,5 +83,5 @@ def register_scrolls(registry: FuncsRegistry):
         The registry to register functions with.
 
     """
-    registry.func.register(product_getter)
+    registry.func.register(cached_getter(ttl=300, shared=True)(product_getter))
     registry.func.register(paging_getter)
@@ -8,6 +8,8 @@ from aiogram_dialog import DialogManager
 
 from dialog_yml import FuncsRegistry
 
+from .cache import cached_getter
+
 
 @dataclass
 class Fruit:
@@ -101,6 +103,6 @@ def register_selects(registry: FuncsRegistry):
         The registry to register functions with.
 
     """
-    registry.func.register(getter)
+    registry.func.register(cached_getter(ttl=300)(getter))
     registry.func.register(fruit_id_getter)
     registry.func.register(on_item_selected)
@@ -0,0 +1,187 @@
+"""Delayed Bot API calls run outside of update handlers."""
+
+import asyncio
+import heapq
+import itertools
+import json
+import time
+import uuid
+from typing import List, Optional, Set, Tuple
+
+import structlog
+import aiogram.methods
+from aiogram import Bot
+from aiogram.client.default import Default
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import TelegramMethod
+from redis.asyncio import Redis
+
+
+logger = structlog.get_logger(__name__)
+
+TIMERS_KEY = "timer_scheduler"
+
+
+def dump_method(method: TelegramMethod) -> str:
+    """Serialize a Bot API method to JSON.
+
+    Fields left to bot defaults are omitted and take the defaults of the
+    bot sending the restored method.
+    """
+    defaults = {name for name, value in method if isinstance(value, Default)}
+    return json.dumps(
+        {
+            "id": uuid.uuid4().hex,
+            "method": type(method).__name__,
+            "data": json.loads(
+                method.model_dump_json(exclude_none=True, exclude=defaults)
+            ),
+        }
+    )
+
+
+def load_method(raw: str) -> TelegramMethod:
+    """Restore a Bot API method serialized with ``dump_method``."""
+    payload = json.loads(raw)
+    return getattr(aiogram.methods, payload["method"]).model_validate(payload["data"])
+
+
+class RedisTimerQueue:
+    """Timers persisted in a Redis sorted set scored by their due time.
+
+    A timer is run by the process that removes it from the set, so a
+    timer restored by several processes after a restart runs once.
+
+    Parameters
+    ----------
+    redis : Redis
+        The Redis client.
+    key : str
+        Key of the sorted set.
+
+    """
+
+    def __init__(self, redis: Redis, key: str = "spoetka_base:timers"):
+        self.redis = redis
+        self.key = key
+
+    async def add(self, raw: str, due: float) -> None:
+        """Persist a timer."""
+        await self.redis.zadd(self.key, {raw: due})
+
+    async def load(self) -> List[Tuple[str, float]]:
+        """Return all persisted timers with their due times."""
+        entries = await self.redis.zrange(self.key, 0, -1, withscores=True)
+        return [
+            (raw.decode() if isinstance(raw, bytes) else raw, due) for raw, due in entries
+        ]
+
+    async def claim(self, raw: str) -> bool:
+        """Remove a timer and return whether this call removed it."""
+        return bool(await self.redis.zrem(self.key, raw))
+
+
+class TimerScheduler:
+    """Runs Bot API calls after a delay from a single loop task.
+
+    Handlers hand delayed notifies and messages over and return at once,
+    so neither the handler nor the event isolation lock of the user is
+    held while the delay runs out. Timers are kept in a heap ordered by
+    due time. With a ``queue`` they are also persisted and restored by
+    ``start``, so delays survive restarts.
+
+    Put an instance into dispatcher workflow data under ``TIMERS_KEY``
+    and register ``start`` and ``stop`` on dispatcher startup and
+    shutdown.
+
+    Parameters
+    ----------
+    bot : Bot
+        The bot sending the calls.
+    queue : RedisTimerQueue | None
+        Persistent storage of timers, timers live in memory if not set.
+
+    """
+
+    def __init__(self, bot: Bot, queue: Optional[RedisTimerQueue] = None):
+        self.bot = bot
+        self.queue = queue
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _push(self, raw: str, due: float) -> None:
+        if not self._heap or due < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (due, next(self._counter), raw))
+
+    async def schedule(self, method: TelegramMethod, delay: float) -> None:
+        """Call a Bot API method after ``delay`` seconds.
+
+        Parameters
+        ----------
+        method : TelegramMethod
+            The method to call.
+        delay : float
+            Seconds to wait.
+
+        """
+        raw = dump_method(method)
+        due = time.time() + delay
+        if self.queue is not None:
+            await self.queue.add(raw, due)
+        self._push(raw, due)
+
+    async def start(self) -> None:
+        """Restore persisted timers and start the loop task."""
+        if self.queue is not None:
+            for raw, due in await self.queue.load():
+                self._push(raw, due)
+            logger.info("Timers restored.", count=len(self._heap))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the loop task, persisted timers stay in the queue."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            wait = self._heap[0][0] - time.time()
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except TimeoutError:
+                    pass
+                continue
+            _, _, raw = heapq.heappop(self._heap)
+            # Calls run in their own tasks, so a slow one delays no other.
+            task = asyncio.create_task(self._fire(raw))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fire(self, raw: str) -> None:
+        try:
+            if self.queue is not None and not await self.queue.claim(raw):
+                return
+            method = load_method(raw)
+            await self.bot(method)
+        except TelegramAPIError as e:
+            logger.warning(
+                "Delayed call failed.", method=type(method).__name__, error=str(e)
+            )
+        except Exception:
+            logger.exception("Delayed call crashed.")
@@ -0,0 +1,316 @@
+"""In-process health and readiness endpoints."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import structlog
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+from aiohttp import web
+from redis.asyncio import Redis
+
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class HealthSettings:
+    """Health endpoint settings.
+
+    Attributes
+    ----------
+    host : str
+        Interface the health server binds to.
+    port : int
+        Port ``/healthz`` and ``/readyz`` are served on, ``0`` disables
+        them.
+    max_loop_lag : float
+        Event loop lag in seconds above which the bot is unhealthy.
+    max_update_age : float
+        Seconds without a processed update after which the bot is not
+        ready, ``0`` disables the check.
+    max_api_age : float
+        Seconds without a successful Bot API call after which the bot is
+        not ready, ``0`` only requires one call to have succeeded.
+    redis_timeout : float
+        Seconds to wait for the Redis ping.
+
+    """
+
+    host: str = "127.0.0.1"
+    port: int = 5006
+    max_loop_lag: float = 1.0
+    max_update_age: float = 0.0
+    max_api_age: float = 0.0
+    redis_timeout: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> "HealthSettings":
+        """Read health settings from environment variables.
+
+        Returns
+        -------
+        HealthSettings
+            Settings populated from ``MEGA_BOT_HEALTH_*`` variables.
+
+        """
+        return cls(
+            host=os.getenv("MEGA_BOT_HEALTH_HOST", "127.0.0.1"),
+            port=int(os.getenv("MEGA_BOT_HEALTH_PORT", 5006)),
+            max_loop_lag=float(os.getenv("MEGA_BOT_HEALTH_MAX_LOOP_LAG", 1)),
+            max_update_age=float(os.getenv("MEGA_BOT_HEALTH_MAX_UPDATE_AGE", 0)),
+            max_api_age=float(os.getenv("MEGA_BOT_HEALTH_MAX_API_AGE", 0)),
+            redis_timeout=float(os.getenv("MEGA_BOT_HEALTH_REDIS_TIMEOUT", 1)),
+        )
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping task.
+
+    The lag of the last sample is reported by ``/healthz``. With
+    ``block_threshold`` set, every sample lagging at least that long is
+    also logged as a block of the loop. With ``capture_stacks`` a daemon
+    thread notices a late wake-up while the loop is still blocked and
+    samples the stack of the loop thread, which is logged with the block.
+
+    Parameters
+    ----------
+    interval : float
+        Seconds between samples, lowered to a quarter of
+        ``block_threshold`` so shorter blocks are not missed.
+    block_threshold : float
+        Seconds of lag logged as a block, ``0`` disables logging.
+    capture_stacks : bool
+        Whether to sample the stack of the blocking code.
+
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        block_threshold: float = 0.0,
+        capture_stacks: bool = False,
+    ):
+        self.interval = min(interval, block_threshold / 4) if block_threshold else interval
+        self.block_threshold = block_threshold
+        self.capture_stacks = capture_stacks
+        self.lag = 0.0
+        self.blocks = 0
+        self._task: Optional[asyncio.Task] = None
+        self._sleep_started = 0.0
+        self._stack: Optional[str] = None
+        self._loop_thread_id = 0
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start sampling in a background task."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._sleep_started = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        if self.block_threshold and self.capture_stacks:
+            self._stopped.clear()
+            threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stopped.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._sleep_started = started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag = max(time.monotonic() - started - self.interval, 0.0)
+            stack, self._stack = self._stack, None
+            if self.block_threshold and self.lag >= self.block_threshold:
+                self.blocks += 1
+                logger.warning(
+                    "Event loop blocked.", seconds=round(self.lag, 3), stack=stack
+                )
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            lag = time.monotonic() - self._sleep_started - self.interval
+            if self._stack is None and lag >= self.block_threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._stack = "".join(traceback.format_stack(frame))
+
+
+def _age(timestamp: Optional[float]) -> Optional[float]:
+    return None if timestamp is None else round(time.monotonic() - timestamp, 3)
+
+
+class HealthMonitor:
+    """Tracks the signals health and readiness are derived from.
+
+    Register ``update_middleware`` as an outer update middleware of the
+    dispatcher and ``api_middleware`` on the bot session.
+
+    Parameters
+    ----------
+    redis : Redis | None
+        The Redis client to ping, Redis is not checked if not set.
+    settings : HealthSettings | None
+        Health settings, read from the environment if not given.
+    loop : LoopLagMonitor | None
+        The loop lag monitor, e.g. one also logging blocks of the loop.
+
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        settings: Optional[HealthSettings] = None,
+        loop: Optional[LoopLagMonitor] = None,
+    ):
+        self.redis = redis
+        self.settings = settings or HealthSettings.from_env()
+        self.loop = loop or LoopLagMonitor()
+        self.last_update: Optional[float] = None
+        self.last_api_success: Optional[float] = None
+        self.update_middleware = _UpdateTracker(self)
+        self.api_middleware = _ApiTracker(self)
+
+    async def _ping_redis(self) -> bool:
+        try:
+            return bool(
+                await asyncio.wait_for(self.redis.ping(), self.settings.redis_timeout)
+            )
+        except Exception:
+            return False
+
+    def health(self) -> Dict[str, Any]:
+        """Return the liveness report."""
+        lag = round(self.loop.lag, 3)
+        return {"ok": lag <= self.settings.max_loop_lag, "loop_lag": lag}
+
+    async def readiness(self) -> Dict[str, Any]:
+        """Return the readiness report."""
+        settings = self.settings
+        report = self.health()
+        report["last_update_age"] = update_age = _age(self.last_update)
+        report["last_api_success_age"] = api_age = _age(self.last_api_success)
+        checks = [report["ok"], api_age is not None]
+        if settings.max_api_age and api_age is not None:
+            checks.append(api_age <= settings.max_api_age)
+        if settings.max_update_age:
+            checks.append(update_age is not None and update_age <= settings.max_update_age)
+        if self.redis is not None:
+            report["redis"] = await self._ping_redis()
+            checks.append(report["redis"])
+        report["ok"] = all(checks)
+        return report
+
+
+class _UpdateTracker(BaseMiddleware):
+    """Outer update middleware recording when an update was processed."""
+
+    def __init__(self, monitor: HealthMonitor):
+        self.monitor = monitor
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        finally:
+            self.monitor.last_update = time.monotonic()
+
+
+class _ApiTracker(BaseRequestMiddleware):
+    """Bot session middleware recording successful Bot API calls."""
+
+    def __init__(self, monitor: HealthMonitor):
+        self.monitor = monitor
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        response = await make_request(bot, method)
+        self.monitor.last_api_success = time.monotonic()
+        return response
+
+
+def add_health_routes(app: web.Application, monitor: HealthMonitor) -> None:
+    """Serve ``/healthz`` and ``/readyz`` on an aiohttp application.
+
+    Both answer with a JSON report, with status 200 if the check passed
+    and 503 otherwise.
+
+    Parameters
+    ----------
+    app : web.Application
+        The application to add the routes to.
+    monitor : HealthMonitor
+        The health monitor.
+
+    """
+
+    async def healthz(request: web.Request) -> web.Response:
+        report = monitor.health()
+        return web.json_response(report, status=200 if report["ok"] else 503)
+
+    async def readyz(request: web.Request) -> web.Response:
+        report = await monitor.readiness()
+        return web.json_response(report, status=200 if report["ok"] else 503)
+
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
+
+
+async def start_health_server(
+    monitor: HealthMonitor, port: Optional[int] = None
+) -> web.AppRunner:
+    """Start the health server and the loop lag monitor.
+
+    Parameters
+    ----------
+    monitor : HealthMonitor
+        The health monitor.
+    port : int | None
+        Port to listen on instead of the configured one.
+
+    Returns
+    -------
+    web.AppRunner
+        The runner to clean up on shutdown, which also stops the monitor.
+
+    """
+    settings = monitor.settings
+    app = web.Application()
+    add_health_routes(app, monitor)
+
+    async def stop_monitor(_: web.Application) -> None:
+        monitor.loop.stop()
+
+    app.on_cleanup.append(stop_monitor)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    port = port or settings.port
+    await web.TCPSite(runner, host=settings.host, port=port).start()
+    monitor.loop.start()
+    logger.info("Health server started.", host=settings.host, port=port)
+    return runner
@@ -0,0 +1,214 @@
+"""Dialogs whose windows and widgets are built on first use."""
+
+import asyncio
+import copy
+import pickle
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+import structlog
+from aiogram import Router
+from aiogram.fsm.state import StatesGroup
+from aiogram_dialog import Dialog
+from dialog_yml.exceptions import DialogYamlException
+from dialog_yml.models.dialog import DialogModel
+from dialog_yml.reader import YAMLReader
+
+from dialog_cache import CachedDialogYAMLBuilder
+
+
+logger = structlog.get_logger(__name__)
+
+# Attributes of Dialog that are only set once its windows are built.
+_LAZY_ATTRIBUTES = frozenset(
+    ("windows", "on_start", "on_close", "on_process_result", "_launch_mode", "getter")
+)
+
+
+class LazyDialog(Dialog):
+    """Dialog registered with its states that builds its windows when used.
+
+    States, the intent filter and handlers are set up at once, so the
+    dialog registry, stacks stored in Redis and ``Start`` buttons of other
+    dialogs work without building it. Its windows, widgets and callbacks
+    are built the first time any of them is needed, usually when a user
+    enters the dialog.
+
+    Parameters
+    ----------
+    states_group : Type[StatesGroup]
+        The states group of the dialog, one state per window.
+    factory : Callable[[], Dialog]
+        Builds the dialog.
+
+    """
+
+    def __init__(self, states_group: Type[StatesGroup], factory: Callable[[], Dialog]):
+        Router.__init__(self, name=states_group.__name__)
+        self._states_group = states_group
+        self._states = list(states_group.__states__)
+        self._factory: Optional[Callable[[], Dialog]] = factory
+        self._setup_filter()
+        self._register_handlers()
+
+    @property
+    def is_built(self) -> bool:
+        """Whether the windows of the dialog are built."""
+        return self._factory is None
+
+    def build(self) -> None:
+        """Build the windows of the dialog if they are not built yet."""
+        if self._factory is None:
+            return
+        started = time.perf_counter()
+        dialog = self._factory()
+        if dialog.states_group() is not self._states_group:
+            raise DialogYamlException(
+                f"Dialog {self.states_group_name()} was built with another states group."
+            )
+        for name in _LAZY_ATTRIBUTES:
+            self.__dict__[name] = getattr(dialog, name)
+        self._factory = None
+        logger.info(
+            "Dialog built.",
+            dialog=self.states_group_name(),
+            seconds=round(time.perf_counter() - started, 3),
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name in _LAZY_ATTRIBUTES and self.__dict__.get("_factory") is not None:
+            self.build()
+            return self.__dict__[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+
+class LazyDialogYAMLBuilder(CachedDialogYAMLBuilder):
+    """Dialog builder creating ``LazyDialog`` objects.
+
+    YAML files are read and states are created up front, model validation
+    and widget construction are left to the first use of each dialog.
+    Validation errors therefore surface on first use, warming up all
+    dialogs with ``"*"`` reports them in the background instead. Models
+    from a warm dialogs cache are validated already and only turned into
+    dialogs lazily. On a cold start the cache is written once every dialog
+    was built, e.g. by warming up all of them.
+
+    """
+
+    # Models of the dialogs built so far while the cache is still to be written.
+    _built_models: Dict[str, DialogModel | None] | None = None
+
+    def _build(self) -> List[Dialog]:
+        """Create lazy dialogs for all dialogs of the root YAML file.
+
+        Returns
+        -------
+        List[Dialog]
+            The dialogs, none of them built.
+
+        """
+        cached = self._load_cache()
+        if cached is not None:
+            self.states_manager.build_states_from_yaml_data(cached["states"])
+            dialog_models = pickle.loads(cached["models"])
+            factories = {name: model.to_object for name, model in dialog_models.items()}
+            logger.info("Dialogs loaded from cache.", path=str(self.cache_path))
+        else:
+            data = YAMLReader.read_data_to_dict(
+                data_file_path=self.yaml_file_name, data_dir_path=self.yaml_dir_path
+            )
+            if not data:
+                path = str(Path(self.yaml_dir_path) / self.yaml_file_name)
+                raise DialogYamlException(f"YAML data file {path!r} not provided!")
+            self.check_yaml_data_base_structure(data)
+            self.states_manager.build_states_from_yaml_data(data)
+            if self.cache_path is not None:
+                self._built_models = dict.fromkeys(data["dialogs"])
+            factories = {
+                name: partial(self._build_dialog, name, dialog_data)
+                for name, dialog_data in data["dialogs"].items()
+            }
+
+        return [
+            LazyDialog(type(self.states_manager.get_by_name(name)), factory)
+            for name, factory in factories.items()
+        ]
+
+    def _build_dialog(self, group_name: str, dialog_data: Dict[str, Any]) -> Dialog:
+        # Building replaces window data with models, keep the original for retries.
+        dialog_data = copy.deepcopy(dialog_data)
+        dialog_data["windows"] = self._build_windows(group_name, dialog_data["windows"])
+        model = DialogModel.to_model(dialog_data)
+        dialog = model.to_object()
+        if self._built_models is not None:
+            self._built_models[group_name] = model
+            models = {k: v for k, v in self._built_models.items() if v is not None}
+            if len(models) == len(self._built_models):
+                self._save_cache(models)
+                self._built_models = None
+        return dialog
+
+
+class DialogWarmUp:
+    """Builds lazy dialogs of a router in the background.
+
+    One dialog is built per event loop iteration, so updates keep being
+    served in between.
+
+    Parameters
+    ----------
+    router : Router
+        The router lazy dialogs were included into.
+    names : Iterable[str]
+        Names of the dialogs to build, e.g. the most used ones, ``"*"``
+        builds all of them.
+
+    """
+
+    def __init__(self, router: Router, names: Iterable[str]):
+        self.router = router
+        self.names = [name.strip() for name in names if name.strip()]
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start building in a background task."""
+        if self._task is None and self.names:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop building."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        # bot.py imports this module as ``lazy_dialogs``, so lazy dialogs of
+        # the router may not be instances of this module's ``LazyDialog``.
+        dialogs = {
+            dialog.states_group_name(): dialog
+            for dialog in self.router.sub_routers
+            if isinstance(dialog, Dialog) and hasattr(dialog, "is_built")
+        }
+        names = list(dialogs) if "*" in self.names else self.names
+        started = time.perf_counter()
+        for name in names:
+            await asyncio.sleep(0)
+            dialog = dialogs.get(name)
+            if dialog is None:
+                logger.warning("Unknown dialog to warm up.", dialog=name)
+                continue
+            try:
+                dialog.build()
+            except Exception as e:
+                logger.error("Dialog failed to build.", dialog=name, error=str(e))
+        logger.info(
+            "Dialogs warmed up.",
+            dialogs=len(names),
+            seconds=round(time.perf_counter() - started, 3),
+        )
@@ -1,15 +1,193 @@
 """Logging configuration for the application."""
 
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+import sys
+from dataclasses import dataclass, field, replace
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Callable, Dict, List, Optional
 
 import structlog
 from structlog.dev import ConsoleRenderer
+from structlog.typing import EventDict, WrappedLogger
 
 
-def setup_logger():
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+_listener: Optional[QueueListener] = None
+
+
+def _parse_sampling(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(";"))):
+        event, _, rate = item.rpartition("=")
+        rates[event.strip()] = float(rate)
+    return rates
+
+
+@dataclass(frozen=True)
+class LogSettings:
+    """Logging settings.
+
+    Attributes
+    ----------
+    level : str
+        Minimum level of emitted records.
+    format : str
+        ``"console"`` for colored human readable output or ``"json"`` for
+        one JSON object per line.
+    file : str | None
+        Path of a rotating log file written as JSON, disabled if not set.
+    file_max_bytes : int
+        Size of the log file that triggers rotation.
+    file_backups : int
+        Number of rotated log files kept.
+    sampling : dict[str, float]
+        Share of records kept for high-volume events, by event name.
+
+    """
+
+    level: str = "INFO"
+    format: str = "console"
+    file: Optional[str] = None
+    file_max_bytes: int = 10 * 1024 * 1024
+    file_backups: int = 5
+    sampling: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls) -> "LogSettings":
+        """Read logging settings from environment variables.
+
+        ``MEGA_BOT_LOG_SAMPLING`` lists ``event=rate`` pairs separated by
+        ``;``, e.g. ``User started conversation.=0.1``.
+
+        Returns
+        -------
+        LogSettings
+            Settings populated from ``MEGA_BOT_LOG_*`` variables.
+
+        """
+        return cls(
+            level=os.getenv("MEGA_BOT_LOG_LEVEL") or "INFO",
+            format=os.getenv("MEGA_BOT_LOG_FORMAT") or "console",
+            file=os.getenv("MEGA_BOT_LOG_FILE") or None,
+            file_max_bytes=int(os.getenv("MEGA_BOT_LOG_FILE_MAX_BYTES", 10 * 1024 * 1024)),
+            file_backups=int(os.getenv("MEGA_BOT_LOG_FILE_BACKUPS", 5)),
+            sampling=_parse_sampling(os.getenv("MEGA_BOT_LOG_SAMPLING", "")),
+        )
+
+    def for_worker(self, worker_id: int) -> "LogSettings":
+        """Return the settings of a supervisor worker process.
+
+        Rotation is not safe with several processes writing one file, so
+        every worker writes its own file, ``logs/bot.log`` becomes
+        ``logs/bot.worker-1.log`` for the second worker.
+
+        Parameters
+        ----------
+        worker_id : int
+            Index of the worker slot.
+
+        Returns
+        -------
+        LogSettings
+            The settings with the log file suffixed by the worker id.
+
+        """
+        if not self.file:
+            return self
+        root, ext = os.path.splitext(self.file)
+        return replace(self, file=f"{root}.worker-{worker_id}{ext}")
+
+
+class EventSampler:
+    """Processor dropping a share of records of high-volume events.
+
+    Parameters
+    ----------
+    rates : dict[str, float]
+        Share of records kept, by event name. Other events are kept.
+
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = rates
+
+    def __call__(
+        self, _logger: WrappedLogger, _name: str, event_dict: EventDict
+    ) -> EventDict:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is not None and random.random() >= rate:
+            raise structlog.DropEvent
+        return event_dict
+
+
+def _capture_exc_info(
+    _logger: WrappedLogger, _name: str, event_dict: EventDict
+) -> EventDict:
+    """Resolve ``exc_info=True`` while the exception is still being handled."""
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Queue handler passing records to the listener as they are.
+
+    ``QueueHandler`` formats records before enqueueing them, which would
+    render on the calling thread. The listener lives in this process, so
+    records, structlog event dicts and tracebacks included, are safe to
+    hand over unformatted.
+
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _orjson_dumps(value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Serialize a record with orjson, falling back to the standard library."""
+    try:
+        return orjson.dumps(
+            value, default=default, option=orjson.OPT_NON_STR_KEYS
+        ).decode()
+    except orjson.JSONEncodeError:
+        return json.dumps(value, default=default)
+
+
+def _json_formatter(pre_chain: List[Any]) -> logging.Formatter:
+    return structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=pre_chain,
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(
+                serializer=_orjson_dumps if orjson is not None else json.dumps,
+                default=str,
+            ),
+        ],
+    )
+
+
+def setup_logger(settings: Optional[LogSettings] = None):
     """Configure the logger.
 
-    Sets up structlog and standard logging with console handler only.
+    Records are rendered and written by a listener thread, so logging
+    never formats or blocks on I/O in the event loop. Calling it again
+    replaces the previous configuration.
+
+    Parameters
+    ----------
+    settings : LogSettings | None
+        Logging settings, read from the environment if not given.
 
     Returns
     -------
@@ -17,40 +195,85 @@ def setup_logger():
         The configured structlog logger instance.
 
     """
+    global _listener
+    settings = settings or LogSettings.from_env()
+    level = logging.getLevelNamesMapping()[settings.level.upper()]
+    json_output = settings.format == "json"
+    # Records in files need full dates even next to console output.
+    iso_time = json_output or settings.file is not None
+
     shared_processors = [
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_log_level,
         structlog.stdlib.add_logger_name,
-        structlog.processors.TimeStamper(fmt="%H:%M:%S"),
+        structlog.processors.TimeStamper(
+            fmt="iso" if iso_time else "%H:%M:%S", utc=iso_time
+        ),
+        _capture_exc_info,
     ]
+    # Sampled records are dropped before any other processing.
+    sampling = [EventSampler(settings.sampling)] if settings.sampling else []
 
     structlog.configure(
-        processors=shared_processors
+        processors=sampling
+        + shared_processors
         + [
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
         logger_factory=structlog.stdlib.LoggerFactory(),
+        # Records below the level are dropped before any processing.
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         cache_logger_on_first_use=True,
     )
 
-    console_formatter = structlog.stdlib.ProcessorFormatter(
-        foreign_pre_chain=shared_processors,
-        processor=ConsoleRenderer(
-            colors=True,
-            force_colors=True,
-            pad_event_to=30,
-            event_key="event",
-            sort_keys=False,
-        ),
-    )
+    if json_output:
+        console_formatter = _json_formatter(shared_processors)
+    else:
+        console_formatter = structlog.stdlib.ProcessorFormatter(
+            foreign_pre_chain=shared_processors,
+            processor=ConsoleRenderer(
+                colors=True,
+                force_colors=True,
+                pad_event_to=30,
+                event_key="event",
+                sort_keys=False,
+            ),
+        )
 
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(console_formatter)
+    handlers: List[logging.Handler] = [console_handler]
+
+    if settings.file:
+        os.makedirs(os.path.dirname(settings.file) or ".", exist_ok=True)
+        file_handler = RotatingFileHandler(
+            settings.file,
+            maxBytes=settings.file_max_bytes,
+            backupCount=settings.file_backups,
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(_json_formatter(shared_processors))
+        handlers.append(file_handler)
+
+    if _listener is not None:
+        _listener.stop()
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
 
     root_logger = logging.getLogger()
     root_logger.handlers.clear()
-    root_logger.addHandler(console_handler)
-    root_logger.setLevel(logging.INFO)
-    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+    root_logger.addHandler(_RecordQueueHandler(records))
+    root_logger.setLevel(level)
+    logging.getLogger("aiogram.event").setLevel(max(level, logging.WARNING))
 
     return structlog.get_logger()
+
+
+def _stop_listener() -> None:
+    """Flush queued records on interpreter exit."""
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop_listener)
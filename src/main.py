@@ -1,25 +1,74 @@
 """Application entry point and initialization."""
 
-import asyncio
 import os
 
 import structlog
 from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.base import DefaultKeyBuilder
-from aiogram.fsm.storage.redis import RedisStorage, RedisEventIsolation
-from redis.asyncio import Redis
 
+from src.api import BotApiSettings, create_bot_session
 from src.bot import get_dialog_router
-from src.logs import setup_logger
+from src.dialog_reload import DialogReloader
+from src.flood_control import FloodControlMiddleware
+from src.functions.cache import GETTER_STORE_KEY, RedisGetterStore
+from src.functions.timers import TIMERS_KEY, RedisTimerQueue, TimerScheduler
+from src.health import HealthMonitor, LoopLagMonitor, start_health_server
+from src.lazy_dialogs import DialogWarmUp
+from src.logs import LogSettings, setup_logger
+from src.metrics import (
+    HandlerMetricsMiddleware,
+    MetricsSettings,
+    SlowUpdateMiddleware,
+    SlowUpdateSettings,
+    TelegramMetricsMiddleware,
+    UpdateMetricsMiddleware,
+    instrument_dialog,
+    instrument_dialogs,
+    instrument_funcs_registry,
+    redis_collector,
+    registry,
+    start_metrics_server,
+)
+from src.media import RedisMediaIdStorage, install_media_id_storage
+from src.runtime import RuntimeSettings, run
+from src.storage import (
+    CodecRedisStorage,
+    ExpirySettings,
+    RedisMetrics,
+    RedisMetricsMiddleware,
+    RedisSettings,
+    StateSweeper,
+    TieredStorage,
+    create_event_isolation,
+    create_redis,
+    get_state_codec,
+)
+from src.supervisor import Supervisor, SupervisorSettings, Worker
+from src.webhook import WebhookSettings, run_webhook
 
 logger = structlog.get_logger(__name__)
 
 
-async def on_startup(bot: Bot):
+async def on_startup(
+    bot: Bot,
+    dispatcher: Dispatcher,
+    webhook_settings: WebhookSettings | None = None,
+    configure_webhook: bool = True,
+):
     """Handle bot startup."""
     logger.info("Executing startup tasks...")
-    await bot.get_updates(offset=-1)  # Drop pending updates
+    if webhook_settings is None:
+        await bot.delete_webhook(drop_pending_updates=True)
+    elif configure_webhook:
+        await bot.set_webhook(
+            url=webhook_settings.url.rstrip("/") + webhook_settings.path,
+            secret_token=webhook_settings.secret_token,
+            max_connections=min(webhook_settings.max_in_flight, 100),
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            drop_pending_updates=True,
+        )
+        logger.info("Webhook set.", url=webhook_settings.url)
     logger.info("Bot startup complete.")
 
 
@@ -30,24 +79,54 @@ async def on_shutdown(dispatcher: Dispatcher):
     logger.info("Bot shutdown complete.")
 
 
-async def main() -> None:
-    """Initialize and start the bot."""
+async def main(worker: Worker | None = None) -> None:
+    """Initialize and start the bot.
+
+    Parameters
+    ----------
+    worker : Worker | None
+        The supervisor handle when running as a worker process.
+
+    """
     load_dotenv()
-    setup_logger()
+    log_settings = LogSettings.from_env()
+    if worker is not None:
+        log_settings = log_settings.for_worker(worker.worker_id)
+    setup_logger(log_settings)
+    if worker is not None:
+        structlog.contextvars.bind_contextvars(worker_id=worker.worker_id)
 
-    bot = Bot(token=os.getenv("MEGA_BOT_TOKEN", ""))
+    bot = Bot(
+        token=os.getenv("MEGA_BOT_TOKEN", ""),
+        session=create_bot_session(BotApiSettings.from_env()),
+    )
+    # Registered first to time requests without the wait for their turn.
+    bot.session.middleware(FloodControlMiddleware())
+    bot.session.middleware(TelegramMetricsMiddleware())
+    mode = os.getenv("MEGA_BOT_MODE", "polling")
+    metrics_settings = MetricsSettings.from_env()
 
     logger.debug("Creating Redis client...")
-    redis_client = Redis(
-        host=os.getenv("REDIS_HOST"),
-        port=int(os.getenv("REDIS_PORT", 6379)),
-        password=os.getenv("REDIS_PASSWORD"),
-        db=int(os.getenv("REDIS_DB", 0)),
+    redis_settings = RedisSettings.from_env()
+    redis_metrics = RedisMetrics()
+    redis_client = create_redis(redis_settings, redis_metrics)
+    registry.add_collector(redis_collector(redis_metrics))
+    slow_settings = SlowUpdateSettings.from_env()
+    # The lag sampled for /healthz also reports blocks of the loop.
+    health = HealthMonitor(
+        redis_client,
+        loop=LoopLagMonitor(
+            block_threshold=slow_settings.block_threshold,
+            capture_stacks=slow_settings.capture_stacks,
+        ),
     )
+    bot.session.middleware(health.api_middleware)
     logger.info(
         "Redis client created.",
-        host=os.getenv("REDIS_HOST"),
-        port=int(os.getenv("REDIS_PORT", 6379)),
+        host=redis_settings.host,
+        port=redis_settings.port,
+        unix_socket=redis_settings.unix_socket_path,
+        max_connections=redis_settings.max_connections,
     )
 
     key_builder = DefaultKeyBuilder(
@@ -56,36 +135,146 @@ async def main() -> None:
     )
 
     logger.debug("Creating FSM storage...")
-    storage = RedisStorage(
+    runtime_settings = RuntimeSettings.from_env()
+    json_dumps, json_loads = get_state_codec(
+        runtime_settings.state_codec,
+        fast_json=runtime_settings.fast_json,
+        compress_min=runtime_settings.compress_min,
+    )
+    expiry_settings = ExpirySettings.from_env()
+    storage = CodecRedisStorage(
         redis=redis_client,
         key_builder=key_builder,
+        state_ttl=expiry_settings.ttl or None,
+        data_ttl=expiry_settings.ttl or None,
+        json_dumps=json_dumps,
+        json_loads=json_loads,
     )
+    sweeper = StateSweeper(storage, expiry_settings)
+    if l1_size := int(os.getenv("MEGA_BOT_FSM_L1_SIZE", 0)):
+        storage = TieredStorage(
+            storage,
+            maxsize=l1_size,
+            ttl=float(os.getenv("MEGA_BOT_FSM_L1_TTL", 300)),
+        )
     logger.info("FSM storage created.", type=type(storage).__name__)
 
     logger.debug("Creating Dispatcher...")
     dp = Dispatcher(
         storage=storage,
-        events_isolation=RedisEventIsolation(
+        # Telegram serves long polling to a single consumer only, so polling
+        # implies one process and in-process locks are enough.
+        events_isolation=create_event_isolation(
+            os.getenv("MEGA_BOT_ISOLATION", "auto"),
             redis=redis_client,
             key_builder=key_builder,
+            single_node=mode == "polling",
         ),
     )
+    dp[GETTER_STORE_KEY] = RedisGetterStore(redis_client)
+    persist_timers = os.getenv("MEGA_BOT_TIMERS_PERSIST", "true").lower() == "true"
+    timers = TimerScheduler(bot, RedisTimerQueue(redis_client) if persist_timers else None)
+    dp[TIMERS_KEY] = timers
+    if slow_settings.threshold:
+        dp.update.outer_middleware(SlowUpdateMiddleware(slow_settings))
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.update.outer_middleware(health.update_middleware)
+    dp.update.outer_middleware(
+        RedisMetricsMiddleware(
+            redis_metrics,
+            log_interval=float(os.getenv("MEGA_BOT_REDIS_METRICS_INTERVAL", 60)),
+        )
+    )
     logger.info("Dispatcher created.")
 
     # Register startup and shutdown handlers
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
+    dp.startup.register(timers.start)
+    dp.shutdown.register(timers.stop)
+    dp.startup.register(sweeper.start)
+    dp.shutdown.register(sweeper.stop)
 
     # Include the main dialog router
     logger.debug("Including dialog router...")
-    dp.include_router(get_dialog_router())
+    lazy_dialogs = os.getenv("MEGA_BOT_DIALOG_LAZY", "false").lower() == "true"
+    dialog_router = get_dialog_router(
+        os.getenv("MEGA_BOT_DIALOG_CACHE_DIR"),
+        on_funcs_registered=instrument_funcs_registry,
+        lazy=lazy_dialogs,
+    )
+    instrument_dialogs(dialog_router)
+    dialog_router.message.middleware(HandlerMetricsMiddleware())
+    dialog_router.callback_query.middleware(HandlerMetricsMiddleware())
+    install_media_id_storage(dialog_router, RedisMediaIdStorage(redis_client))
+    dp.include_router(dialog_router)
     logger.info("Dialog router included.")
 
-    await dp.start_polling(bot)
+    if lazy_dialogs:
+        warm_up = DialogWarmUp(
+            dialog_router, os.getenv("MEGA_BOT_DIALOG_WARMUP", "").split(",")
+        )
+        dp.startup.register(warm_up.start)
+        dp.shutdown.register(warm_up.stop)
 
+    if reload_interval := float(os.getenv("MEGA_BOT_DIALOG_RELOAD_INTERVAL", 0)):
+        reloader = DialogReloader(
+            dialog_router, reload_interval, on_dialog_built=instrument_dialog
+        )
+        dp.startup.register(reloader.start)
+        dp.shutdown.register(reloader.stop)
 
-if __name__ == "__main__":
+    health_runner = None
+    if health.settings.port:
+        # Workers serve health on ports offset by their id, like metrics.
+        health_runner = await start_health_server(
+            health, port=health.settings.port + (worker.worker_id if worker else 0)
+        )
+
+    if slow_settings.block_threshold:
+        health.loop.start()
+
+    logger.info("Starting bot.", mode=mode)
+    try:
+        if mode == "webhook":
+            await run_webhook(
+                dp,
+                bot,
+                WebhookSettings.from_env(),
+                worker=worker,
+                metrics=metrics_settings if metrics_settings.port else None,
+            )
+        elif metrics_settings.port:
+            metrics_runner = await start_metrics_server(registry, metrics_settings)
+            try:
+                await dp.start_polling(bot)
+            finally:
+                await metrics_runner.cleanup()
+        else:
+            await dp.start_polling(bot)
+    finally:
+        health.loop.stop()
+        if health_runner is not None:
+            await health_runner.cleanup()
+
+
+def run_worker(worker: Worker) -> None:
+    """Run the bot in a worker process started by the supervisor."""
     try:
-        asyncio.run(main())
-    except (KeyboardInterrupt, SystemExit):
-        logger.info("Bot stopped by user.")
+        run(main(worker))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    supervisor_settings = SupervisorSettings.from_env()
+    # Polling has a single consumer, so only webhooks can be served by workers.
+    if os.getenv("MEGA_BOT_MODE") == "webhook" and supervisor_settings.workers > 1:
+        setup_logger()
+        Supervisor(run_worker, supervisor_settings).run()
+    else:
+        try:
+            run(main())
+        except (KeyboardInterrupt, SystemExit):
+            logger.info("Bot stopped by user.")
@@ -0,0 +1,170 @@
+"""Telegram file_id cache for dialog media shared through Redis."""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import structlog
+from aiogram import Router
+from aiogram.types import ContentType
+from aiogram_dialog.api.entities import MediaId
+from aiogram_dialog.api.protocols import MediaIdStorageProtocol
+from aiogram_dialog.manager.manager_middleware import ManagerMiddleware
+from redis.asyncio import Redis
+
+
+logger = structlog.get_logger(__name__)
+
+
+class RedisMediaIdStorage(MediaIdStorageProtocol):
+    """Media id storage keeping Telegram file ids in Redis.
+
+    A file is uploaded once, and every replica then sends it by ``file_id``.
+    Local files are keyed by path and the stored id is bound to the file
+    content hash, so it is discarded as soon as the file changes.
+
+    Parameters
+    ----------
+    redis : Redis
+        The Redis client.
+    prefix : str
+        Prefix for Redis keys.
+    max_hashes : int
+        Number of local files whose content hash is memoized.
+
+    """
+
+    def __init__(
+        self, redis: Redis, prefix: str = "spoetka_base:media", max_hashes: int = 1024
+    ):
+        self.redis = redis
+        self.prefix = prefix
+        self.max_hashes = max_hashes
+        self._hashes: OrderedDict[str, Tuple[float, int, str]] = OrderedDict()
+
+    def _key(self, path: Optional[str], url: Optional[str], type: ContentType) -> str:
+        source = f"path:{path}" if path else f"url:{url}"
+        return f"{self.prefix}:{ContentType(type).value}:{source}"
+
+    async def _content_hash(self, path: Optional[str]) -> Optional[str]:
+        """Return the content hash of a local file.
+
+        Hashes of the most recently used files are memoized by modification
+        time and size, so a file is only read again after it changes.
+
+        """
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        cached = self._hashes.get(path)
+        if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+            self._hashes.move_to_end(path)
+            return cached[2]
+
+        content_hash = await asyncio.to_thread(_hash_file, path)
+        self._hashes[path] = (stat.st_mtime, stat.st_size, content_hash)
+        self._hashes.move_to_end(path)
+        if len(self._hashes) > self.max_hashes:
+            self._hashes.popitem(last=False)
+        return content_hash
+
+    async def get_media_id(
+        self,
+        path: Optional[str],
+        url: Optional[str],
+        type: ContentType,
+    ) -> Optional[MediaId]:
+        """Return a cached file id for the media if it is still valid.
+
+        Parameters
+        ----------
+        path : Optional[str]
+            Local file path.
+        url : Optional[str]
+            Remote file URL.
+        type : ContentType
+            Media content type.
+
+        Returns
+        -------
+        Optional[MediaId]
+            The cached media id or None on a miss.
+
+        """
+        if not path and not url:
+            return None
+        raw = await self.redis.get(self._key(path, url, type))
+        if raw is None:
+            return None
+
+        cached = json.loads(raw)
+        if cached["hash"] != await self._content_hash(path):
+            return None
+        return MediaId(cached["file_id"], cached["file_unique_id"])
+
+    async def save_media_id(
+        self,
+        path: Optional[str],
+        url: Optional[str],
+        type: ContentType,
+        media_id: MediaId,
+    ) -> None:
+        """Store the file id Telegram returned for the media.
+
+        Parameters
+        ----------
+        path : Optional[str]
+            Local file path.
+        url : Optional[str]
+            Remote file URL.
+        type : ContentType
+            Media content type.
+        media_id : MediaId
+            The media id returned by Telegram.
+
+        """
+        if not path and not url:
+            return
+        value = {
+            "hash": await self._content_hash(path),
+            "file_id": media_id.file_id,
+            "file_unique_id": media_id.file_unique_id,
+        }
+        await self.redis.set(self._key(path, url, type), json.dumps(value))
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def install_media_id_storage(router: Router, storage: MediaIdStorageProtocol) -> None:
+    """Replace the media id storage used by dialogs of the router.
+
+    ``DialogYAMLBuilder`` sets up dialogs with the default in-memory
+    storage, so the storage is swapped on the shared manager factory.
+
+    Parameters
+    ----------
+    router : Router
+        The router dialogs were set up on.
+    storage : MediaIdStorageProtocol
+        The media id storage to use.
+
+    """
+    for middleware in router.message.middleware:
+        if isinstance(middleware, ManagerMiddleware):
+            middleware.dialog_manager_factory.media_id_storage = storage
+            logger.info("Media id storage installed.", type=type(storage).__name__)
+            return
+    raise RuntimeError("Dialogs are not set up on the router.")
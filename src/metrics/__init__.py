@@ -0,0 +1,34 @@
+"""Prometheus-style metrics of update handling."""
+
+from .instruments import (
+    HandlerMetricsMiddleware,
+    TelegramMetricsMiddleware,
+    UpdateMetricsMiddleware,
+    instrument_dialog,
+    instrument_dialogs,
+    instrument_funcs_registry,
+    redis_collector,
+    registry,
+)
+from .registry import Counter, Histogram, MetricsRegistry
+from .server import MetricsSettings, add_metrics_route, start_metrics_server
+from .slow_updates import SlowUpdateMiddleware, SlowUpdateSettings
+
+__all__ = [
+    "Counter",
+    "HandlerMetricsMiddleware",
+    "Histogram",
+    "MetricsRegistry",
+    "MetricsSettings",
+    "SlowUpdateMiddleware",
+    "SlowUpdateSettings",
+    "TelegramMetricsMiddleware",
+    "UpdateMetricsMiddleware",
+    "add_metrics_route",
+    "instrument_dialog",
+    "instrument_dialogs",
+    "instrument_funcs_registry",
+    "redis_collector",
+    "registry",
+    "start_metrics_server",
+]
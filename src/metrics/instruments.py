@@ -0,0 +1,259 @@
+"""Bot metrics and the hooks collecting them."""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List
+from weakref import WeakSet
+
+from aiogram import BaseMiddleware, Router
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+from aiogram_dialog import Dialog, DialogManager
+from aiogram_dialog.api.internal import CONTEXT_KEY
+from dialog_yml import FuncsRegistry
+
+from src.storage import RedisMetrics
+
+from .registry import Histogram, MetricsRegistry
+from .slow_updates import record_span, record_state
+
+
+NO_STATE = "none"
+
+registry = MetricsRegistry()
+
+updates_total = registry.counter(
+    "bot_updates_total", "Updates received by the dispatcher.", ("type",)
+)
+update_seconds = registry.histogram(
+    "bot_update_seconds", "Time to process an update end to end.", ("type",)
+)
+handler_seconds = registry.histogram(
+    "bot_handler_seconds", "Time spent in dialog handlers by dialog state.", ("state",)
+)
+function_seconds = registry.histogram(
+    "bot_function_seconds",
+    "Time spent in functions referenced from YAML, getters included.",
+    ("function",),
+)
+render_seconds = registry.histogram(
+    "bot_render_seconds", "Time to render a dialog window, getters included.", ("state",)
+)
+api_seconds = registry.histogram(
+    "bot_api_request_seconds", "Telegram Bot API request latency.", ("method",)
+)
+api_errors_total = registry.counter(
+    "bot_api_errors_total", "Failed Telegram Bot API requests.", ("method", "error")
+)
+
+# Wrappers made by ``_timed``, so instrumenting a registry twice is a no-op.
+_timed_functions: WeakSet[Callable[..., Any]] = WeakSet()
+
+
+@contextmanager
+def _observe(histogram: Histogram, label: str, kind: str, name: str) -> Iterator[None]:
+    """Observe the duration of the context and add it to the update trace."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed, label)
+        record_span(kind, name, elapsed)
+
+
+def _state_label(manager_or_data: DialogManager | Dict[str, Any]) -> str:
+    if isinstance(manager_or_data, dict):
+        context = manager_or_data.get(CONTEXT_KEY)
+    elif manager_or_data.has_context():
+        context = manager_or_data.current_context()
+    else:
+        context = None
+    state = context.state.state if context is not None else None
+    return state or NO_STATE
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Update middleware counting updates and their processing time."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        update_type = (
+            event.event_type if isinstance(event, Update) else type(event).__name__
+        )
+        updates_total.inc(update_type)
+        with update_seconds.time(update_type):
+            return await handler(event, data)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware timing handlers by the dialog state they ran in.
+
+    Registered on the observers of the dialog router, it wraps every
+    handler of the dialogs included into it.
+
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        state = _state_label(data)
+        record_state(state)
+        callback = getattr(data.get("handler"), "callback", event)
+        name = getattr(callback, "__qualname__", type(callback).__name__)
+        with _observe(handler_seconds, state, "handler", name):
+            return await handler(event, data)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Bot session middleware timing Telegram API requests."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        method_name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except TelegramAPIError as e:
+            api_errors_total.inc(method_name, type(e).__name__)
+            raise
+        except Exception:
+            api_errors_total.inc(method_name, "NetworkError")
+            raise
+        finally:
+            api_seconds.observe(time.perf_counter() - started, method_name)
+
+
+def _timed(function: Callable[..., Any]) -> Callable[..., Any]:
+    name = getattr(function, "__name__", repr(function))
+    if inspect.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            with _observe(function_seconds, name, "function", name):
+                return await function(*args, **kwargs)
+
+        _timed_functions.add(async_wrapper)
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with _observe(function_seconds, name, "function", name):
+            return function(*args, **kwargs)
+
+    _timed_functions.add(wrapper)
+    return wrapper
+
+
+def instrument_funcs_registry(funcs_registry: FuncsRegistry) -> None:
+    """Time every function registered for YAML dialogs.
+
+    Functions are wrapped in place under their own names, so YAML files
+    keep referring to them as before. Must run before dialogs are built,
+    because widgets capture the functions they reference.
+
+    Parameters
+    ----------
+    funcs_registry : FuncsRegistry
+        The registry with functions referenced from YAML.
+
+    """
+    for category in funcs_registry._categories_map_.values():
+        for name, function in list(category._functions.items()):
+            if function not in _timed_functions:
+                category._functions[name] = _timed(function)
+
+
+def instrument_dialogs(router: Router) -> None:
+    """Time window rendering of all dialogs included into the router.
+
+    Parameters
+    ----------
+    router : Router
+        The router dialogs were included into.
+
+    """
+    for sub_router in router.sub_routers:
+        if isinstance(sub_router, Dialog):
+            instrument_dialog(sub_router)
+        instrument_dialogs(sub_router)
+
+
+def instrument_dialog(dialog: Dialog) -> None:
+    """Time window rendering of a dialog."""
+    dialog.render = _timed_render(dialog.render)
+
+
+def _timed_render(render: Callable) -> Callable:
+    @functools.wraps(render)
+    async def wrapper(manager: DialogManager):
+        state = _state_label(manager)
+        with _observe(render_seconds, state, "render", state):
+            return await render(manager)
+
+    return wrapper
+
+
+def redis_collector(metrics: RedisMetrics) -> Callable[[], List[str]]:
+    """Expose Redis pool and command metrics as Prometheus summaries.
+
+    Parameters
+    ----------
+    metrics : RedisMetrics
+        The Redis metrics collector.
+
+    Returns
+    -------
+    Callable[[], List[str]]
+        Collector to add to a metrics registry.
+
+    """
+
+    def collect() -> List[str]:
+        lines = [
+            "# HELP redis_command_seconds Redis command latency.",
+            "# TYPE redis_command_seconds summary",
+        ]
+        for command, stats in sorted(metrics.commands.items()):
+            lines.append(
+                f'redis_command_seconds_sum{{command="{command}"}} {stats.total!r}'
+            )
+            lines.append(
+                f'redis_command_seconds_count{{command="{command}"}} {stats.count}'
+            )
+        for name, stats, documentation in (
+            (
+                "redis_pool_wait_seconds",
+                metrics.pool_wait,
+                "Time waiting for a pooled connection.",
+            ),
+            ("redis_round_trips", metrics.round_trips, "Redis commands per update."),
+        ):
+            lines += [
+                f"# HELP {name} {documentation}",
+                f"# TYPE {name} summary",
+                f"{name}_sum {float(stats.total)!r}",
+                f"{name}_count {stats.count}",
+            ]
+        return lines
+
+    return collect
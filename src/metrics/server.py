@@ -0,0 +1,105 @@
+"""HTTP exposition of bot metrics."""
+
+import os
+from dataclasses import dataclass
+
+import structlog
+from aiohttp import web
+
+from .registry import MetricsRegistry
+
+
+logger = structlog.get_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass(frozen=True)
+class MetricsSettings:
+    """Metrics endpoint settings.
+
+    Attributes
+    ----------
+    host : str
+        Interface the metrics server binds to.
+    port : int
+        Port metrics are served on. When it matches the webhook port the
+        endpoint is added to the webhook server instead.
+    path : str
+        Route metrics are served on.
+
+    """
+
+    host: str = "0.0.0.0"
+    port: int = 5005
+    path: str = "/metrics"
+
+    @classmethod
+    def from_env(cls) -> "MetricsSettings":
+        """Read metrics settings from environment variables.
+
+        Returns
+        -------
+        MetricsSettings
+            Settings populated from ``MEGA_BOT_METRICS_*`` variables.
+
+        """
+        return cls(
+            host=os.getenv("MEGA_BOT_METRICS_HOST", "0.0.0.0"),
+            port=int(os.getenv("MEGA_BOT_METRICS_PORT", 5005)),
+            path=os.getenv("MEGA_BOT_METRICS_PATH", "/metrics"),
+        )
+
+
+def add_metrics_route(app: web.Application, registry: MetricsRegistry, path: str) -> None:
+    """Serve metrics of the registry on an aiohttp application.
+
+    Parameters
+    ----------
+    app : web.Application
+        The application to add the route to.
+    registry : MetricsRegistry
+        The metrics registry.
+    path : str
+        Route metrics are served on.
+
+    """
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(
+            body=registry.render().encode(), headers={"Content-Type": CONTENT_TYPE}
+        )
+
+    app.router.add_get(path, handle)
+
+
+async def start_metrics_server(
+    registry: MetricsRegistry,
+    settings: MetricsSettings,
+    port: int | None = None,
+) -> web.AppRunner:
+    """Start a standalone metrics server.
+
+    Parameters
+    ----------
+    registry : MetricsRegistry
+        The metrics registry.
+    settings : MetricsSettings
+        The metrics endpoint settings.
+    port : int | None
+        Port to listen on instead of the configured one.
+
+    Returns
+    -------
+    web.AppRunner
+        The runner to clean up on shutdown.
+
+    """
+    app = web.Application()
+    add_metrics_route(app, registry, settings.path)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    port = port or settings.port
+    await web.TCPSite(runner, host=settings.host, port=port).start()
+    logger.info("Metrics server started.", host=settings.host, port=port)
+    return runner
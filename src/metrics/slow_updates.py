@@ -0,0 +1,146 @@
+"""Attribution of slow updates."""
+
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class SlowUpdateSettings:
+    """Slow update and loop block detection settings.
+
+    Attributes
+    ----------
+    threshold : float
+        Seconds an update may take before it is logged with its timings,
+        ``0`` disables the check.
+    block_threshold : float
+        Seconds the event loop may stay blocked before the loop lag
+        monitor logs it, ``0`` disables logging.
+    capture_stacks : bool
+        Whether a watchdog thread samples the stack of the code blocking
+        the loop.
+    max_spans : int
+        Number of the slowest timings logged with a slow update.
+
+    """
+
+    threshold: float = 1.0
+    block_threshold: float = 0.25
+    capture_stacks: bool = False
+    max_spans: int = 10
+
+    @classmethod
+    def from_env(cls) -> "SlowUpdateSettings":
+        """Read slow update settings from environment variables.
+
+        Returns
+        -------
+        SlowUpdateSettings
+            Settings populated from ``MEGA_BOT_SLOW_*`` variables.
+
+        """
+        return cls(
+            threshold=float(os.getenv("MEGA_BOT_SLOW_UPDATE_THRESHOLD", 1)),
+            block_threshold=float(os.getenv("MEGA_BOT_SLOW_BLOCK_THRESHOLD", 0.25)),
+            capture_stacks=os.getenv("MEGA_BOT_SLOW_CAPTURE_STACKS", "false").lower()
+            == "true",
+            max_spans=int(os.getenv("MEGA_BOT_SLOW_MAX_SPANS", 10)),
+        )
+
+
+class UpdateTrace:
+    """Timings collected while an update is processed."""
+
+    __slots__ = ("state", "spans")
+
+    def __init__(self):
+        self.state: Optional[str] = None
+        self.spans: List[Tuple[str, str, float]] = []
+
+
+_trace: ContextVar[Optional[UpdateTrace]] = ContextVar("update_trace", default=None)
+
+
+def record_span(kind: str, name: str, seconds: float) -> None:
+    """Add a timing to the trace of the current update, if it is traced.
+
+    Parameters
+    ----------
+    kind : str
+        What was timed, e.g. ``"handler"``, ``"function"`` or ``"render"``.
+    name : str
+        Name of the timed code.
+    seconds : float
+        Time it took.
+
+    """
+    trace = _trace.get()
+    if trace is not None:
+        trace.spans.append((kind, name, seconds))
+
+
+def record_state(state: str) -> None:
+    """Remember the dialog state the current update is handled in."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.state = state
+
+
+class SlowUpdateMiddleware(BaseMiddleware):
+    """Outer update middleware logging updates slower than a threshold.
+
+    Handlers, functions referenced from YAML (getters included) and window
+    rendering report their timings through ``record_span``, and the log
+    record of a slow update lists the slowest of them together with the
+    dialog state.
+
+    Parameters
+    ----------
+    settings : SlowUpdateSettings
+        The detection settings.
+
+    """
+
+    def __init__(self, settings: SlowUpdateSettings):
+        self.settings = settings
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        trace = UpdateTrace()
+        token = _trace.set(trace)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            _trace.reset(token)
+            if elapsed >= self.settings.threshold:
+                self._log(event, trace, elapsed)
+
+    def _log(self, event: TelegramObject, trace: UpdateTrace, elapsed: float) -> None:
+        slowest = sorted(trace.spans, key=lambda span: span[2], reverse=True)
+        logger.warning(
+            "Slow update.",
+            update_id=getattr(event, "update_id", None),
+            update_type=event.event_type if isinstance(event, Update) else None,
+            state=trace.state,
+            seconds=round(elapsed, 3),
+            spans=[
+                f"{kind} {name}: {seconds * 1e3:.1f} ms"
+                for kind, name, seconds in slowest[: self.settings.max_spans]
+            ],
+        )
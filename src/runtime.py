@@ -0,0 +1,86 @@
+"""Event loop and serialization options of the running bot."""
+
+import asyncio
+from dataclasses import dataclass
+import os
+from typing import Any, Coroutine, Optional, TypeVar
+
+import structlog
+
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RuntimeSettings:
+    """Runtime settings.
+
+    Attributes
+    ----------
+    uvloop : bool
+        Run the bot on uvloop instead of the default asyncio loop.
+    fast_json : bool
+        Serialize FSM state with orjson instead of the standard library.
+    state_codec : str
+        ``"json"`` or ``"msgpack"`` for the encoding of FSM data.
+    compress_min : int
+        Size in bytes from which msgpack encoded data is compressed with
+        zstd, ``0`` disables compression.
+
+    """
+
+    uvloop: bool = False
+    fast_json: bool = False
+    state_codec: str = "json"
+    compress_min: int = 512
+
+    @classmethod
+    def from_env(cls) -> "RuntimeSettings":
+        """Read runtime settings from environment variables.
+
+        Returns
+        -------
+        RuntimeSettings
+            Settings populated from ``MEGA_BOT_UVLOOP``,
+            ``MEGA_BOT_FAST_JSON`` and ``MEGA_BOT_STATE_*`` variables.
+
+        """
+        return cls(
+            uvloop=os.getenv("MEGA_BOT_UVLOOP", "false").lower() == "true",
+            fast_json=os.getenv("MEGA_BOT_FAST_JSON", "false").lower() == "true",
+            state_codec=os.getenv("MEGA_BOT_STATE_CODEC", "json"),
+            compress_min=int(os.getenv("MEGA_BOT_STATE_COMPRESS_MIN", 512)),
+        )
+
+
+def run(main: Coroutine[Any, Any, T], settings: Optional[RuntimeSettings] = None) -> T:
+    """Run a coroutine on the configured event loop.
+
+    Falls back to the default loop if uvloop is requested but not
+    installed.
+
+    Parameters
+    ----------
+    main : Coroutine
+        The coroutine to run.
+    settings : RuntimeSettings | None
+        Runtime settings, read from the environment if not given.
+
+    Returns
+    -------
+    Any
+        The result of the coroutine.
+
+    """
+    settings = settings or RuntimeSettings.from_env()
+    loop_factory = None
+    if settings.uvloop:
+        try:
+            import uvloop
+        except ImportError:
+            logger.warning("uvloop is not installed, using the default event loop.")
+        else:
+            loop_factory = uvloop.new_event_loop
+    return asyncio.run(main, loop_factory=loop_factory)
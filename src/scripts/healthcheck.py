@@ -1,51 +1,48 @@
-"""Health check script for the bot."""
+"""Health check script for the bot.
 
-import os
-import asyncio
-import sys
-
-from aiogram import Bot
-from aiogram.exceptions import TelegramAPIError, TelegramUnauthorizedError
-import structlog
+Queries the health endpoint of the running bot, so the check costs no
+Bot API call and imports nothing but the standard library.
 
+Usage: ``python -m src.scripts.healthcheck [/healthz|/readyz]``.
+"""
 
-logger = structlog.get_logger(__name__)
+import os
+import sys
+import urllib.error
+import urllib.request
 
 
-async def check_bot_connection():
-    """Checks the bot's connection to the Telegram API.
+def check_health(path: str = "/healthz", timeout: float = 5.0) -> bool:
+    """Check an endpoint of the in-process health server.
 
-    This function attempts to retrieve information about the bot using `bot.get_me()`.
-    If successful, it indicates a healthy connection. Otherwise, it logs an error
-    and exits with a non-zero status code.
+    Parameters
+    ----------
+    path : str
+        ``/healthz`` for liveness or ``/readyz`` for readiness.
+    timeout : float
+        Seconds to wait for the answer.
 
-    Raises
-    ------
-    SystemExit
-        Exits with 0 if connection is successful, 1 otherwise.
+    Returns
+    -------
+    bool
+        Whether the endpoint reported success.
 
     """
-
-    bot = Bot(token=os.getenv("MEGA_BOT_TOKEN", ""))
+    port = os.getenv("MEGA_BOT_HEALTH_PORT", "5006")
+    url = f"http://127.0.0.1:{port}{path}"
     try:
-        await bot.get_me()
-        # If get_me() is successful, it means the token is valid and connection is up.
-        logger.info("Healthcheck successful: connection to Telegram API is OK.")
-        sys.exit(0)
-    except TelegramUnauthorizedError:
-        logger.error("Healthcheck failed: Bot token is invalid.")
-        sys.exit(1)
-    except TelegramAPIError as e:
-        logger.error("Healthcheck failed: Telegram API error: %s", e)
-        sys.exit(1)
-    except Exception as e:
-        # This catches other potential issues like network problems.
-        logger.error("Healthcheck failed: An unexpected error occurred: %s", e)
-        sys.exit(1)
-    finally:
-        # It's important to close the bot session.
-        await bot.session.close()
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            body = response.read().decode()
+            healthy = response.status == 200
+    except urllib.error.HTTPError as e:
+        body = e.read().decode()
+        healthy = False
+    except OSError as e:
+        body = str(e)
+        healthy = False
+    print(body)
+    return healthy
 
 
 if __name__ == "__main__":
-    asyncio.run(check_bot_connection())
+    sys.exit(0 if check_health(*sys.argv[1:2]) else 1)
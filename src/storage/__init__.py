@@ -0,0 +1,38 @@
+"""Redis-backed storage components for FSM state and event isolation."""
+
+from .codec import CodecRedisStorage, StateCodec, get_state_codec
+from .expiry import ExpirySettings, StateSweeper, SweepReport
+from .isolation import ShardedEventIsolation, create_event_isolation
+from .pool import (
+    InstrumentedConnectionPool,
+    InstrumentedRedis,
+    LatencyStats,
+    RedisMetrics,
+    RedisMetricsMiddleware,
+    RedisSettings,
+    create_redis,
+)
+from .serialization import get_json_codec
+from .tiered import L1Cache, TieredStorage
+
+
+__all__ = [
+    "CodecRedisStorage",
+    "ExpirySettings",
+    "InstrumentedConnectionPool",
+    "InstrumentedRedis",
+    "L1Cache",
+    "LatencyStats",
+    "RedisMetrics",
+    "RedisMetricsMiddleware",
+    "RedisSettings",
+    "ShardedEventIsolation",
+    "StateCodec",
+    "StateSweeper",
+    "SweepReport",
+    "TieredStorage",
+    "create_event_isolation",
+    "create_redis",
+    "get_json_codec",
+    "get_state_codec",
+]
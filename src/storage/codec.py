@@ -0,0 +1,201 @@
+"""Versioned binary encoding of FSM state with legacy JSON reads."""
+
+import json
+from typing import Any, Dict, Mapping, Tuple, Union, cast
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+import structlog
+
+from .expiry import stack_context_keys
+from .serialization import JsonDumps, JsonLoads, get_json_codec, to_primitive
+
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+logger = structlog.get_logger(__name__)
+
+# Never emitted by msgpack and never starts JSON or UTF-8 text, so legacy
+# JSON values are told apart by their first byte.
+MAGIC = 0xC1
+VERSION = 1
+FLAG_ZSTD = 0x01
+HEADER_SIZE = 3
+
+Raw = Union[str, bytes]
+
+
+class StateCodec:
+    """Encodes state as msgpack behind a header, compressing large values.
+
+    A value starts with the ``MAGIC`` byte, the format version and a flags
+    byte telling whether the payload is compressed with zstd. Values
+    without the header are legacy JSON and are read with ``json_loads``,
+    so users keep their state and move to the new encoding with their
+    next write.
+
+    Sets become lists and dates ISO strings, as with the JSON codecs.
+    Integer keys are kept as integers.
+
+    Parameters
+    ----------
+    compress_min : int
+        Size in bytes from which payloads are compressed, ``0`` disables
+        compression. A compressed payload is only kept if it is smaller.
+    level : int
+        zstd compression level.
+    json_loads : Callable
+        Reader of legacy JSON values.
+
+    """
+
+    def __init__(
+        self,
+        compress_min: int = 512,
+        level: int = 3,
+        json_loads: JsonLoads = json.loads,
+    ):
+        self.compress_min = compress_min if zstandard is not None else 0
+        self.json_loads = json_loads
+        self._compressor = zstandard.ZstdCompressor(level=level) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def dumps(self, data: Any) -> bytes:
+        """Encode a value with the current format version."""
+        payload = msgpack.packb(data, default=to_primitive, use_bin_type=True)
+        flags = 0
+        if self.compress_min and len(payload) >= self.compress_min:
+            compressed = self._compressor.compress(payload)
+            if len(compressed) < len(payload):
+                payload, flags = compressed, FLAG_ZSTD
+        return bytes((MAGIC, VERSION, flags)) + payload
+
+    def loads(self, raw: Raw) -> Any:
+        """Decode a value of any format version or legacy JSON."""
+        if isinstance(raw, str) or not raw or raw[0] != MAGIC:
+            return self.json_loads(raw)
+        return _decode(raw, self._decompressor)
+
+
+def _decode(raw: bytes, decompressor: Any) -> Any:
+    version, flags = raw[1], raw[2]
+    if version != VERSION:
+        raise ValueError(f"Unsupported state format version {version}.")
+    if msgpack is None:
+        raise RuntimeError("msgpack is required to read binary state.")
+    payload = memoryview(raw)[HEADER_SIZE:]
+    if flags & FLAG_ZSTD:
+        payload = (decompressor or zstandard.ZstdDecompressor()).decompress(payload)
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+
+def _binary_aware(json_loads: JsonLoads) -> JsonLoads:
+    """Wrap a JSON reader to also read binary values."""
+
+    def loads(raw: Raw) -> Any:
+        if isinstance(raw, bytes) and raw and raw[0] == MAGIC:
+            return _decode(raw, None)
+        return json_loads(raw)
+
+    return loads
+
+
+def get_state_codec(
+    name: str = "json", fast_json: bool = False, compress_min: int = 512
+) -> Tuple[JsonDumps, JsonLoads]:
+    """Return ``json_dumps`` and ``json_loads`` for ``CodecRedisStorage``.
+
+    Whatever the codec, binary values are read as well, so switching back
+    to JSON does not lose the state written in the meantime.
+
+    Parameters
+    ----------
+    name : str
+        ``"json"`` or ``"msgpack"``. Falls back to JSON if msgpack is not
+        installed.
+    fast_json : bool
+        Use orjson for JSON, including legacy reads.
+    compress_min : int
+        Size in bytes from which msgpack payloads are compressed with zstd.
+
+    Returns
+    -------
+    tuple[Callable, Callable]
+        The serializer and the deserializer.
+
+    """
+    json_dumps, json_loads = get_json_codec(fast_json)
+    if name == "msgpack" and msgpack is None:
+        logger.warning("msgpack is not installed, state is stored as JSON.")
+    elif name == "msgpack":
+        if compress_min and zstandard is None:
+            logger.warning("zstandard is not installed, state is not compressed.")
+        codec = StateCodec(compress_min, json_loads=json_loads)
+        return codec.dumps, codec.loads
+    elif name != "json":
+        raise ValueError(f"Unknown state codec {name!r}.")
+    return json_dumps, _binary_aware(json_loads)
+
+
+class CodecRedisStorage(RedisStorage):
+    """``RedisStorage`` handing raw values to its codec.
+
+    ``RedisStorage`` decodes values as UTF-8 before parsing them, which
+    binary values do not survive.
+
+    """
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        """Write data for the key.
+
+        Writing a dialog stack also refreshes the TTL of its contexts.
+
+        Parameters
+        ----------
+        key : StorageKey
+            The storage key.
+        data : Mapping[str, Any]
+            The new data.
+
+        """
+        touch = stack_context_keys(self.key_builder, key, data) if self.data_ttl else []
+        if not touch or not data:
+            await super().set_data(key, data)
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(
+                self.key_builder.build(key, "data"),
+                self.json_dumps(data),
+                ex=self.data_ttl,
+            )
+            for context_key in touch:
+                pipe.expire(context_key, self.data_ttl)
+            await pipe.execute()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        """Get data for the key.
+
+        Parameters
+        ----------
+        key : StorageKey
+            The storage key.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The stored data.
+
+        """
+        value = await self.redis.get(self.key_builder.build(key, "data"))
+        if value is None:
+            return {}
+        return cast(Dict[str, Any], self.json_loads(value))
@@ -0,0 +1,333 @@
+"""Expiry of FSM state and sweeping of abandoned dialog state."""
+
+import asyncio
+import base64
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import structlog
+from aiogram.fsm.storage.base import KeyBuilder, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+
+
+logger = structlog.get_logger(__name__)
+
+STACK_DESTINY = "aiogd:stack:"
+CONTEXT_DESTINY = "aiogd:context:"
+
+
+@dataclass(frozen=True)
+class ExpirySettings:
+    """FSM state expiry settings.
+
+    Attributes
+    ----------
+    ttl : int
+        Seconds FSM keys live after their last write, ``0`` keeps them
+        forever. Keys without a TTL idle for longer are swept as stale.
+    sweep_interval : float
+        Seconds between sweeps, ``0`` disables the sweeper.
+    sweep_batch : int
+        Keys requested per ``SCAN`` call.
+    sweep_pause : float
+        Seconds to pause between batches, leaving Redis to other clients.
+    orphan_grace : int
+        Seconds a dialog context must have been idle before it is removed
+        for not being on its stack. ``0`` removes orphans regardless, which
+        is also what happens if Redis does not track idle times.
+    archive_dir : str | None
+        Directory swept keys are appended to as JSON lines before they are
+        deleted, nothing is archived if not set.
+
+    """
+
+    ttl: int = 0
+    sweep_interval: float = 3600.0
+    sweep_batch: int = 500
+    sweep_pause: float = 0.05
+    orphan_grace: int = 3600
+    archive_dir: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "ExpirySettings":
+        """Read expiry settings from environment variables.
+
+        Returns
+        -------
+        ExpirySettings
+            Settings populated from ``MEGA_BOT_STATE_TTL`` and
+            ``MEGA_BOT_STATE_SWEEP_*`` variables.
+
+        """
+        return cls(
+            ttl=int(os.getenv("MEGA_BOT_STATE_TTL", 0)),
+            sweep_interval=float(os.getenv("MEGA_BOT_STATE_SWEEP_INTERVAL", 3600)),
+            sweep_batch=int(os.getenv("MEGA_BOT_STATE_SWEEP_BATCH", 500)),
+            sweep_pause=float(os.getenv("MEGA_BOT_STATE_SWEEP_PAUSE", 0.05)),
+            orphan_grace=int(os.getenv("MEGA_BOT_STATE_SWEEP_ORPHAN_GRACE", 3600)),
+            archive_dir=os.getenv("MEGA_BOT_STATE_SWEEP_ARCHIVE_DIR") or None,
+        )
+
+
+def stack_context_keys(
+    key_builder: KeyBuilder, key: StorageKey, data: Mapping[str, Any]
+) -> List[str]:
+    """Return the Redis keys of the contexts on a dialog stack.
+
+    Storages refresh their TTL whenever the stack is written, so contexts
+    below the top one do not expire while the user is in a subdialog.
+
+    Parameters
+    ----------
+    key_builder : KeyBuilder
+        The key builder of the storage.
+    key : StorageKey
+        The storage key the data is written to.
+    data : Mapping[str, Any]
+        The data written.
+
+    Returns
+    -------
+    List[str]
+        The context keys, empty if the data is not a dialog stack.
+
+    """
+    if not key.destiny.startswith(STACK_DESTINY):
+        return []
+    return [
+        key_builder.build(replace(key, destiny=CONTEXT_DESTINY + intent_id), "data")
+        for intent_id in data.get("intents") or ()
+    ]
+
+
+class SweepReport:
+    """Counters of a single sweep."""
+
+    __slots__ = ("scanned", "stale", "orphaned", "expiry_set", "bytes_reclaimed")
+
+    def __init__(self):
+        self.scanned = 0
+        self.stale = 0
+        self.orphaned = 0
+        self.expiry_set = 0
+        self.bytes_reclaimed = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Return the counters by name."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class StateSweeper:
+    """Removes abandoned FSM state from Redis in the background.
+
+    Keys are visited with ``SCAN`` in small batches and inspected in one
+    pipeline per batch, without touching them.
+
+    * Keys written before TTLs were configured are removed if they have
+      been idle for longer than the TTL and get the remaining TTL
+      otherwise.
+    * Dialog contexts their stack no longer lists, e.g. left behind by a
+      stack that expired or was reset, are removed.
+
+    Users coming back to a removed dialog hit ``UnknownIntent`` and are
+    restarted from the main menu. With several processes only one sweeps
+    per interval.
+
+    Parameters
+    ----------
+    storage : RedisStorage
+        The storage whose keys are swept, its codec decodes dialog data.
+    settings : ExpirySettings
+        The expiry settings.
+
+    """
+
+    def __init__(self, storage: RedisStorage, settings: ExpirySettings):
+        self.storage = storage
+        self.redis = storage.redis
+        self.settings = settings
+        self.prefix = getattr(storage.key_builder, "prefix", "fsm")
+        self.separator = getattr(storage.key_builder, "separator", ":")
+        self.suffixes = (f"{self.separator}state", f"{self.separator}data")
+        self.lock_key = f"{self.prefix}{self.separator}sweep_lock"
+        self.last_report: Optional[SweepReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start sweeping in a background task."""
+        if self._task is None and self.settings.sweep_interval:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sweeping."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                locked = await self.redis.set(
+                    self.lock_key, 1, nx=True, ex=max(int(self.settings.sweep_interval), 1)
+                )
+                if locked:
+                    await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("State sweep failed.", error=e)
+            await asyncio.sleep(self.settings.sweep_interval)
+
+    async def sweep(self) -> SweepReport:
+        """Sweep all FSM keys once.
+
+        Returns
+        -------
+        SweepReport
+            What was found and reclaimed.
+
+        """
+        report = SweepReport()
+        cursor = 0
+        while True:
+            cursor, keys = await self.redis.scan(
+                cursor,
+                match=f"{self.prefix}{self.separator}*",
+                count=self.settings.sweep_batch,
+            )
+            keys = [k.decode() if isinstance(k, bytes) else k for k in keys]
+            keys = [k for k in keys if k.endswith(self.suffixes)]
+            if keys:
+                report.scanned += len(keys)
+                await self._sweep_batch(keys, report)
+            if not cursor:
+                break
+            await asyncio.sleep(self.settings.sweep_pause)
+        self.last_report = report
+        logger.info("State sweep finished.", **report.as_dict())
+        return report
+
+    async def _inspect(self, keys: List[str]) -> List[Tuple[int, Optional[int], int]]:
+        """Return TTL, idle seconds and size of each key."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.ttl(key)
+                # Errors if the server evicts by LFU and does not track idle times.
+                pipe.object("idletime", key)
+                pipe.strlen(key)
+            results = await pipe.execute(raise_on_error=False)
+        return [
+            (ttl, None if isinstance(idle, Exception) else idle, size)
+            for ttl, idle, size in zip(results[::3], results[1::3], results[2::3])
+        ]
+
+    async def _sweep_batch(self, keys: List[str], report: SweepReport) -> None:
+        ttl = self.settings.ttl
+        remove: Dict[str, Tuple[str, int]] = {}
+        expire: List[Tuple[str, int]] = []
+        contexts: List[Tuple[str, int]] = []
+        for key, (key_ttl, idle, size) in zip(keys, await self._inspect(keys)):
+            if key_ttl == -2:
+                continue
+            if ttl and key_ttl == -1:
+                if idle is not None and idle >= ttl:
+                    remove[key] = ("stale", size)
+                    continue
+                expire.append((key, ttl - (idle or 0)))
+            if CONTEXT_DESTINY in key and (
+                not self.settings.orphan_grace
+                or idle is None
+                or idle >= self.settings.orphan_grace
+            ):
+                contexts.append((key, size))
+
+        for key, size in await self._orphans(contexts):
+            remove[key] = ("orphaned", size)
+
+        expire = [(key, seconds) for key, seconds in expire if key not in remove]
+        if expire:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, seconds in expire:
+                    pipe.expire(key, seconds)
+                await pipe.execute()
+            report.expiry_set += len(expire)
+        if remove:
+            await self._remove(remove)
+            for reason, size in remove.values():
+                setattr(report, reason, getattr(report, reason) + 1)
+                report.bytes_reclaimed += size
+
+    async def _orphans(self, contexts: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        """Return the contexts that are not on their stack.
+
+        Contexts are stored as ``vars(Context)``, so their stack is
+        ``_stack_id``. Contexts without it are never considered orphaned.
+
+        """
+        if not contexts:
+            return []
+        sep = self.separator
+        raw_contexts = await self.redis.mget([key for key, _ in contexts])
+        stack_ids: List[Optional[str]] = []
+        for raw in raw_contexts:
+            stack_id = self._loads(raw).get("_stack_id") if raw is not None else None
+            stack_ids.append(stack_id if isinstance(stack_id, str) else None)
+        stack_keys = []
+        for (key, _), stack_id in zip(contexts, stack_ids):
+            head = key.partition(sep + CONTEXT_DESTINY)[0]
+            stack_keys.append(f"{head}{sep}{STACK_DESTINY}{stack_id}{sep}data")
+        # Reading stacks counts as access for idle times, TTLs only move on writes.
+        raw_stacks = await self.redis.mget(stack_keys)
+        orphans = []
+        for (key, size), stack_id, raw_stack in zip(contexts, stack_ids, raw_stacks):
+            if stack_id is None:
+                continue
+            intent_id = key.partition(CONTEXT_DESTINY)[2].rpartition(sep)[0]
+            if raw_stack is None or intent_id not in (
+                self._loads(raw_stack).get("intents") or ()
+            ):
+                orphans.append((key, size))
+        return orphans
+
+    def _loads(self, raw: Any) -> Dict[str, Any]:
+        try:
+            data = self.storage.json_loads(raw)
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    async def _remove(self, remove: Dict[str, Tuple[str, int]]) -> None:
+        keys = list(remove)
+        if self.settings.archive_dir:
+            values = await self.redis.mget(keys)
+            await asyncio.to_thread(self._archive, keys, values, remove)
+        await self.redis.unlink(*keys)
+
+    def _archive(
+        self, keys: List[str], values: List[Any], remove: Dict[str, Tuple[str, int]]
+    ) -> None:
+        directory = Path(self.settings.archive_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        now = datetime.now(timezone.utc)
+        path = directory / f"state-{now:%Y-%m-%d}.jsonl"
+        with path.open("a", encoding="utf-8") as file:
+            for key, value in zip(keys, values):
+                if value is None:
+                    continue
+                if isinstance(value, str):
+                    value = value.encode()
+                record = {
+                    "key": key,
+                    "reason": remove[key][0],
+                    "archived_at": now.isoformat(),
+                    "value": base64.b64encode(value).decode(),
+                }
+                file.write(json.dumps(record) + "\n")
@@ -0,0 +1,122 @@
+"""Event isolation backends and their selection by deployment mode."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict, List
+
+import structlog
+from aiogram.fsm.storage.base import (
+    BaseEventIsolation,
+    DefaultKeyBuilder,
+    KeyBuilder,
+    StorageKey,
+)
+from aiogram.fsm.storage.redis import RedisEventIsolation
+from redis.asyncio import Redis
+
+
+logger = structlog.get_logger(__name__)
+
+
+class _Entry:
+    """A lock together with the number of updates holding or awaiting it."""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class ShardedEventIsolation(BaseEventIsolation):
+    """In-process event isolation with a sharded table of asyncio locks.
+
+    Locks are keyed by the same key builder as ``RedisEventIsolation``, so
+    both backends isolate exactly the same events. An entry only lives
+    while some update holds or waits for its lock and is dropped by the
+    last one, so memory is bounded by the number of in-flight updates.
+
+    Only safe when a single process handles all updates of the bot.
+
+    Parameters
+    ----------
+    key_builder : KeyBuilder | None
+        Builder of lock keys, ``DefaultKeyBuilder`` by default.
+    shards : int
+        Number of lock tables keys are spread over.
+
+    """
+
+    def __init__(self, key_builder: KeyBuilder | None = None, shards: int = 64):
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self._shards: List[Dict[str, _Entry]] = [{} for _ in range(shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        """Hold the lock of the key for the duration of the context.
+
+        Parameters
+        ----------
+        key : StorageKey
+            The storage key of the event.
+
+        """
+        lock_key = self.key_builder.build(key, "lock")
+        shard = self._shards[hash(lock_key) % len(self._shards)]
+        entry = shard.get(lock_key)
+        if entry is None:
+            entry = shard[lock_key] = _Entry()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield None
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                del shard[lock_key]
+
+    async def close(self) -> None:
+        """Drop all lock tables."""
+        for shard in self._shards:
+            shard.clear()
+
+
+def create_event_isolation(
+    backend: str,
+    redis: Redis,
+    key_builder: KeyBuilder,
+    single_node: bool,
+) -> BaseEventIsolation:
+    """Create the event isolation backend for the deployment.
+
+    Parameters
+    ----------
+    backend : str
+        ``"memory"``, ``"redis"`` or ``"auto"``, which picks in-process
+        locks for a single node and Redis locks otherwise.
+    redis : Redis
+        The Redis client for Redis locks.
+    key_builder : KeyBuilder
+        Builder of lock keys.
+    single_node : bool
+        Whether a single process handles all updates of the bot.
+
+    Returns
+    -------
+    BaseEventIsolation
+        The event isolation backend.
+
+    """
+    if backend == "auto":
+        backend = "memory" if single_node else "redis"
+    if backend == "memory":
+        isolation: BaseEventIsolation = ShardedEventIsolation(key_builder=key_builder)
+    elif backend == "redis":
+        isolation = RedisEventIsolation(redis=redis, key_builder=key_builder)
+    else:
+        raise ValueError(f"Unknown event isolation backend: {backend!r}")
+    logger.info("Event isolation created.", type=type(isolation).__name__)
+    return isolation
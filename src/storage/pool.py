@@ -0,0 +1,306 @@
+"""Configurable, instrumented Redis connection pool."""
+
+import os
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+import structlog
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.client import Pipeline
+from redis.asyncio.connection import UnixDomainSocketConnection
+
+
+logger = structlog.get_logger(__name__)
+
+_round_trips: ContextVar[list[int] | None] = ContextVar("redis_round_trips", default=None)
+
+
+@dataclass(frozen=True)
+class RedisSettings:
+    """Redis connection settings.
+
+    Attributes
+    ----------
+    host : str | None
+        Redis host, ignored when ``unix_socket_path`` is set.
+    port : int
+        Redis port.
+    password : str | None
+        Redis password.
+    db : int
+        Redis database number.
+    unix_socket_path : str | None
+        Path to a unix socket to connect through instead of TCP.
+    max_connections : int
+        Maximum number of pooled connections.
+    pool_timeout : float
+        Seconds to wait for a free connection before failing.
+    socket_timeout : float | None
+        Timeout for socket reads and writes.
+    socket_connect_timeout : float | None
+        Timeout for establishing a connection.
+    health_check_interval : int
+        Seconds of idleness after which a connection is pinged before use.
+
+    """
+
+    host: str | None = "localhost"
+    port: int = 6379
+    password: str | None = None
+    db: int = 0
+    unix_socket_path: str | None = None
+    max_connections: int = 50
+    pool_timeout: float = 5.0
+    socket_timeout: float | None = 5.0
+    socket_connect_timeout: float | None = 5.0
+    health_check_interval: int = 30
+
+    @classmethod
+    def from_env(cls) -> "RedisSettings":
+        """Read Redis settings from environment variables.
+
+        Returns
+        -------
+        RedisSettings
+            Settings populated from ``REDIS_*`` variables.
+
+        """
+        return cls(
+            host=os.getenv("REDIS_HOST"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            password=os.getenv("REDIS_PASSWORD"),
+            db=int(os.getenv("REDIS_DB", 0)),
+            unix_socket_path=os.getenv("REDIS_UNIX_SOCKET") or None,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 50)),
+            pool_timeout=float(os.getenv("REDIS_POOL_TIMEOUT", 5)),
+            socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", 5)),
+            socket_connect_timeout=float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 5)),
+            health_check_interval=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)),
+        )
+
+
+class LatencyStats:
+    """Running count, total and maximum of observed values."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of observed values."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the stats as a dictionary."""
+        return {"count": self.count, "mean": self.mean, "max": self.max}
+
+
+class RedisMetrics:
+    """Collected Redis pool and command metrics.
+
+    Attributes
+    ----------
+    pool_wait : LatencyStats
+        Seconds spent waiting for a pooled connection.
+    commands : Dict[str, LatencyStats]
+        Command latency in seconds per command name, executed pipelines are
+        recorded as ``PIPELINE``.
+    round_trips : LatencyStats
+        Redis commands issued per processed update.
+
+    """
+
+    def __init__(self):
+        self.pool_wait = LatencyStats()
+        self.commands: Dict[str, LatencyStats] = defaultdict(LatencyStats)
+        self.round_trips = LatencyStats()
+
+    def observe_command(self, name: str, seconds: float) -> None:
+        """Record latency of a command and count it for the current update."""
+        self.commands[name.upper()].observe(seconds)
+        if (counter := _round_trips.get()) is not None:
+            counter[0] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return current metrics as plain data."""
+        return {
+            "pool_wait": self.pool_wait.as_dict(),
+            "round_trips": self.round_trips.as_dict(),
+            "commands": {name: s.as_dict() for name, s in sorted(self.commands.items())},
+        }
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Blocking connection pool measuring time spent waiting for connections."""
+
+    def __init__(self, metrics: RedisMetrics, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def get_connection(self, command_name=None, *keys, **options):
+        started = time.perf_counter()
+        try:
+            return await super().get_connection()
+        finally:
+            self.metrics.pool_wait.observe(time.perf_counter() - started)
+
+
+class InstrumentedRedis(Redis):
+    """Redis client measuring latency of every command it executes.
+
+    Parameters
+    ----------
+    metrics : RedisMetrics
+        The metrics collector.
+    **kwargs : Any
+        Arguments of ``Redis``.
+
+    """
+
+    def __init__(self, metrics: RedisMetrics, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            self.metrics.observe_command(str(args[0]), time.perf_counter() - started)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> "InstrumentedPipeline":
+        return InstrumentedPipeline(
+            self.metrics,
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint,
+        )
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline measuring latency of every execution as one round trip."""
+
+    def __init__(self, metrics: RedisMetrics, *args: Any):
+        super().__init__(*args)
+        self.metrics = metrics
+
+    async def execute(self, raise_on_error: bool = True):
+        if not self.command_stack:
+            return await super().execute(raise_on_error)
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            self.metrics.observe_command("PIPELINE", time.perf_counter() - started)
+
+
+def create_redis(settings: RedisSettings, metrics: RedisMetrics) -> InstrumentedRedis:
+    """Create a Redis client backed by an instrumented connection pool.
+
+    Parameters
+    ----------
+    settings : RedisSettings
+        The connection settings.
+    metrics : RedisMetrics
+        The metrics collector.
+
+    Returns
+    -------
+    InstrumentedRedis
+        The Redis client.
+
+    """
+    connection_kwargs: Dict[str, Any] = {
+        "password": settings.password,
+        "db": settings.db,
+        "socket_timeout": settings.socket_timeout,
+        "health_check_interval": settings.health_check_interval,
+    }
+    if settings.unix_socket_path:
+        connection_kwargs.update(
+            connection_class=UnixDomainSocketConnection,
+            path=settings.unix_socket_path,
+        )
+    else:
+        connection_kwargs.update(
+            host=settings.host or "localhost",
+            port=settings.port,
+            socket_connect_timeout=settings.socket_connect_timeout,
+        )
+
+    pool = InstrumentedConnectionPool(
+        metrics,
+        max_connections=settings.max_connections,
+        timeout=settings.pool_timeout,
+        **connection_kwargs,
+    )
+    redis = InstrumentedRedis(metrics, connection_pool=pool)
+    # Take ownership of the pool like ``Redis.from_pool`` does.
+    redis.auto_close_connection_pool = True
+    return redis
+
+
+class RedisMetricsMiddleware(BaseMiddleware):
+    """Update middleware counting Redis round trips per update.
+
+    Commands are counted from the moment the update reaches this
+    middleware, so the event isolation lock taken by the dispatcher before
+    it is only reflected in per-command latency. A summary is logged every
+    ``log_interval`` seconds.
+
+    Parameters
+    ----------
+    metrics : RedisMetrics
+        The metrics collector.
+    log_interval : float
+        Seconds between summary log lines, 0 disables logging.
+
+    """
+
+    def __init__(self, metrics: RedisMetrics, log_interval: float = 60.0):
+        self.metrics = metrics
+        self.log_interval = log_interval
+        self._logged_at = time.monotonic()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        counter = [0]
+        token = _round_trips.set(counter)
+        try:
+            return await handler(event, data)
+        finally:
+            _round_trips.reset(token)
+            self.metrics.round_trips.observe(counter[0])
+            self._maybe_log()
+
+    def _maybe_log(self) -> None:
+        if not self.log_interval:
+            return
+        now = time.monotonic()
+        if now - self._logged_at < self.log_interval:
+            return
+        self._logged_at = now
+        logger.info("Redis metrics.", **self.metrics.snapshot())
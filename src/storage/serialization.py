@@ -0,0 +1,76 @@
+"""JSON codecs for FSM state stored in Redis."""
+
+from datetime import date, time
+import json
+from typing import Any, Callable, Tuple
+
+import structlog
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+logger = structlog.get_logger(__name__)
+
+JsonDumps = Callable[[Any], Any]
+JsonLoads = Callable[[Any], Any]
+
+
+def to_primitive(value: Any) -> Any:
+    """Encode values dialogs put into state that JSON has no type for.
+
+    Sets, e.g. checked ids kept by handlers, become lists and dates and
+    times become ISO strings, the forms aiogram_dialog widgets keep them
+    in. Both codecs use it, so they write the same documents.
+    """
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_dumps(data: Any) -> str:
+    """Serialize state with the standard library."""
+    return json.dumps(data, default=to_primitive)
+
+
+def fast_json_dumps(data: Any) -> bytes:
+    """Serialize state with orjson.
+
+    Non-string keys are converted like the standard library does.
+    Documents with integers beyond 64 bits fall back to the standard
+    library, orjson reads such integers back as floats.
+    """
+    try:
+        return orjson.dumps(
+            data,
+            default=to_primitive,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    except orjson.JSONEncodeError:
+        return json_dumps(data).encode()
+
+
+def get_json_codec(fast: bool = False) -> Tuple[JsonDumps, JsonLoads]:
+    """Return ``json_dumps`` and ``json_loads`` for ``RedisStorage``.
+
+    Parameters
+    ----------
+    fast : bool
+        Use orjson if it is installed.
+
+    Returns
+    -------
+    tuple[Callable, Callable]
+        The serializer and the deserializer.
+
+    """
+    if fast and orjson is None:
+        logger.warning("orjson is not installed, using the standard json module.")
+    if fast and orjson is not None:
+        return fast_json_dumps, orjson.loads
+    return json_dumps, json.loads
@@ -0,0 +1,268 @@
+"""Two-tier FSM storage with an in-process cache in front of Redis."""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Sequence, Tuple, cast
+
+import structlog
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+
+from .expiry import stack_context_keys
+
+
+logger = structlog.get_logger(__name__)
+
+_MISSING = object()
+
+
+class L1Cache:
+    """Bounded LRU of raw Redis values with a per-entry time to live.
+
+    Values are kept serialized, so every read returns a fresh object just
+    like a read from Redis. ``None`` is cached for missing keys.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of cached keys.
+    ttl : float
+        Seconds an entry may be served without touching Redis.
+
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Tuple[float, str | bytes | None]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """Return the cached raw value or ``_MISSING``."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, value: str | bytes | None) -> None:
+        """Cache a raw value."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        """Drop a cached value."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        self._entries.clear()
+
+
+class TieredStorage(BaseStorage):
+    """FSM storage with a per-process L1 cache in front of ``RedisStorage``.
+
+    Writes go through to Redis and are announced on a pub/sub channel in
+    the same pipeline. Other processes drop the announced keys from their
+    L1, so a user whose updates land on the same process reads state and
+    data without any Redis round trip. Event isolation already serializes
+    updates per user, which keeps a single process consistent.
+
+    While the invalidation subscription is down the L1 is bypassed, and it
+    is cleared on reconnect because announcements may have been missed.
+    Announcements are asynchronous, so with several replicas a user whose
+    updates hop between processes may briefly see stale data; ``ttl``
+    bounds that window.
+
+    Parameters
+    ----------
+    storage : RedisStorage
+        The underlying Redis storage.
+    maxsize : int
+        Maximum number of cached keys.
+    ttl : float
+        Seconds an entry may be served without touching Redis.
+    channel : str | None
+        Pub/sub channel for invalidations, derived from the key prefix
+        by default.
+
+    """
+
+    def __init__(
+        self,
+        storage: RedisStorage,
+        maxsize: int = 10000,
+        ttl: float = 300.0,
+        channel: str | None = None,
+    ):
+        self.storage = storage
+        self.redis = storage.redis
+        self.l1 = L1Cache(maxsize=maxsize, ttl=ttl)
+        self.channel = channel or f"{getattr(storage.key_builder, 'prefix', 'fsm')}:l1"
+        self.node_id = uuid.uuid4().hex
+        self._subscribed = asyncio.Event()
+        self._listener: asyncio.Task | None = None
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Drop keys written by other processes from the L1 cache."""
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self.l1.clear()
+                    self._subscribed.set()
+                    while True:
+                        # A bounded wait keeps idle reads clear of the socket timeout.
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if message is None:
+                            continue
+                        node_id, _, redis_key = message["data"].decode().partition("|")
+                        if node_id != self.node_id:
+                            self.l1.discard(redis_key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("L1 invalidation subscription lost.", error=e)
+            finally:
+                self._subscribed.clear()
+                self.l1.clear()
+            await asyncio.sleep(1)
+
+    async def _read(self, redis_key: str, decode: bool = True) -> str | bytes | None:
+        self._ensure_listener()
+        if self._subscribed.is_set():
+            value = self.l1.get(redis_key)
+            if value is not _MISSING:
+                return value
+
+        value = await self.redis.get(redis_key)
+        # Data is handed to the storage codec as is, it may be binary.
+        if decode and isinstance(value, bytes):
+            value = value.decode("utf-8")
+        if self._subscribed.is_set():
+            self.l1.put(redis_key, value)
+        return value
+
+    async def _write(
+        self,
+        redis_key: str,
+        value: str | bytes | None,
+        ttl: Any,
+        touch: Sequence[str] = (),
+    ) -> None:
+        self._ensure_listener()
+        self.l1.discard(redis_key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if value is None:
+                pipe.delete(redis_key)
+            else:
+                pipe.set(redis_key, value, ex=ttl)
+                for touched_key in touch:
+                    pipe.expire(touched_key, ttl)
+            pipe.publish(self.channel, f"{self.node_id}|{redis_key}")
+            await pipe.execute()
+        if self._subscribed.is_set():
+            self.l1.put(redis_key, value)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """Set state for the key.
+
+        Parameters
+        ----------
+        key : StorageKey
+            The storage key.
+        state : StateType
+            The new state.
+
+        """
+        value = cast(str, state.state if isinstance(state, State) else state)
+        redis_key = self.storage.key_builder.build(key, "state")
+        await self._write(redis_key, value, self.storage.state_ttl)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        """Get state for the key.
+
+        Parameters
+        ----------
+        key : StorageKey
+            The storage key.
+
+        Returns
+        -------
+        str | None
+            The current state.
+
+        """
+        value = await self._read(self.storage.key_builder.build(key, "state"), decode=True)
+        # Decoded reads never return bytes.
+        return cast(str | None, value)
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        """Write data for the key.
+
+        Parameters
+        ----------
+        key : StorageKey
+            The storage key.
+        data : Mapping[str, Any]
+            The new data.
+
+        """
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        value = self.storage.json_dumps(data) if data else None
+        key_builder, ttl = self.storage.key_builder, self.storage.data_ttl
+        touch = stack_context_keys(key_builder, key, data) if ttl else []
+        await self._write(key_builder.build(key, "data"), value, ttl, touch)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        """Get data for the key.
+
+        Parameters
+        ----------
+        key : StorageKey
+            The storage key.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The stored data.
+
+        """
+        value = await self._read(self.storage.key_builder.build(key, "data"), decode=False)
+        if value is None:
+            return {}
+        return cast(Dict[str, Any], self.storage.json_loads(value))
+
+    def stats(self) -> Dict[str, int]:
+        """Return L1 cache counters."""
+        return {"size": len(self.l1), "hits": self.l1.hits, "misses": self.l1.misses}
+
+    async def close(self) -> None:
+        """Stop the invalidation listener and close the Redis storage."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        await self.storage.close()
@@ -0,0 +1,242 @@
+"""Multi-process supervisor for webhook mode."""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from dataclasses import dataclass
+from multiprocessing.sharedctypes import Synchronized
+from typing import Callable, List
+
+import structlog
+
+
+logger = structlog.get_logger(__name__)
+
+HEARTBEAT_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class SupervisorSettings:
+    """Worker supervisor settings.
+
+    Attributes
+    ----------
+    workers : int
+        Number of worker processes.
+    heartbeat_timeout : float
+        Seconds without a heartbeat after which a worker is restarted.
+    startup_timeout : float
+        Seconds a worker may take to start serving.
+    stop_timeout : float
+        Seconds a worker may take to drain before it is killed.
+
+    """
+
+    workers: int
+    heartbeat_timeout: float = 30.0
+    startup_timeout: float = 60.0
+    stop_timeout: float = 40.0
+
+    @classmethod
+    def from_env(cls) -> "SupervisorSettings":
+        """Read supervisor settings from environment variables.
+
+        Returns
+        -------
+        SupervisorSettings
+            Settings populated from ``MEGA_BOT_WORKER*`` variables, with the
+            number of workers defaulting to the number of usable cores.
+
+        """
+        return cls(
+            workers=int(os.getenv("MEGA_BOT_WORKERS", 0)) or os.process_cpu_count() or 1,
+            heartbeat_timeout=float(os.getenv("MEGA_BOT_WORKER_HEARTBEAT_TIMEOUT", 30)),
+            startup_timeout=float(os.getenv("MEGA_BOT_WORKER_STARTUP_TIMEOUT", 60)),
+            stop_timeout=float(os.getenv("MEGA_BOT_WORKER_STOP_TIMEOUT", 40)),
+        )
+
+
+class Worker:
+    """Handle shared between the supervisor and a worker process.
+
+    Parameters
+    ----------
+    worker_id : int
+        Index of the worker slot.
+    primary : bool
+        Whether the worker configures the webhook on startup. Only the very
+        first worker does, so restarts never drop pending updates.
+
+    """
+
+    def __init__(self, worker_id: int, primary: bool):
+        self.worker_id = worker_id
+        self.primary = primary
+        self.heartbeat: Synchronized = multiprocessing.get_context("spawn").Value("d", 0.0)
+
+    @property
+    def last_beat(self) -> float:
+        """Return the wall time of the last heartbeat, 0 before startup."""
+        return self.heartbeat.value
+
+    async def beat(self) -> None:
+        """Report liveness of the event loop until cancelled."""
+        while True:
+            self.heartbeat.value = time.time()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+
+class _Slot:
+    """A worker slot with its current process and restart backoff."""
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.worker: Worker | None = None
+        self.process: multiprocessing.process.BaseProcess | None = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.next_start = 0.0
+
+
+class Supervisor:
+    """Run and watch webhook worker processes sharing a listening port.
+
+    Workers bind the same port with ``SO_REUSEPORT`` and the kernel
+    balances connections between them. A worker that exits, never starts
+    serving or stops sending heartbeats is restarted with exponential
+    backoff. ``SIGHUP`` restarts workers one at a time, each replacement
+    serving before the old worker drains, and ``SIGTERM``/``SIGINT`` drain
+    all workers.
+
+    Parameters
+    ----------
+    target : Callable[[Worker], None]
+        Picklable worker entry point, run in a fresh interpreter.
+    settings : SupervisorSettings
+        The supervisor settings.
+
+    """
+
+    def __init__(self, target: Callable[[Worker], None], settings: SupervisorSettings):
+        self.target = target
+        self.settings = settings
+        self._context = multiprocessing.get_context("spawn")
+        self._slots: List[_Slot] = [_Slot(i) for i in range(settings.workers)]
+        self._stopping = False
+        self._reload = False
+
+    def run(self) -> None:
+        """Supervise workers until a stop signal is received."""
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+
+        logger.info("Starting workers.", workers=self.settings.workers)
+        for slot in self._slots:
+            self._start(slot, primary=slot.worker_id == 0)
+
+        while not self._stopping:
+            time.sleep(HEARTBEAT_INTERVAL)
+            if self._reload:
+                self._reload = False
+                self._rolling_restart()
+            for slot in self._slots:
+                self._check(slot)
+
+        logger.info("Stopping workers...")
+        processes = [slot.process for slot in self._slots if slot.process]
+        for process in processes:
+            self._terminate(process)
+        self._join(processes)
+        logger.info("Workers stopped.")
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self._reload = True
+
+    def _start(self, slot: _Slot, primary: bool = False) -> None:
+        slot.worker = Worker(slot.worker_id, primary=primary)
+        slot.process = self._context.Process(
+            target=self.target,
+            args=(slot.worker,),
+            name=f"bot-worker-{slot.worker_id}",
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        logger.info("Worker started.", worker_id=slot.worker_id, pid=slot.process.pid)
+
+    def _health(self, slot: _Slot) -> str | None:
+        """Return why the worker of the slot is unhealthy, if it is."""
+        if slot.process is None or not slot.process.is_alive():
+            return "exited"
+        last_beat = slot.worker.last_beat if slot.worker else 0.0
+        if not last_beat:
+            if time.monotonic() - slot.started_at > self.settings.startup_timeout:
+                return "startup timeout"
+        elif time.time() - last_beat > self.settings.heartbeat_timeout:
+            return "heartbeat timeout"
+        return None
+
+    def _check(self, slot: _Slot) -> None:
+        if slot.process is None:
+            if time.monotonic() >= slot.next_start:
+                self._start(slot)
+            return
+
+        reason = self._health(slot)
+        if reason is None:
+            if time.monotonic() - slot.started_at > self.settings.startup_timeout:
+                slot.failures = 0
+            return
+
+        logger.warning(
+            "Worker unhealthy, restarting.",
+            worker_id=slot.worker_id,
+            pid=slot.process.pid,
+            reason=reason,
+            exitcode=slot.process.exitcode,
+        )
+        if slot.process.is_alive():
+            slot.process.kill()
+        slot.process.join()
+        slot.process = None
+        slot.failures += 1
+        slot.next_start = time.monotonic() + min(2 ** (slot.failures - 1), 30)
+
+    def _rolling_restart(self) -> None:
+        logger.info("Restarting workers one by one...")
+        for slot in self._slots:
+            if self._stopping:
+                return
+            old_worker, old_process = slot.worker, slot.process
+            self._start(slot)
+            while (reason := self._health(slot)) is None and not slot.worker.last_beat:
+                time.sleep(0.1)
+            if reason is not None:
+                # Keep the old worker serving and leave the rest untouched.
+                logger.error("Replacement worker failed, restart aborted.", reason=reason)
+                self._terminate(slot.process)
+                self._join([slot.process])
+                slot.worker, slot.process = old_worker, old_process
+                return
+            if old_process is not None:
+                self._terminate(old_process)
+                self._join([old_process])
+        logger.info("Workers restarted.")
+
+    def _terminate(self, process: multiprocessing.process.BaseProcess) -> None:
+        if process.is_alive():
+            process.terminate()
+
+    def _join(self, processes: List[multiprocessing.process.BaseProcess]) -> None:
+        deadline = time.monotonic() + self.settings.stop_timeout
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("Worker did not stop in time, killing.", pid=process.pid)
+                process.kill()
+                process.join()
@@ -0,0 +1,252 @@
+"""Webhook serving mode for the bot."""
+
+import asyncio
+import os
+import signal
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from src.metrics import MetricsSettings, add_metrics_route, registry, start_metrics_server
+from src.supervisor import Worker
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class WebhookSettings:
+    """Webhook server settings.
+
+    Attributes
+    ----------
+    url : str
+        Public base URL Telegram delivers updates to.
+    path : str
+        Route the update handler is served on.
+    host : str
+        Interface the aiohttp server binds to.
+    port : int
+        Port the aiohttp server listens on.
+    secret_token : str | None
+        Value expected in the ``X-Telegram-Bot-Api-Secret-Token`` header.
+    max_in_flight : int
+        Maximum number of updates processed concurrently.
+    drain_timeout : float
+        Seconds to wait for in-flight updates on shutdown.
+
+    """
+
+    url: str
+    path: str = "/webhook"
+    host: str = "0.0.0.0"
+    port: int = 5005
+    secret_token: str | None = None
+    max_in_flight: int = 100
+    drain_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "WebhookSettings":
+        """Read webhook settings from environment variables.
+
+        Returns
+        -------
+        WebhookSettings
+            Settings populated from ``MEGA_BOT_WEBHOOK_*`` variables.
+
+        """
+        return cls(
+            url=os.getenv("MEGA_BOT_WEBHOOK_URL", ""),
+            path=os.getenv("MEGA_BOT_WEBHOOK_PATH", "/webhook"),
+            host=os.getenv("MEGA_BOT_WEBHOOK_HOST", "0.0.0.0"),
+            port=int(os.getenv("MEGA_BOT_WEBHOOK_PORT", 5005)),
+            secret_token=os.getenv("MEGA_BOT_WEBHOOK_SECRET") or None,
+            max_in_flight=int(os.getenv("MEGA_BOT_WEBHOOK_MAX_IN_FLIGHT", 100)),
+            drain_timeout=float(os.getenv("MEGA_BOT_WEBHOOK_DRAIN_TIMEOUT", 30)),
+        )
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Webhook request handler with backpressure and graceful draining.
+
+    Updates are handled in background tasks. Once ``max_in_flight`` updates
+    are being processed, new requests are held open until a slot frees up,
+    which makes Telegram slow down delivery instead of piling up tasks.
+
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        max_in_flight: int,
+        drain_timeout: float,
+        secret_token: str | None = None,
+        **data: Any,
+    ) -> None:
+        super().__init__(
+            dispatcher=dispatcher,
+            bot=bot,
+            handle_in_background=True,
+            secret_token=secret_token,
+            **data,
+        )
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._drain_timeout = drain_timeout
+        self._accepting = True
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of updates currently being processed."""
+        return len(self._background_feed_update_tasks)
+
+    async def _handle_request_background(
+        self, bot: Bot, request: web.Request
+    ) -> web.Response:
+        """Schedule an update for processing once a slot is available.
+
+        Parameters
+        ----------
+        bot : Bot
+            The bot the update belongs to.
+        request : web.Request
+            The incoming webhook request.
+
+        Returns
+        -------
+        web.Response
+            Empty JSON response, or 503 when the server is draining.
+
+        """
+        if not self._accepting:
+            return web.Response(status=503)
+        update = await request.json(loads=bot.session.json_loads)
+
+        await self._slots.acquire()
+        if not self._accepting:
+            # Telegram redelivers the update to the next process.
+            self._slots.release()
+            return web.Response(status=503)
+
+        task = asyncio.create_task(self._feed_update(bot, update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._background_feed_update_tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _feed_update(self, bot: Bot, update: dict[str, Any]) -> None:
+        try:
+            await self._background_feed_update(bot=bot, update=update)
+        except Exception:
+            logger.exception("Failed to process webhook update.")
+        finally:
+            self._slots.release()
+
+    async def drain(self) -> None:
+        """Stop accepting updates and wait for in-flight ones to finish."""
+        self._accepting = False
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return
+
+        logger.info("Draining in-flight updates...", count=len(tasks))
+        _, pending = await asyncio.wait(tasks, timeout=self._drain_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+            logger.warning("Cancelled updates after drain timeout.", count=len(pending))
+        logger.info("In-flight updates drained.")
+
+    async def close(self) -> None:
+        """Drain in-flight updates and close the bot session."""
+        await self.drain()
+        await super().close()
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    settings: WebhookSettings,
+    worker: Worker | None = None,
+    metrics: MetricsSettings | None = None,
+) -> None:
+    """Serve updates through an aiohttp webhook server until stopped.
+
+    Parameters
+    ----------
+    dp : Dispatcher
+        The dispatcher updates are fed into.
+    bot : Bot
+        The bot instance.
+    settings : WebhookSettings
+        The webhook server settings.
+    worker : Worker | None
+        The supervisor handle when running as one of several workers. The
+        port is then shared with ``SO_REUSEPORT`` and only the primary
+        worker configures the webhook.
+    metrics : MetricsSettings | None
+        Metrics endpoint settings, metrics are not served if not set. On
+        the webhook port the endpoint shares the webhook server, otherwise
+        a separate server is started, offset by the worker id so every
+        worker can be scraped on its own port.
+
+    """
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        max_in_flight=settings.max_in_flight,
+        drain_timeout=settings.drain_timeout,
+        secret_token=settings.secret_token,
+    )
+    # Registered before the dispatcher hooks so updates are drained
+    # before storage is closed on shutdown.
+    handler.register(app, path=settings.path)
+    metrics_runner = None
+    if metrics is not None and metrics.port == settings.port:
+        add_metrics_route(app, registry, metrics.path)
+    elif metrics is not None:
+        port = metrics.port + (worker.worker_id if worker else 0)
+        metrics_runner = await start_metrics_server(registry, metrics, port=port)
+    setup_application(
+        app,
+        dp,
+        bot=bot,
+        webhook_settings=settings,
+        configure_webhook=worker is None or worker.primary,
+    )
+
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    site = web.TCPSite(
+        runner,
+        host=settings.host,
+        port=settings.port,
+        reuse_port=worker is not None,
+    )
+    await site.start()
+    logger.info(
+        "Webhook server started.",
+        host=settings.host,
+        port=settings.port,
+        path=settings.path,
+    )
+    heartbeat = asyncio.create_task(worker.beat()) if worker else None
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Stopping webhook server...")
+        if heartbeat is not None:
+            heartbeat.cancel()
+        await runner.cleanup()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
@@ -0,0 +1,8 @@
+from src.api import BotApiSettings
+
+
+def test_api_url_points_bot_to_custom_server():
+    """Test that method URLs are built from the configured base URL."""
+    server = BotApiSettings(url="http://127.0.0.1:8081/").server
+
+    assert server.api_url("42:TOKEN", "getMe") == "http://127.0.0.1:8081/bot42:TOKEN/getMe"
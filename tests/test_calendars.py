@@ -0,0 +1,41 @@
+from datetime import date
+from types import SimpleNamespace
+
+from aiogram.types import InlineKeyboardButton
+from aiogram_dialog.widgets.kbd import CalendarScope
+from aiogram_dialog.widgets.kbd.calendar_kbd import CalendarConfig
+
+from src.functions.custom.calendars import CustomCalendar, KeyboardCache
+
+
+def make_manager(language_code: str) -> SimpleNamespace:
+    user = SimpleNamespace(language_code=language_code)
+    return SimpleNamespace(event=SimpleNamespace(from_user=user), is_preview=lambda: False)
+
+
+async def test_calendar_keyboard_is_shared_between_users():
+    """Test that users with the same locale reuse a rendered keyboard."""
+    view = CustomCalendar(id="calendar").views[CalendarScope.DAYS]
+    view.cache = KeyboardCache()
+    offset = date(2025, 6, 1)
+
+    first = await view.render(CalendarConfig(), offset, {}, make_manager("en"))
+    second = await view.render(CalendarConfig(), offset, {}, make_manager("en"))
+    await view.render(CalendarConfig(), offset, {}, make_manager("ru"))
+
+    assert first == second
+    assert first[0][0] is not second[0][0]
+    assert view.cache.stats() == {"size": 2, "hits": 1, "misses": 2}
+
+
+def test_keyboard_cache_evicts_least_recently_used():
+    """Test that the cache stays bounded."""
+    cache = KeyboardCache(maxsize=2)
+    button = InlineKeyboardButton(text="1", callback_data="1")
+    for key in ("a", "b"):
+        cache.put(key, [[button]])
+    cache.get("a")
+    cache.put("c", [[button]])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
@@ -0,0 +1,33 @@
+from dialog_yml import FuncsRegistry
+
+from src.dialog_cache import compute_cache_key
+
+
+def test_cache_key_changes_with_included_file(tmp_path):
+    """Test that editing any YAML file invalidates the cache key."""
+    (tmp_path / "main.yaml").write_text("dialogs:\n  Menu: !include menu.yaml\n")
+    included = tmp_path / "menu.yaml"
+    included.write_text("windows: {}\n")
+    registry = FuncsRegistry()
+
+    key = compute_cache_key(str(tmp_path), registry)
+    assert compute_cache_key(str(tmp_path), registry) == key
+
+    included.write_text("windows: {MAIN: {widgets: []}}\n")
+    assert compute_cache_key(str(tmp_path), registry) != key
+
+
+def test_cache_key_depends_on_registered_functions(tmp_path):
+    """Test that registering a new function invalidates the cache key."""
+    (tmp_path / "main.yaml").write_text("dialogs: {}\n")
+    registry = FuncsRegistry()
+    key = compute_cache_key(str(tmp_path), registry)
+
+    def cache_key_probe():
+        pass
+
+    registry.func.register(cache_key_probe)
+    try:
+        assert compute_cache_key(str(tmp_path), registry) != key
+    finally:
+        registry.func._functions.pop("cache_key_probe")
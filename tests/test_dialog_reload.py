@@ -0,0 +1,71 @@
+import asyncio
+
+from aiogram import Router
+from aiogram_dialog import Dialog
+from dialog_yml import DialogYAMLBuilder
+
+from src.dialog_reload import DialogReloader
+
+
+DIALOG = "windows:\n  MAIN:\n    widgets:\n      - text: {text}\n{extra}"
+
+
+def _write(path, name, text, extra=""):
+    (path / f"{name}.yaml").write_text(DIALOG.format(text=text, extra=extra))
+
+
+def _dialogs(router: Router) -> dict:
+    return {r.states_group_name(): r for r in router.sub_routers if isinstance(r, Dialog)}
+
+
+async def test_reload_swaps_changed_dialogs_and_rolls_back_on_errors(tmp_path):
+    """Test that only changed dialogs are swapped and broken changes are rejected."""
+    (tmp_path / "main.yaml").write_text(
+        "dialogs:\n  ReloadA: !include a.yaml\n  ReloadB: !include b.yaml\n"
+    )
+    _write(tmp_path, "a", "Hello")
+    _write(tmp_path, "b", "World")
+    router = DialogYAMLBuilder.build("main.yaml", str(tmp_path), router=Router()).router
+    reloader = DialogReloader(router)
+    before = _dialogs(router)
+
+    _write(tmp_path, "a", "Hello again")
+    assert await reloader.reload() == ["ReloadA"]
+    after = _dialogs(router)
+    assert after["ReloadA"] is not before["ReloadA"]
+    assert after["ReloadA"].states_group() is before["ReloadA"].states_group()
+    assert after["ReloadB"] is before["ReloadB"]
+    assert reloader.registry.find_dialog(after["ReloadA"].states()[0]) is after["ReloadA"]
+
+    # Removing a window would break stacks of users in it.
+    (tmp_path / "b.yaml").write_text("windows:\n  OTHER:\n    widgets:\n      - text: x\n")
+    assert await reloader.reload() == []
+    _write(tmp_path, "b", "World", extra="      - unknown_widget: null\n")
+    assert await reloader.reload() == []
+    assert reloader.failures == 2
+    assert _dialogs(router) == after
+
+
+async def test_reload_publishes_new_states_with_the_swap(tmp_path):
+    """Test that states of added windows are only visible once the dialogs swap."""
+    (tmp_path / "main.yaml").write_text("dialogs:\n  ReloadC: !include c.yaml\n")
+    _write(tmp_path, "c", "Hello")
+    router = DialogYAMLBuilder.build("main.yaml", str(tmp_path), router=Router()).router
+    reloader = DialogReloader(router)
+    states = reloader.states_manager
+    group = states.get_by_name("ReloadC")
+
+    extra = "  EXTRA:\n    widgets:\n      - text: More\n"
+    _write(tmp_path, "c", "Hello", extra=extra + "      - unknown_widget: null\n")
+    assert await reloader.reload() == []
+    assert states.get_by_name("ReloadC") is group
+
+    _write(tmp_path, "c", "Hello", extra=extra)
+    await asyncio.to_thread(reloader._prepare)
+    assert states.get_by_name("ReloadC:EXTRA") is None
+
+    assert await reloader.reload() == ["ReloadC"]
+    dialog = _dialogs(router)["ReloadC"]
+    assert states.get_by_name("ReloadC") is not group
+    assert dialog.states_group() is type(states.get_by_name("ReloadC"))
+    assert reloader.registry.find_dialog(states.get_by_name("ReloadC:EXTRA")) is dialog
@@ -0,0 +1,51 @@
+import asyncio
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendMessage
+
+from src.flood_control import FloodControlMiddleware, FloodControlSettings
+
+
+class FakeApi:
+    def __init__(self, flood_on=None):
+        self.sent = []
+        self.flood_on = flood_on
+
+    async def __call__(self, bot, method):
+        if method is self.flood_on:
+            self.flood_on = None
+            raise TelegramRetryAfter(method, "Too Many Requests", retry_after=0)
+        self.sent.append(method)
+        await asyncio.sleep(0)
+        return getattr(method, "text", None) or True
+
+
+async def test_edits_are_coalesced_and_answers_go_first():
+    """Test that only the latest waiting edit is sent, after the answer."""
+    api = FakeApi()
+    middleware = FloodControlMiddleware(FloodControlSettings(global_rate=1))
+    middleware._global.tokens = 0
+
+    first = EditMessageText(chat_id=1, message_id=7, text="1")
+    latest = EditMessageText(chat_id=1, message_id=7, text="2")
+    answer = AnswerCallbackQuery(callback_query_id="1")
+    results = await asyncio.gather(
+        middleware(api, None, first),
+        middleware(api, None, latest),
+        middleware(api, None, answer),
+    )
+
+    assert results == ["2", "2", True]
+    assert api.sent == [answer, latest]
+    assert middleware.coalesced == 1
+
+
+async def test_retry_after_blocks_chat_and_retries():
+    """Test that a request answered with retry_after is sent again."""
+    method = SendMessage(chat_id=1, text="hi")
+    api = FakeApi(flood_on=method)
+    middleware = FloodControlMiddleware(FloodControlSettings())
+
+    assert await middleware(api, None, method) == "hi"
+    assert api.sent == [method]
+    assert middleware.retried == 1
@@ -0,0 +1,37 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.functions.cache import cached_getter, getter_cache
+
+
+async def test_concurrent_misses_load_once():
+    """Test that concurrent renders share a single getter call."""
+    calls = []
+
+    @cached_getter(ttl=60)
+    async def slow_getter(**_kwargs):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"items": [1, 2, 3]}
+
+    results = await asyncio.gather(*(slow_getter() for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(result == {"items": [1, 2, 3]} for result in results)
+    assert getter_cache(slow_getter).stats() == {"size": 1, "hits": 4, "misses": 1}
+
+
+async def test_results_vary_on_middleware_data():
+    """Test that the cache key is derived from the chosen data."""
+
+    @cached_getter(ttl=60, vary_on=("event_from_user.language_code",))
+    async def locale_getter(event_from_user, **_kwargs):
+        return {"locale": event_from_user.language_code}
+
+    en = await locale_getter(event_from_user=SimpleNamespace(language_code="en"))
+    ru = await locale_getter(event_from_user=SimpleNamespace(language_code="ru"))
+    en["locale"] = "changed"
+
+    again = await locale_getter(event_from_user=SimpleNamespace(language_code="en"))
+    assert (again, ru) == ({"locale": "en"}, {"locale": "ru"})
+    assert getter_cache(locale_getter).stats()["hits"] == 1
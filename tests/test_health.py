@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from fakeredis.aioredis import FakeRedis
+
+from src import health
+from src.health import HealthMonitor, HealthSettings, LoopLagMonitor
+
+
+async def test_ready_after_successful_api_call():
+    """Test that readiness waits for a Bot API call and pings Redis."""
+    monitor = HealthMonitor(FakeRedis(), HealthSettings())
+
+    assert (await monitor.readiness())["ok"] is False
+
+    async def make_request(bot, method):
+        return True
+
+    await monitor.api_middleware(make_request, None, None)
+    report = await monitor.readiness()
+
+    assert report["ok"] is True
+    assert report["redis"] is True
+    assert report["last_update_age"] is None
+
+
+async def test_loop_block_is_logged_with_stack_and_fails_health(monkeypatch):
+    """Test that one lag sample logs the block and feeds the liveness report."""
+    records = []
+    monkeypatch.setattr(health.logger, "warning", lambda event, **kw: records.append(kw))
+    loop = LoopLagMonitor(block_threshold=0.1, capture_stacks=True)
+    monitor = HealthMonitor(settings=HealthSettings(max_loop_lag=0.1), loop=loop)
+    loop.start()
+    await asyncio.sleep(0.05)
+    time.sleep(0.3)
+    await asyncio.sleep(0.01)
+
+    report = monitor.health()
+    loop.stop()
+
+    assert loop.blocks == 1
+    assert records[0]["seconds"] >= 0.1
+    assert "time.sleep(0.3)" in records[0]["stack"]
+    assert report["ok"] is False
+    assert report["loop_lag"] == records[0]["seconds"]
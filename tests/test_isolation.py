@@ -0,0 +1,38 @@
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+
+from src.storage import ShardedEventIsolation
+
+
+def make_key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+
+async def test_events_of_one_user_are_serialized():
+    """Test that a user's events run one at a time and locks are dropped after."""
+    isolation = ShardedEventIsolation(shards=4)
+    active = []
+    overlaps = []
+
+    async def handle(user_id: int) -> None:
+        async with isolation.lock(make_key(user_id)):
+            overlaps.append(user_id in active)
+            active.append(user_id)
+            await asyncio.sleep(0)
+            active.remove(user_id)
+
+    await asyncio.gather(*(handle(user_id) for user_id in (1, 1, 1, 2, 2)))
+
+    assert not any(overlaps)
+    assert len(isolation) == 0
+
+
+async def test_events_of_different_users_run_concurrently():
+    """Test that locks of different users are independent."""
+    isolation = ShardedEventIsolation(shards=1)
+
+    async with isolation.lock(make_key(1)):
+        async with asyncio.timeout(1):
+            async with isolation.lock(make_key(2)):
+                assert len(isolation) == 2
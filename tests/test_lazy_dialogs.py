@@ -0,0 +1,85 @@
+from aiogram import Router
+from aiogram_dialog import Dialog
+
+from src.bot import get_dialog_router
+from src.lazy_dialogs import DialogWarmUp, LazyDialog, LazyDialogYAMLBuilder
+
+
+DIALOG = (
+    "windows:\n  MAIN:\n    widgets:\n      - text: {text}\n  NEXT:\n    widgets: []\n"
+)
+
+
+async def test_dialogs_are_registered_up_front_and_built_on_first_use(tmp_path):
+    """Test that lazy dialogs resolve their states and build windows when used."""
+    (tmp_path / "main.yaml").write_text(
+        "dialogs:\n  LazyA: !include a.yaml\n  LazyB: !include b.yaml\n"
+    )
+    (tmp_path / "a.yaml").write_text(DIALOG.format(text="A"))
+    (tmp_path / "b.yaml").write_text(DIALOG.format(text="B"))
+    builder = LazyDialogYAMLBuilder.build("main.yaml", str(tmp_path), router=Router())
+    dialogs = {
+        d.states_group_name(): d
+        for d in builder.router.sub_routers
+        if isinstance(d, LazyDialog)
+    }
+
+    assert not any(d.is_built for d in dialogs.values())
+    assert dialogs["LazyA"].states() == [
+        builder.states.LazyA.MAIN,
+        builder.states.LazyA.NEXT,
+    ]
+
+    assert list(dialogs["LazyA"].windows) == dialogs["LazyA"].states()
+    assert dialogs["LazyA"].is_built
+    assert not dialogs["LazyB"].is_built
+
+    warm_up = DialogWarmUp(builder.router, ["*"])
+    await warm_up.start()
+    await warm_up._task
+    assert dialogs["LazyB"].is_built
+
+
+async def test_warm_up_builds_dialogs_of_the_bot_router():
+    """Test that warming up builds the lazy dialogs of the bot's own router."""
+    router = get_dialog_router(lazy=True)
+    dialogs = [
+        d for d in router.sub_routers if isinstance(d, Dialog) and hasattr(d, "is_built")
+    ]
+    assert dialogs
+    assert not any(d.is_built for d in dialogs)
+
+    warm_up = DialogWarmUp(router, ["*"])
+    await warm_up.start()
+    await warm_up._task
+    assert all(d.is_built for d in dialogs)
+
+
+async def test_cache_is_written_once_all_dialogs_are_built(tmp_path):
+    """Test that a cold lazy start writes the dialogs cache after the warm-up."""
+    (tmp_path / "main.yaml").write_text(
+        "dialogs:\n  LazyC: !include c.yaml\n  LazyD: !include d.yaml\n"
+    )
+    (tmp_path / "c.yaml").write_text(DIALOG.format(text="C"))
+    (tmp_path / "d.yaml").write_text(DIALOG.format(text="D"))
+    cache_dir = str(tmp_path / "cache")
+    builder = LazyDialogYAMLBuilder.build(
+        "main.yaml", str(tmp_path), router=Router(), cache_dir=cache_dir
+    )
+    assert builder.cache_path is not None
+
+    warm_up = DialogWarmUp(builder.router, ["LazyC"])
+    await warm_up.start()
+    await warm_up._task
+    assert not builder.cache_path.exists()
+    warm_up = DialogWarmUp(builder.router, ["*"])
+    await warm_up.start()
+    await warm_up._task
+    assert builder.cache_path.exists()
+
+    cached = LazyDialogYAMLBuilder.build(
+        "main.yaml", str(tmp_path), router=Router(), cache_dir=cache_dir
+    )
+    assert cached._load_cache() is not None
+    dialog = next(d for d in cached.router.sub_routers if isinstance(d, LazyDialog))
+    assert list(dialog.windows) == [cached.states.LazyC.MAIN, cached.states.LazyC.NEXT]
@@ -0,0 +1,15 @@
+from src.functions.custom.locales import DEFAULT_LOCALE_NAMES, get_locale_names
+
+
+def test_locale_names_are_localized():
+    """Test that tables hold localized, title-cased names."""
+    names = get_locale_names("ru")
+    assert names.month(1) == "Январь"
+    assert names.weekday(0) == "Пн"
+
+
+def test_unknown_locale_falls_back_to_default():
+    """Test that unknown and missing codes share the default table."""
+    assert get_locale_names("xx-unknown") is DEFAULT_LOCALE_NAMES
+    assert get_locale_names(None) is DEFAULT_LOCALE_NAMES
+    assert DEFAULT_LOCALE_NAMES.month(12) == "December"
@@ -0,0 +1,55 @@
+import json
+import logging
+
+import pytest
+import structlog
+
+from src import logs
+from src.logs import EventSampler, LogSettings, setup_logger
+
+
+def test_sampling_settings_from_env(monkeypatch):
+    """Test parsing of per-event sampling rates."""
+    monkeypatch.setenv("MEGA_BOT_LOG_SAMPLING", "User started conversation.=0.1; noisy=0")
+
+    settings = LogSettings.from_env()
+
+    assert settings.sampling == {"User started conversation.": 0.1, "noisy": 0.0}
+
+
+def test_sampler_drops_only_sampled_events():
+    """Test that events without a rate are always kept."""
+    sampler = EventSampler({"noisy": 0.0})
+
+    assert sampler(None, "info", {"event": "other"}) == {"event": "other"}
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", {"event": "noisy"})
+
+
+def test_workers_write_their_own_log_files():
+    """Test that supervisor workers never share a rotating log file."""
+    settings = LogSettings(file="logs/bot.log")
+
+    assert settings.for_worker(1).file == "logs/bot.worker-1.log"
+    assert LogSettings().for_worker(1).file is None
+
+
+def test_json_records_are_written_to_the_log_file(tmp_path):
+    """Test the queue listener rendering records as JSON lines into the file."""
+    path = tmp_path / "bot.log"
+    setup_logger(LogSettings(format="json", file=str(path)))
+    try:
+        structlog.get_logger("test").info("Hello.", user_id=1000, chat={1: "one"})
+        logging.getLogger("stdlib").warning("Plain.")
+    finally:
+        logs._stop_listener()
+        logging.getLogger().handlers.clear()
+        structlog.reset_defaults()
+
+    first, second = [json.loads(line) for line in path.read_text().splitlines()]
+    assert first["event"] == "Hello."
+    assert first["user_id"] == 1000
+    assert first["chat"] == {"1": "one"}
+    assert first["level"] == "info"
+    assert second["event"] == "Plain."
+    assert second["logger"] == "stdlib"
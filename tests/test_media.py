@@ -0,0 +1,40 @@
+import os
+
+from aiogram.types import ContentType
+from aiogram_dialog.api.entities import MediaId
+from fakeredis.aioredis import FakeRedis
+
+from src.media import RedisMediaIdStorage
+
+
+async def test_file_id_is_dropped_when_the_file_changes(tmp_path):
+    """Test the save/get round trip and that edited files are uploaded again."""
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"first")
+    storage = RedisMediaIdStorage(FakeRedis(), max_hashes=1)
+    media_id = MediaId("file-id", "unique-id")
+
+    await storage.save_media_id(str(path), None, ContentType.PHOTO, media_id)
+    assert await storage.get_media_id(str(path), None, ContentType.PHOTO) == media_id
+    assert await storage.get_media_id(str(path), None, ContentType.VIDEO) is None
+
+    path.write_bytes(b"second")
+    os.utime(path, ns=(0, 0))
+    assert await storage.get_media_id(str(path), None, ContentType.PHOTO) is None
+
+
+async def test_url_media_and_bounded_hash_memo(tmp_path):
+    """Test that URL media need no hash and only max_hashes hashes are kept."""
+    storage = RedisMediaIdStorage(FakeRedis(), max_hashes=1)
+    media_id = MediaId("file-id")
+    url = "https://example.com/a.png"
+
+    await storage.save_media_id(None, url, ContentType.PHOTO, media_id)
+    assert await storage.get_media_id(None, url, ContentType.PHOTO) == media_id
+
+    for name in ("a", "b"):
+        (tmp_path / name).write_bytes(name.encode())
+        await storage.save_media_id(
+            str(tmp_path / name), None, ContentType.PHOTO, media_id
+        )
+    assert list(storage._hashes) == [str(tmp_path / "b")]
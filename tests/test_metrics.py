@@ -0,0 +1,31 @@
+from src.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the text exposition of a labelled histogram."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("state",), (0.1, 1))
+    histogram.observe(0.05, "Menu:MAIN")
+    histogram.observe(0.5, "Menu:MAIN")
+
+    lines = registry.render().splitlines()
+
+    assert 'latency_seconds_bucket{state="Menu:MAIN",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{state="Menu:MAIN",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{state="Menu:MAIN",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{state="Menu:MAIN"} 2' in lines
+
+
+def test_counter_with_collector():
+    """Test that counters and collectors are rendered together."""
+    registry = MetricsRegistry()
+    counter = registry.counter("updates_total", "Updates.", ("type",))
+    counter.inc("message")
+    counter.inc("message")
+    registry.add_collector(lambda: ["extra 1"])
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE updates_total counter" in lines
+    assert 'updates_total{type="message"} 2' in lines
+    assert lines[-1] == "extra 1"
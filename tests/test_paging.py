@@ -0,0 +1,37 @@
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram_dialog.widgets.kbd import Select
+from aiogram_dialog.widgets.text import Format
+
+from src.functions.custom.paging import PagedScrollingGroup, SequenceSource
+
+
+async def test_only_current_page_is_rendered():
+    """Test that a paged source is loaded one page at a time."""
+    items = [(f"Product {i}", i) for i in range(1, 30)]
+    group = PagedScrollingGroup(
+        Select(
+            Format("{item[0]}"),
+            id="select",
+            items="products",
+            item_id_getter=lambda item: item[1],
+        ),
+        id="scroll",
+        width=2,
+        height=3,
+        hide_pager=True,
+    )
+    group.get_page = AsyncMock(return_value=4)
+    manager = MagicMock()
+    data = {"products": SequenceSource(items)}
+
+    keyboard = await group._render_keyboard(data, manager)
+
+    assert await group.get_page_count(data, manager) == 5
+    assert [button.text for row in keyboard for button in row] == [
+        "Product 25",
+        "Product 26",
+        "Product 27",
+        "Product 28",
+        "Product 29",
+    ]
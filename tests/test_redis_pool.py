@@ -0,0 +1,57 @@
+import asyncio
+
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeAsyncRedisConnection
+
+from src.storage import (
+    InstrumentedConnectionPool,
+    InstrumentedRedis,
+    RedisMetrics,
+    RedisMetricsMiddleware,
+)
+
+
+def _pool(metrics: RedisMetrics) -> InstrumentedConnectionPool:
+    return InstrumentedConnectionPool(
+        metrics,
+        max_connections=1,
+        timeout=1,
+        connection_class=FakeAsyncRedisConnection,
+        server=FakeServer(),
+    )
+
+
+async def test_pool_measures_time_waiting_for_a_connection():
+    """Test that waiting for a busy connection is recorded as pool wait."""
+    metrics = RedisMetrics()
+    pool = _pool(metrics)
+    connection = await pool.get_connection()
+    waiting = asyncio.create_task(pool.get_connection())
+    await asyncio.sleep(0.1)
+    await pool.release(connection)
+    await pool.release(await waiting)
+
+    assert metrics.pool_wait.count == 2
+    assert metrics.pool_wait.max >= 0.1
+    await pool.disconnect()
+
+
+async def test_middleware_counts_round_trips_per_update():
+    """Test that commands issued while handling an update are counted."""
+    metrics = RedisMetrics()
+    redis = InstrumentedRedis(metrics, connection_pool=_pool(metrics))
+    middleware = RedisMetricsMiddleware(metrics, log_interval=0)
+
+    async def handler(event, data):
+        await redis.set("key", 1)
+        await redis.get("key")
+        await redis.pipeline().incr("key").expire("key", 10).execute()
+
+    await middleware(handler, None, {})
+    await redis.get("key")
+
+    assert metrics.round_trips.as_dict() == {"count": 1, "mean": 3.0, "max": 3.0}
+    assert metrics.commands["SET"].count == 1
+    assert metrics.commands["GET"].count == 2
+    assert metrics.commands["PIPELINE"].count == 1
+    await redis.aclose()
@@ -0,0 +1,58 @@
+import mmap
+from types import SimpleNamespace
+
+from aiogram_dialog.widgets.text import Format
+
+from src.functions.custom.scrolling_text import IndexedScrollingText, PageIndex
+
+
+def test_pages_end_on_word_boundaries():
+    """Test that pages are split between words and cover the whole text."""
+    text = "lorem ipsum dolor sit amet " * 40
+    index = PageIndex(text, page_size=50)
+
+    pages = [index.page(i) for i in range(len(index))]
+
+    assert "".join(pages) == text
+    assert all(len(page) <= 50 and page.endswith(" ") for page in pages[:-1])
+
+
+def test_html_tags_are_balanced_across_pages():
+    """Test that open tags are closed and reopened at page boundaries."""
+    text = "<b>" + "bold word " * 10 + "</b> tail &amp; end"
+    index = PageIndex(text, page_size=30, html=True)
+
+    pages = [index.page(i) for i in range(len(index))]
+
+    assert pages[0].startswith("<b>") and pages[0].endswith("</b>")
+    assert pages[1].startswith("<b>")
+    assert all(page.count("<b>") == page.count("</b>") for page in pages)
+
+
+def test_mapped_file_never_splits_characters(tmp_path):
+    """Test that byte pages of a mapped file decode cleanly."""
+    path = tmp_path / "manual.txt"
+    path.write_text("Привет" * 100, encoding="utf-8")
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        index = PageIndex(mapped, page_size=25)
+
+        pages = [index.page(i) for i in range(len(index))]
+
+    assert "".join(pages) == "Привет" * 100
+
+
+async def test_formatted_texts_of_different_users_keep_their_indexes():
+    """Test that indexes of recently rendered texts are reused per text."""
+    widget = IndexedScrollingText(
+        Format("{name} " * 20), id="text", page_size=20, max_indexes=2
+    )
+    manager = SimpleNamespace(is_preview=lambda: False)
+
+    alice = await widget.get_index({"name": "Alice"}, manager)
+    bob = await widget.get_index({"name": "Bob"}, manager)
+    assert await widget.get_index({"name": "Alice"}, manager) is alice
+
+    await widget.get_index({"name": "Carol"}, manager)
+    assert await widget.get_index({"name": "Alice"}, manager) is alice
+    assert await widget.get_index({"name": "Bob"}, manager) is not bob
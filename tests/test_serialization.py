@@ -0,0 +1,15 @@
+from datetime import date
+
+import pytest
+
+from src.storage.serialization import get_json_codec
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_codecs_store_dialog_types_alike(fast):
+    """Test that sets, dates and integer keys are stored the same way."""
+    dumps, loads = get_json_codec(fast)
+
+    data = loads(dumps({"checked": {"3"}, "day": date(2026, 10, 15), 7: "counter"}))
+
+    assert data == {"checked": ["3"], "day": "2026-10-15", "7": "counter"}
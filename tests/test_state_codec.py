@@ -0,0 +1,33 @@
+from aiogram.fsm.storage.base import StorageKey
+from fakeredis.aioredis import FakeRedis
+import pytest
+
+from src.storage import CodecRedisStorage, get_state_codec
+from src.storage.codec import FLAG_ZSTD, MAGIC, VERSION
+
+
+pytest.importorskip("msgpack")
+pytest.importorskip("zstandard")
+
+KEY = StorageKey(bot_id=42, chat_id=1000, user_id=1000)
+DATA = {"widget_data": {"multi_select": ["1", "4"], "counter": 7}, "name": "x" * 600}
+
+
+async def test_legacy_json_is_read_and_migrated_on_write():
+    """Test that JSON written before keeps working and is rewritten as msgpack."""
+    redis = FakeRedis()
+    legacy = CodecRedisStorage(redis, json_dumps=get_state_codec()[0])
+    await legacy.set_data(KEY, DATA)
+    dumps, loads = get_state_codec("msgpack", compress_min=512)
+    storage = CodecRedisStorage(redis, json_dumps=dumps, json_loads=loads)
+
+    assert await storage.get_data(KEY) == DATA
+
+    await storage.set_data(KEY, DATA)
+    raw = await redis.get(storage.key_builder.build(KEY, "data"))
+
+    assert raw[:2] == bytes((MAGIC, VERSION))
+    assert raw[2] & FLAG_ZSTD
+    assert await storage.get_data(KEY) == DATA
+    # Switching back to JSON still reads binary values.
+    assert get_state_codec("json")[1](raw) == DATA
@@ -0,0 +1,97 @@
+from typing import List, Tuple
+
+from aiogram import Bot
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import DefaultKeyBuilder
+from aiogram.fsm.storage.memory import SimpleEventIsolation
+from aiogram_dialog.api.entities import Context, Stack
+from aiogram_dialog.context.storage import StorageProxy
+from fakeredis.aioredis import FakeRedis
+
+from src.storage import CodecRedisStorage, ExpirySettings, StateSweeper
+
+
+class Menu(StatesGroup):
+    MAIN = State()
+
+
+def _storage(redis: FakeRedis, ttl: int | None = None) -> CodecRedisStorage:
+    return CodecRedisStorage(
+        redis,
+        key_builder=DefaultKeyBuilder(prefix="test:fsm", with_destiny=True),
+        state_ttl=ttl,
+        data_ttl=ttl,
+    )
+
+
+def _proxy(storage: CodecRedisStorage, chat_id: int = 1000) -> StorageProxy:
+    """Return the storage aiogram_dialog uses for user 1000 in a chat."""
+    return StorageProxy(
+        storage,
+        SimpleEventIsolation(),
+        user_id=1000,
+        chat_id=chat_id,
+        thread_id=None,
+        business_connection_id=None,
+        bot=Bot("42:TOKEN"),
+        state_groups={"Menu": Menu},
+    )
+
+
+async def _push(proxy: StorageProxy, count: int) -> Tuple[Stack, List[str]]:
+    """Open dialogs on the default stack and save them like aiogram_dialog."""
+    stack = await proxy.load_stack()
+    contexts = [stack.push(Menu.MAIN, None) for _ in range(count)]
+    for context in contexts:
+        await proxy.save_context(context)
+    await proxy.save_stack(stack)
+    await proxy.unlock()
+    return stack, [context.id for context in contexts]
+
+
+def _context_key(proxy: StorageProxy, intent_id: str) -> str:
+    return proxy.storage.key_builder.build(proxy._context_key(intent_id), "data")
+
+
+async def test_stack_write_refreshes_context_ttls():
+    """Test that saving a stack keeps the contexts below its top alive."""
+    redis = FakeRedis()
+    proxy = _proxy(_storage(redis, ttl=600))
+    stack, (bottom, _) = await _push(proxy, 2)
+    await redis.expire(_context_key(proxy, bottom), 5)
+
+    await proxy.save_stack(stack)
+
+    assert await redis.ttl(_context_key(proxy, bottom)) == 600
+
+
+async def test_sweep_removes_orphans_and_sets_missing_ttls(tmp_path):
+    """Test that orphaned contexts are archived and removed and legacy keys expire."""
+    redis = FakeRedis()
+    storage = _storage(redis)
+    private, group = _proxy(storage), _proxy(storage, chat_id=-500)
+    stack, (live, closed) = await _push(private, 2)
+    stack.pop()
+    await private.save_stack(stack)
+    gone = Context(_intent_id="C", _stack_id="gone", state=Menu.MAIN, start_data=None)
+    await private.save_context(gone)
+    # The default stack of a group member is stored under a per-user id.
+    group_stack, (member,) = await _push(group, 1)
+    assert group_stack.id == "<1000>"
+    await redis.set("test:fsm:sweep_lock", 1)
+
+    settings = ExpirySettings(ttl=600, orphan_grace=0, archive_dir=str(tmp_path))
+    report = await StateSweeper(storage, settings).sweep()
+
+    assert report.scanned == 6
+    assert report.orphaned == 2
+    assert report.bytes_reclaimed > 0
+    assert report.expiry_set == 4
+    kept = [_context_key(private, live), _context_key(group, member)]
+    assert await redis.exists(*kept) == 2
+    removed = [_context_key(private, closed), _context_key(private, gone.id)]
+    assert await redis.exists(*removed) == 0
+    assert 0 < await redis.ttl(kept[0]) <= 600
+    assert await redis.ttl("test:fsm:sweep_lock") == -1
+    (archive,) = tmp_path.iterdir()
+    assert len(archive.read_text().splitlines()) == 2
@@ -0,0 +1,39 @@
+import time
+
+from src.supervisor import Supervisor, SupervisorSettings, Worker
+
+
+def _crash_first_start(worker: Worker) -> None:
+    # Only the very first start is primary, respawned workers run normally.
+    if worker.primary:
+        raise SystemExit(3)
+    worker.heartbeat.value = time.time()
+    time.sleep(30)
+
+
+def test_crashed_worker_is_respawned_after_backoff():
+    """Test that an exited worker is detected and started again in a spawn context."""
+    supervisor = Supervisor(_crash_first_start, SupervisorSettings(workers=1))
+    (slot,) = supervisor._slots
+    supervisor._start(slot, primary=True)
+    crashed = slot.process
+    crashed.join(30)
+    assert crashed.exitcode == 3
+
+    supervisor._check(slot)
+    assert slot.process is None
+    assert slot.failures == 1
+    assert slot.next_start > time.monotonic()
+
+    deadline = time.monotonic() + 30
+    while slot.process is None or not slot.worker.last_beat:
+        assert time.monotonic() < deadline
+        supervisor._check(slot)
+        time.sleep(0.1)
+    try:
+        assert slot.process.pid != crashed.pid
+        assert not slot.worker.primary
+        assert supervisor._health(slot) is None
+    finally:
+        supervisor._terminate(slot.process)
+        supervisor._join([slot.process])
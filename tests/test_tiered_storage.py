@@ -0,0 +1,68 @@
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from src.storage import L1Cache, TieredStorage
+from src.storage.tiered import _MISSING
+
+
+KEY = StorageKey(bot_id=42, chat_id=1000, user_id=1000)
+
+
+async def _subscribed(storage: TieredStorage) -> TieredStorage:
+    await storage.get_state(KEY)
+    await asyncio.wait_for(storage._subscribed.wait(), 2)
+    return storage
+
+
+async def _invalidated(storage: TieredStorage, redis_key: str) -> None:
+    for _ in range(50):
+        if redis_key not in storage.l1._entries:
+            return
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"{redis_key} was not invalidated")
+
+
+async def test_writes_invalidate_other_processes_and_empty_data_is_deleted():
+    """Test cross-process invalidation over pub/sub and deletion of empty data."""
+    server = FakeServer()
+    first, second = [
+        await _subscribed(TieredStorage(RedisStorage(FakeRedis(server=server))))
+        for _ in range(2)
+    ]
+    redis_key = first.storage.key_builder.build(KEY, "data")
+
+    assert await second.get_data(KEY) == {}
+    await first.set_data(KEY, {"page": 1})
+    await _invalidated(second, redis_key)
+    assert await second.get_data(KEY) == {"page": 1}
+    assert second.l1.get(redis_key) is not _MISSING
+
+    await second.set_data(KEY, {})
+    assert await second.redis.exists(redis_key) == 0
+    await _invalidated(first, redis_key)
+    assert await first.get_data(KEY) == {}
+
+    await first.close()
+    await second.close()
+
+
+async def test_l1_entries_expire_and_least_recently_used_are_evicted():
+    """Test the time to live and LRU eviction of the L1 cache."""
+    cache = L1Cache(maxsize=2, ttl=0.05)
+    cache.put("a", "1")
+    cache.put("b", None)
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+
+    cache.get("a")
+    cache.put("c", "3")
+    assert cache.get("b") is _MISSING
+    assert len(cache) == 2
+
+    await asyncio.sleep(0.06)
+    assert cache.get("a") is _MISSING
+    assert (cache.hits, cache.misses) == (3, 2)
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.base import BaseSession
+from aiogram.filters import CommandStart
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendMessage
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+from aiogram_dialog import Dialog, DialogManager
+from dialog_yml import DialogYAMLBuilder, FuncsRegistry
+from fakeredis.aioredis import FakeRedis
+
+from src.functions.callbacks import delayed_notify
+from src.functions.timers import TIMERS_KEY, RedisTimerQueue, TimerScheduler
+
+
+class FakeBot:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, method):
+        self.calls.append(method)
+
+
+async def test_persisted_timer_survives_restart_and_runs_once():
+    """Test that a timer restored by two schedulers is called once."""
+    redis = FakeRedis()
+    method = AnswerCallbackQuery(callback_query_id="1", text="Later", show_alert=True)
+    await TimerScheduler(FakeBot(), RedisTimerQueue(redis)).schedule(method, 0.05)
+
+    bots = [FakeBot(), FakeBot()]
+    schedulers = [TimerScheduler(bot, RedisTimerQueue(redis)) for bot in bots]
+    for scheduler in schedulers:
+        await scheduler.start()
+    await asyncio.sleep(0.1)
+    for scheduler in schedulers:
+        await scheduler.stop()
+
+    assert [call for bot in bots for call in bot.calls] == [method]
+    assert await redis.zcard("spoetka_base:timers") == 0
+
+
+class RecordingSession(BaseSession):
+    """Bot session answering every request without a network."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(method)
+        if isinstance(method, (SendMessage, EditMessageText)):
+            return Message(
+                message_id=getattr(method, "message_id", None) or len(self.requests),
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=method.text,
+                reply_markup=method.reply_markup,
+            )
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self):
+        pass
+
+
+async def test_delayed_notify_sends_a_message_after_the_callback_is_answered(tmp_path):
+    """Test a delayed notify button driven through the dispatcher."""
+    if FuncsRegistry().notify.get("delayed_notify") is None:
+        FuncsRegistry().notify.register(delayed_notify)
+    (tmp_path / "main.yaml").write_text(
+        "dialogs:\n"
+        "  DelayedNotify:\n"
+        "    windows:\n"
+        "      MAIN:\n"
+        "        widgets:\n"
+        "          - text: Menu\n"
+        "          - callback:\n"
+        "              id: later\n"
+        "              text: Later\n"
+        "              notify:\n"
+        "                name: delayed_notify\n"
+        "                val: Done\n"
+        "                delay: 1\n"
+    )
+    router = DialogYAMLBuilder.build("main.yaml", str(tmp_path), router=Router()).router
+    (dialog,) = [
+        r
+        for r in router.sub_routers
+        if isinstance(r, Dialog) and r.states_group_name() == "DelayedNotify"
+    ]
+    session = RecordingSession()
+    bot = Bot("42:TOKEN", session=session)
+    timers = TimerScheduler(bot)
+    dp = Dispatcher(**{TIMERS_KEY: timers})
+    dp.include_router(router)
+
+    @router.message(CommandStart())
+    async def start(message: Message, dialog_manager: DialogManager):
+        await dialog_manager.start(dialog.states()[0])
+
+    user = User(id=1000, is_bot=False, first_name="User")
+    chat = Chat(id=1000, type="private")
+    message = Message(
+        message_id=1, date=datetime.now(), chat=chat, from_user=user, text="/start"
+    )
+    await dp.feed_update(bot, Update(update_id=1, message=message))
+    menu = session.requests[-1]
+    callback = CallbackQuery(
+        id="1",
+        from_user=user,
+        chat_instance="1",
+        message=Message(message_id=2, date=datetime.now(), chat=chat, text="Menu"),
+        data=menu.reply_markup.inline_keyboard[0][0].callback_data,
+    )
+    await timers.start()
+    await dp.feed_update(bot, Update(update_id=2, callback_query=callback))
+
+    (answer,) = [r for r in session.requests if isinstance(r, AnswerCallbackQuery)]
+    assert answer.text is None
+    assert not any(
+        r.text == "Done" for r in session.requests if isinstance(r, SendMessage)
+    )
+    await asyncio.sleep(1.1)
+    await timers.stop()
+    assert session.requests[-1] == SendMessage(chat_id=1000, text="Done")
@@ -0,0 +1,51 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.webhook import BoundedRequestHandler
+
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1000, "type": "private"},
+        "text": "hi",
+    },
+}
+
+
+async def test_requests_wait_for_a_slot_and_are_refused_while_draining():
+    """Test backpressure at max_in_flight and 503 responses once draining."""
+    release = asyncio.Event()
+    dp = Dispatcher()
+
+    @dp.message()
+    async def handle(message):
+        await release.wait()
+
+    handler = BoundedRequestHandler(
+        dispatcher=dp, bot=Bot("42:TOKEN"), max_in_flight=1, drain_timeout=5
+    )
+    app = web.Application()
+    handler.register(app, path="/webhook")
+
+    async with TestClient(TestServer(app)) as client:
+        first = await client.post("/webhook", json=UPDATE)
+        assert first.status == 200
+        assert handler.in_flight == 1
+
+        second = asyncio.create_task(client.post("/webhook", json=UPDATE))
+        await asyncio.sleep(0.1)
+        assert not second.done()
+
+        release.set()
+        assert (await second).status == 200
+
+        await handler.drain()
+        assert handler.in_flight == 0
+        assert (await client.post("/webhook", json=UPDATE)).status == 503
+    await handler.bot.session.close()